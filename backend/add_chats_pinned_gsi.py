@@ -0,0 +1,123 @@
+"""
+Script to add the pinned-first pagination indexes to an existing chats table
+user-pinned-index and user-unpinned-index are sparse: a chat appears in the
+first when it carries pinned_user_id and in the second when it carries
+unpinned_user_id, both sorted by updated_at. GET /api/chats/paginated/ reads
+pinned chats and then the rest from them without filtering anything out.
+Run migrate_chat_list_keys.py afterwards so existing chats get the attribute.
+Usage: python add_chats_pinned_gsi.py
+"""
+import boto3
+from botocore.exceptions import ClientError
+import time
+
+# Configuration
+REGION = 'us-east-1'
+PROFILE = 'Venkatesh'
+TABLE_NAME = 'chat_app_chats'
+LIST_ATTRIBUTES = [
+    'user_id', 'title', 'model_id', 'chat_type', 'participant_id', 'conversation_id',
+    'participant_deleted', 'pinned', 'created_at', 'revision', 'message_count', 'last_message',
+    'unread_count', 'last_read_at'
+]
+INDEXES = [
+    {
+        'IndexName': 'user-pinned-index',
+        'KeySchema': [
+            {'AttributeName': 'pinned_user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': LIST_ATTRIBUTES}
+    },
+    {
+        'IndexName': 'user-unpinned-index',
+        'KeySchema': [
+            {'AttributeName': 'unpinned_user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': LIST_ATTRIBUTES}
+    }
+]
+
+def wait_for_index(dynamodb, index_name):
+    """Poll until the index is ACTIVE"""
+    while True:
+        time.sleep(5)
+        response = dynamodb.describe_table(TableName=TABLE_NAME)
+
+        gsi_status = None
+        for gsi in response['Table'].get('GlobalSecondaryIndexes', []):
+            if gsi['IndexName'] == index_name:
+                gsi_status = gsi['IndexStatus']
+                break
+
+        if gsi_status == 'ACTIVE':
+            print(f"✓ GSI '{index_name}' is now ACTIVE!")
+            return
+        print(f"  Status: {gsi_status} (waiting...)")
+
+def add_gsis():
+    """Add the pagination GSIs to the existing chats table (DynamoDB allows one at a time)"""
+    print(f"Adding pagination GSIs to table: {TABLE_NAME}")
+    print(f"Region: {REGION}")
+    print(f"Profile: {PROFILE}")
+    print("=" * 60)
+
+    session = boto3.Session(profile_name=PROFILE) if PROFILE else boto3.Session()
+    dynamodb = session.client('dynamodb', region_name=REGION)
+
+    try:
+        for index in INDEXES:
+            response = dynamodb.describe_table(TableName=TABLE_NAME)
+            existing_gsis = response['Table'].get('GlobalSecondaryIndexes', [])
+            if any(gsi['IndexName'] == index['IndexName'] for gsi in existing_gsis):
+                print(f"✓ GSI '{index['IndexName']}' already exists")
+                continue
+
+            print(f"\nAdding GSI '{index['IndexName']}'...")
+            print("This operation may take several minutes depending on table size...")
+
+            dynamodb.update_table(
+                TableName=TABLE_NAME,
+                AttributeDefinitions=[
+                    {'AttributeName': index['KeySchema'][0]['AttributeName'], 'AttributeType': 'S'},
+                    {'AttributeName': 'updated_at', 'AttributeType': 'S'}
+                ],
+                GlobalSecondaryIndexUpdates=[{'Create': index}]
+            )
+            wait_for_index(dynamodb, index['IndexName'])
+
+        print("\n" + "=" * 60)
+        print("SUCCESS!")
+        print("=" * 60)
+        print("\nNext, add the index attributes to existing chats:")
+        print("  python migrate_chat_list_keys.py")
+        return True
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+
+        if error_code == 'ResourceNotFoundException':
+            print(f"\n✗ Error: Table '{TABLE_NAME}' does not exist")
+            print("\nPlease create the table first:")
+            print("  python create_dynamodb_tables.py")
+        elif error_code == 'LimitExceededException':
+            print(f"\n✗ Error: Cannot add GSI - limit exceeded")
+        elif error_code == 'ResourceInUseException':
+            print(f"\n✗ Error: Table is currently being updated")
+            print("\nPlease wait for the current operation to complete and try again")
+        else:
+            print(f"\n✗ Error: {e}")
+
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = add_gsis()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled by user")
+        exit(1)
+    except Exception as e:
+        print(f"\n✗ Fatal error: {e}")
+        exit(1)
@@ -0,0 +1,128 @@
+"""
+Script to add the summary index to an existing chats table
+user-summary-index has the same keys as user-id-index but projects only
+the sidebar's attributes (title, pinned, message_count, last_message...),
+so chat listings without messages don't pay to read message histories.
+Run migrate_chat_summaries.py afterwards to fill in previews of old chats.
+An index created with an older attribute list (before unread_count and
+last_read_at) is deleted and created again, since a GSI's projection can't
+be changed in place. Chat listings fail until the new index is ACTIVE, so
+run it in a quiet period.
+Usage: python add_chats_summary_gsi.py
+"""
+import boto3
+from botocore.exceptions import ClientError
+import time
+
+# Configuration
+REGION = 'us-east-1'
+PROFILE = 'Venkatesh'
+TABLE_NAME = 'chat_app_chats'
+INDEX = {
+    'IndexName': 'user-summary-index',
+    'KeySchema': [
+        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+    ],
+    'Projection': {
+        'ProjectionType': 'INCLUDE',
+        'NonKeyAttributes': ['title', 'model_id', 'chat_type', 'participant_id', 'conversation_id',
+                             'participant_deleted', 'pinned', 'created_at', 'revision',
+                             'message_count', 'last_message', 'unread_count', 'last_read_at']
+    }
+}
+
+def index_status(dynamodb):
+    """(IndexStatus, description) of the summary index, or (None, None) if it doesn't exist"""
+    response = dynamodb.describe_table(TableName=TABLE_NAME)
+    for gsi in response['Table'].get('GlobalSecondaryIndexes', []):
+        if gsi['IndexName'] == INDEX['IndexName']:
+            return gsi['IndexStatus'], gsi
+    return None, None
+
+def add_gsi():
+    """Add the summary GSI to the existing chats table"""
+    print(f"Adding summary GSI to table: {TABLE_NAME}")
+    print(f"Region: {REGION}")
+    print(f"Profile: {PROFILE}")
+    print("=" * 60)
+
+    session = boto3.Session(profile_name=PROFILE) if PROFILE else boto3.Session()
+    dynamodb = session.client('dynamodb', region_name=REGION)
+
+    try:
+        _, existing = index_status(dynamodb)
+        if existing:
+            attributes = existing['Projection'].get('NonKeyAttributes', [])
+            missing = set(INDEX['Projection']['NonKeyAttributes']) - set(attributes)
+            if not missing:
+                print(f"✓ GSI '{INDEX['IndexName']}' already exists")
+                print("\nNo action needed!")
+                return True
+
+            print(f"\nGSI '{INDEX['IndexName']}' lacks {', '.join(sorted(missing))}; recreating it...")
+            dynamodb.update_table(
+                TableName=TABLE_NAME,
+                GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': INDEX['IndexName']}}]
+            )
+            while index_status(dynamodb)[0] is not None:
+                time.sleep(5)
+                print("  Status: DELETING (waiting...)")
+            print(f"✓ Old GSI '{INDEX['IndexName']}' deleted")
+
+        print(f"\nAdding GSI '{INDEX['IndexName']}'...")
+        print("This operation may take several minutes depending on table size...")
+
+        dynamodb.update_table(
+            TableName=TABLE_NAME,
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'updated_at', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': INDEX}]
+        )
+
+        # Wait for GSI to be created
+        while True:
+            time.sleep(5)
+            gsi_status, _ = index_status(dynamodb)
+
+            if gsi_status == 'ACTIVE':
+                print(f"✓ GSI '{INDEX['IndexName']}' is now ACTIVE!")
+                break
+            print(f"  Status: {gsi_status} (waiting...)")
+
+        print("\n" + "=" * 60)
+        print("SUCCESS!")
+        print("=" * 60)
+        print("\nNext, fill in summaries of existing chats:")
+        print("  python migrate_chat_summaries.py")
+        return True
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+
+        if error_code == 'ResourceNotFoundException':
+            print(f"\n✗ Error: Table '{TABLE_NAME}' does not exist")
+            print("\nPlease create the table first:")
+            print("  python create_dynamodb_tables.py")
+        elif error_code == 'LimitExceededException':
+            print(f"\n✗ Error: Cannot add GSI - limit exceeded")
+        elif error_code == 'ResourceInUseException':
+            print(f"\n✗ Error: Table is currently being updated")
+            print("\nPlease wait for the current operation to complete and try again")
+        else:
+            print(f"\n✗ Error: {e}")
+
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = add_gsi()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled by user")
+        exit(1)
+    except Exception as e:
+        print(f"\n✗ Fatal error: {e}")
+        exit(1)
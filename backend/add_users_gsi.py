@@ -0,0 +1,118 @@
+"""
+Script to add the admin listing indexes to an existing users table
+status-created-index and status-name-index let GET /users/ and
+GET /users/pending/ page through users sorted by signup date or name while
+reading only display fields (no hashed_password).
+Usage: python add_users_gsi.py
+"""
+import boto3
+from botocore.exceptions import ClientError
+import time
+
+# Configuration
+REGION = 'us-east-1'
+PROFILE = 'Venkatesh'
+TABLE_NAME = 'chat_app_users'
+LIST_ATTRIBUTES = [
+    'email', 'bio', 'role', 'custom_role', 'updated_at',
+    'tokens_used_this_month', 'token_usage_reset_date'
+]
+INDEXES = [
+    {
+        'IndexName': 'status-created-index',
+        'KeySchema': [
+            {'AttributeName': 'status', 'KeyType': 'HASH'},
+            {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': LIST_ATTRIBUTES + ['name']}
+    },
+    {
+        'IndexName': 'status-name-index',
+        'KeySchema': [
+            {'AttributeName': 'status', 'KeyType': 'HASH'},
+            {'AttributeName': 'name', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': LIST_ATTRIBUTES + ['created_at']}
+    }
+]
+
+def wait_for_index(dynamodb, index_name):
+    """Poll until the index is ACTIVE"""
+    while True:
+        time.sleep(5)
+        response = dynamodb.describe_table(TableName=TABLE_NAME)
+
+        gsi_status = None
+        for gsi in response['Table'].get('GlobalSecondaryIndexes', []):
+            if gsi['IndexName'] == index_name:
+                gsi_status = gsi['IndexStatus']
+                break
+
+        if gsi_status == 'ACTIVE':
+            print(f"✓ GSI '{index_name}' is now ACTIVE!")
+            return
+        print(f"  Status: {gsi_status} (waiting...)")
+
+def add_gsis():
+    """Add listing GSIs to existing users table (DynamoDB allows one at a time)"""
+    print(f"Adding listing GSIs to table: {TABLE_NAME}")
+    print(f"Region: {REGION}")
+    print(f"Profile: {PROFILE}")
+    print("=" * 60)
+
+    session = boto3.Session(profile_name=PROFILE) if PROFILE else boto3.Session()
+    dynamodb = session.client('dynamodb', region_name=REGION)
+
+    try:
+        for index in INDEXES:
+            response = dynamodb.describe_table(TableName=TABLE_NAME)
+            existing_gsis = response['Table'].get('GlobalSecondaryIndexes', [])
+            if any(gsi['IndexName'] == index['IndexName'] for gsi in existing_gsis):
+                print(f"✓ GSI '{index['IndexName']}' already exists")
+                continue
+
+            print(f"\nAdding GSI '{index['IndexName']}'...")
+            print("This operation may take several minutes depending on table size...")
+
+            dynamodb.update_table(
+                TableName=TABLE_NAME,
+                AttributeDefinitions=[
+                    {'AttributeName': 'status', 'AttributeType': 'S'},
+                    {'AttributeName': 'created_at', 'AttributeType': 'S'},
+                    {'AttributeName': 'name', 'AttributeType': 'S'}
+                ],
+                GlobalSecondaryIndexUpdates=[{'Create': index}]
+            )
+            wait_for_index(dynamodb, index['IndexName'])
+
+        print("\n" + "=" * 60)
+        print("SUCCESS!")
+        print("=" * 60)
+        print("\nAdmin user listings are now paginated and read only display fields")
+        return True
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+
+        if error_code == 'ResourceNotFoundException':
+            print(f"\n✗ Error: Table '{TABLE_NAME}' does not exist")
+            print("\nPlease create the table first:")
+            print("  python create_dynamodb_tables.py")
+        elif error_code == 'ResourceInUseException':
+            print(f"\n✗ Error: Table is currently being updated")
+            print("\nPlease wait for the current operation to complete and try again")
+        else:
+            print(f"\n✗ Error: {e}")
+
+        return False
+
+if __name__ == "__main__":
+    try:
+        success = add_gsis()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled by user")
+        exit(1)
+    except Exception as e:
+        print(f"\n✗ Fatal error: {e}")
+        exit(1)
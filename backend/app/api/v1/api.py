@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, models, roles, chats
+from app.api.v1.endpoints import auth, users, models, roles, chats, bootstrap
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(models.router, prefix="/models", tags=["Models"])
 api_router.include_router(roles.router, prefix="/roles", tags=["Roles"])
 api_router.include_router(chats.router, prefix="/chats", tags=["Chats"])
+api_router.include_router(bootstrap.router, prefix="/bootstrap", tags=["Bootstrap"])
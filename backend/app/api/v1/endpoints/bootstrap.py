@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+
+from app.core.config import settings
+from app.core.catalog import get_model_catalog
+from app.core.permissions import get_user_role, role_features, role_limits
+from app.core.responses import model_response
+from app.core.sync import sync_page
+from app.models.bootstrap import Bootstrap
+from app.models.user import User
+from app.api.deps import get_current_user
+
+router = APIRouter()
+
+def _chats(user: User, chat_cursor: Optional[str]) -> dict:
+    try:
+        return sync_page(user.id, chat_cursor, settings.SYNC_PAGE_SIZE)
+    except ValueError:
+        # Unusable cursor (another user's, or tampered with): send the full list
+        return sync_page(user.id, None, settings.SYNC_PAGE_SIZE)
+
+@router.get("/", response_model=Bootstrap)
+async def bootstrap(
+    chat_cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Everything the app needs on load, in one round trip
+
+    The user is authenticated once, then the chat list (a delta sync from
+    chat_cursor), the model catalog and the role that limits and permissions
+    both come from are read concurrently.
+    """
+    chats, catalog, role = await asyncio.gather(
+        run_in_threadpool(_chats, current_user, chat_cursor),
+        run_in_threadpool(get_model_catalog().for_user, current_user),
+        run_in_threadpool(get_user_role, current_user)
+    )
+    
+    return model_response(Bootstrap, {
+        'user': current_user,
+        'chats': chats,
+        'models': catalog.models,
+        'limits': role_limits(current_user, role),
+        'permissions': role_features(current_user, role)
+    })
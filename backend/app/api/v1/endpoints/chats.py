@@ -1,56 +1,294 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, File, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
 import uuid
+import zlib
 
-from app.core.database import get_dynamodb
+from app.core.bulk import batch_get, batch_write_each, summarize
+from app.core.database import CHAT_LIST_PROJECTION, CHAT_SUMMARY_ATTRIBUTES, get_dynamodb
+from app.core.dynamo import decode_item, encode_values, materialize
+from app.core.fields import parse_fields, partial_model, projection
 from app.core.config import settings
-from app.models.chat import ChatCreate, ChatUpdate, Chat, MessageCreate
+from app.core.catalog import get_model_catalog
+from app.core.chat_import import enqueue_chat_import, spool_upload
+from app.core.chat_pages import chat_page, list_key, list_key_names
+from app.core.credentials import get_credential_cache
+from app.core.jobs import get_job_registry
+from app.core.scheduler import get_scheduler
+from app.core.responses import etag_matches, make_etag, model_response, not_modified
+from app.core.search import get_search_index
+from app.core.semantic import get_semantic_index
+from app.core.streaming import ReplyWriter, spawn
+from app.core.summary import chat_summary, summary_update
+from app.core.sync import record_deletions, sync_page
+from app.core.upstream import stream_chat, UpstreamError
+from app.core.usage import get_usage_tracker, estimate_tokens, tokens_this_month
+from app.models.bulk import BulkResult, JobStatus
+from app.models.chat import ChatCreate, ChatUpdate, Chat, MessageCreate, CompletionRequest, BulkChatAction, SearchHit, ChatSyncPage, ChatReadState, ChatPage
 from app.models.user import User
 from app.api.deps import get_current_user, decimal_to_float
 
 router = APIRouter()
 
+# Fields a listing can read from user-summary-index instead of the full items
+SUMMARY_INDEX_FIELDS = frozenset(['id', 'user_id', 'updated_at', *CHAT_SUMMARY_ATTRIBUTES])
+
 @router.get("/", response_model=List[Chat])
-async def get_chats(current_user: User = Depends(get_current_user), include_messages: bool = True):
-    """Get all user chats (optimized with GSI query)"""
-    db = get_dynamodb()
-    table = db.get_table(settings.CHATS_TABLE)
+async def get_chats(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    include_messages: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated Chat fields to return (id is always included)")
+):
+    """Get all user chats (optimized with GSI query)
+
+    include_messages=false is the sidebar's summary mode: no histories, but
+    each chat's message_count and a preview of its last message.
+    """
+    try:
+        names = parse_fields(Chat, fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    client = get_dynamodb().get_client()
     
     # Use GSI query instead of scan for much better performance
     # This queries the user-id-index and automatically sorts by updated_at (newest first)
+    query_params = {
+        'TableName': settings.CHATS_TABLE,
+        'IndexName': 'user-id-index',
+        'KeyConditionExpression': 'user_id = :user_id',
+        'ExpressionAttributeValues': encode_values({':user_id': current_user.id}),
+        'ScanIndexForward': False,  # Sort descending (newest first)
+        'Limit': 50  # Limit to 50 most recent chats for faster initial load
+    }
     
-    if include_messages:
-        # Full chats with messages
-        response = table.query(
-            IndexName='user-id-index',
-            KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': current_user.id},
-            ScanIndexForward=False,  # Sort descending (newest first)
-            Limit=50  # Limit to 50 most recent chats for faster initial load
-        )
-    else:
-        # Lightweight: exclude messages for faster initial load
-        response = table.query(
-            IndexName='user-id-index',
-            KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': current_user.id},
-            ScanIndexForward=False,
-            Limit=50,
-            ProjectionExpression='id, user_id, title, chat_type, participant_id, conversation_id, pinned, created_at, updated_at'
-        )
+    if names is not None:
+        # Only what was asked for, plus what sorting and the ETag need
+        expression, aliases = projection([*names, 'updated_at', 'revision', 'pinned'])
+        query_params['ProjectionExpression'] = expression
+        query_params['ExpressionAttributeNames'] = aliases
+        if SUMMARY_INDEX_FIELDS.issuperset(names):
+            query_params['IndexName'] = 'user-summary-index'
+    elif not include_messages:
+        # Summary mode: the slim index holds titles and last-message previews
+        # but no histories, so reads are billed by the size of the summaries
+        query_params['IndexName'] = 'user-summary-index'
+        query_params['ProjectionExpression'] = CHAT_LIST_PROJECTION
+    
+    response = client.query(**query_params)
+    chats = [decode_item(item, lazy=('messages',)) for item in response.get('Items', [])]
     
-    chats = [decimal_to_float(item) for item in response.get('Items', [])]
+    # The list is versioned by which chats it holds and each one's revision
+    etag = make_etag(names or include_messages, *(_chat_version(chat) for chat in chats))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    chats = [materialize(chat) for chat in chats]
     
     # Add empty messages array if not included
-    if not include_messages:
+    if names is None and not include_messages:
         for chat in chats:
             chat['messages'] = []
     
     # Sort by pinned status (pinned chats first), then by updated_at
     chats.sort(key=lambda x: (not x.get('pinned', False), x.get('updated_at', '')), reverse=True)
     
-    return chats
+    chat_model = Chat if names is None else partial_model(Chat, names)
+    return model_response(List[chat_model], chats, etag=etag)
+
+@router.get("/sync/", response_model=ChatSyncPage)
+def sync_chats(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=500),
+    include_messages: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Chats created, updated or deleted since the last sync
+
+    Without a cursor, or with one older than the tombstones are kept, the
+    whole list comes back with reset=true. Follow pages with has_more=true
+    using their cursor; keep the last page's cursor for the next sync.
+    Chats near the cursor's time may be sent again, so apply them by id.
+    """
+    try:
+        page = sync_page(current_user.id, cursor, limit, include_messages)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return model_response(ChatSyncPage, page)
+
+@router.get("/paginated/", response_model=ChatPage)
+def get_chats_paginated(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Chat summaries one page at a time, pinned chats first, then newest first
+
+    Follow next_cursor until it is null. Messages are left out; open a chat
+    with GET /chats/{chat_id}/.
+    """
+    try:
+        page = chat_page(current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return model_response(ChatPage, page)
+
+def _chat_version(chat: dict) -> tuple:
+    # updated_at is left alone by partial reply writes; revision is bumped by every write
+    return (chat['id'], chat.get('updated_at'), chat.get('revision', 0))
+
+def _can_export(user: User) -> bool:
+    """The export feature permission (admins always, users without a custom role never)"""
+    if user.role == 'admin':
+        return True
+    if not user.custom_role:
+        return False
+    
+    roles_table = get_dynamodb().get_table(settings.ROLES_TABLE)
+    role_response = roles_table.get_item(
+        Key={'id': user.custom_role},
+        ProjectionExpression='#permissions',
+        ExpressionAttributeNames={'#permissions': 'permissions'}
+    )
+    if 'Item' not in role_response:
+        return False
+    features = role_response['Item'].get('permissions', {}).get('features', {})
+    return bool(features.get('export', False))
+
+@router.get("/export/")
+async def export_chats(
+    compress: bool = False,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Download all of the user's chats as NDJSON, one chat per line (gzipped with compress=true)"""
+    if not await run_in_threadpool(_can_export, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to export chats"
+        )
+    
+    client = get_dynamodb().get_client()
+    tables = [settings.CHATS_TABLE]
+    if include_archived:
+        tables.append(settings.CHATS_ARCHIVE_TABLE)
+    
+    async def lines():
+        # One page of chats in memory at a time, oldest first
+        for table_name in tables:
+            query_params = {
+                'TableName': table_name,
+                'IndexName': 'user-id-index',
+                'KeyConditionExpression': 'user_id = :user_id',
+                'ExpressionAttributeValues': encode_values({':user_id': current_user.id}),
+                'Limit': settings.EXPORT_PAGE_SIZE
+            }
+            while True:
+                response = await run_in_threadpool(client.query, **query_params)
+                page = [
+                    json.dumps(decode_item(item), ensure_ascii=False) + '\n'
+                    for item in response.get('Items', [])
+                ]
+                if page:
+                    yield ''.join(page).encode()
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    async def gzipped():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        async for chunk in lines():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    
+    filename = f"chats-{datetime.utcnow().strftime('%Y%m%d')}.ndjson"
+    if compress:
+        filename += '.gz'
+    return StreamingResponse(
+        gzipped() if compress else lines(),
+        media_type='application/gzip' if compress else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+def _chat_allowance(user: User):
+    """How many more chats the user's role allows, or None for no limit"""
+    if not user.custom_role:
+        return None
+    
+    db = get_dynamodb()
+    role_response = db.get_table(settings.ROLES_TABLE).get_item(Key={'id': user.custom_role})
+    max_chats = role_response.get('Item', {}).get('max_chats')
+    if max_chats is None:
+        return None
+    
+    table = db.get_table(settings.CHATS_TABLE)
+    query_params = {
+        'IndexName': 'user-id-index',
+        'KeyConditionExpression': 'user_id = :user_id',
+        'ExpressionAttributeValues': {':user_id': user.id},
+        'Select': 'COUNT'
+    }
+    count = 0
+    while True:
+        response = table.query(**query_params)
+        count += response.get('Count', 0)
+        if 'LastEvaluatedKey' not in response:
+            return max(int(max_chats) - count, 0)
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+@router.post("/import/", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def import_chats(
+    file: UploadFile = File(...),
+    resume_from: int = Query(1, ge=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Import chats from a JSONL, gzipped JSONL or ZIP upload in the background
+
+    Poll GET /chats/import/{job_id}/; after a failure, upload the same file
+    with the job's resume_from to continue where it stopped.
+    """
+    # Checked per chat by the job: at the limit, chats imported before can still be overwritten
+    allowance = await run_in_threadpool(_chat_allowance, current_user)
+    
+    try:
+        path = await run_in_threadpool(spool_upload, file.file)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    
+    job = enqueue_chat_import(current_user.id, path, resume_from, allowance)
+    return job.to_dict()
+
+@router.get("/import/{job_id}/", response_model=JobStatus)
+async def get_import_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a chat import: lines read, chats imported, failed lines"""
+    job = get_job_registry().get(job_id)
+    if not job or job.kind != 'chat_import' or job.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    return job.to_dict()
 
 @router.post("/", response_model=Chat, status_code=status.HTTP_201_CREATED)
 def create_chat(
@@ -91,10 +329,13 @@ def create_chat(
     chat_dict['shared_with'] = []
     chat_dict['created_at'] = datetime.utcnow().isoformat()
     chat_dict['updated_at'] = datetime.utcnow().isoformat()
+    chat_dict.update(chat_summary(chat_dict['messages']))
+    chat_dict.update(list_key(current_user.id, chat_dict['pinned']))
     
     chats_table.put_item(Item=chat_dict)
+    get_search_index().index_chats(current_user.id, [chat_dict])
     
-    return Chat(**chat_dict)
+    return model_response(Chat, chat_dict, status.HTTP_201_CREATED)
 
 @router.put("/{chat_id}/", response_model=Chat)
 def update_chat(
@@ -106,8 +347,8 @@ def update_chat(
     db = get_dynamodb()
     table = db.get_table(settings.CHATS_TABLE)
     
-    # First verify the chat belongs to the user
-    response = table.get_item(Key={'id': chat_id})
+    # First verify the chat belongs to the user (messages are never decoded)
+    response = db.get_client().get_item(TableName=settings.CHATS_TABLE, Key=encode_values({'id': chat_id}))
     
     if 'Item' not in response:
         raise HTTPException(
@@ -115,7 +356,7 @@ def update_chat(
             detail="Chat not found"
         )
     
-    chat = decimal_to_float(response['Item'])
+    chat = decode_item(response['Item'], lazy=('messages',))
     
     if chat.get('user_id') != current_user.id:
         raise HTTPException(
@@ -143,6 +384,18 @@ def update_chat(
         expr_names[attr_name] = key
         expr_values[attr_value] = value
     
+    # Pinning moves the chat between the pinned and unpinned list indexes
+    if 'pinned' in update_dict:
+        list_attribute, other_attribute = list_key_names(update_dict['pinned'])
+        update_expr += f', {list_attribute} = :list_user_id'
+        expr_values[':list_user_id'] = current_user.id
+    
+    # Every write bumps the revision that versions the chat's ETag
+    update_expr += ' ADD revision :one'
+    expr_values[':one'] = 1
+    if 'pinned' in update_dict:
+        update_expr += f' REMOVE {other_attribute}'
+    
     response = table.update_item(
         Key={'id': chat_id},
         UpdateExpression=update_expr,
@@ -152,19 +405,54 @@ def update_chat(
     )
     
     updated_chat = decimal_to_float(response['Attributes'])
+    if 'title' in update_dict:
+        get_search_index().set_title(current_user.id, chat_id, update_dict['title'])
     
-    return Chat(**updated_chat)
+    return model_response(Chat, updated_chat)
+
+@router.get("/search/", response_model=List[SearchHit])
+async def search_chats(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    mode: Literal['keyword', 'semantic'] = 'keyword',
+    current_user: User = Depends(get_current_user)
+):
+    """Search the user's chats, best matches first
+
+    keyword: full-text (BM25). semantic: nearest messages by embedding,
+    for "the conversation where we discussed X" queries.
+    """
+    index = get_semantic_index() if mode == 'semantic' else get_search_index()
+    hits = await run_in_threadpool(index.search, current_user.id, q, limit)
+    if not hits:
+        return []
+    
+    # The index can trail deletes made elsewhere; only return chats that still exist
+    resource = get_dynamodb().get_resource()
+    chats = {
+        chat['id']: chat
+        for chat in await batch_get(
+            resource, settings.CHATS_TABLE, [{'id': hit['chat_id']} for hit in hits],
+            projection='id, user_id, title, updated_at'
+        )
+    }
+    results = []
+    for hit in hits:
+        chat = chats.get(hit['chat_id'])
+        if chat and chat.get('user_id') == current_user.id:
+            results.append({**hit, 'title': chat.get('title'), 'updated_at': chat.get('updated_at')})
+    return results
 
 @router.get("/{chat_id}/", response_model=Chat)
 async def get_chat(
     chat_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Get a single chat with all messages"""
-    db = get_dynamodb()
-    table = db.get_table(settings.CHATS_TABLE)
+    client = get_dynamodb().get_client()
     
-    response = table.get_item(Key={'id': chat_id})
+    response = client.get_item(TableName=settings.CHATS_TABLE, Key=encode_values({'id': chat_id}))
     
     if 'Item' not in response:
         raise HTTPException(
@@ -172,7 +460,8 @@ async def get_chat(
             detail="Chat not found"
         )
     
-    chat = decimal_to_float(response['Item'])
+    # Messages are only decoded once the caller is known to own the chat
+    chat = decode_item(response['Item'], lazy=('messages',))
     
     if chat.get('user_id') != current_user.id:
         raise HTTPException(
@@ -180,7 +469,12 @@ async def get_chat(
             detail="Not authorized to access this chat"
         )
     
-    return Chat(**chat)
+    # Unchanged since the client's copy: answered without decoding the messages
+    etag = make_etag(_chat_version(chat))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return model_response(Chat, materialize(chat), etag=etag)
 
 @router.delete("/{chat_id}/")
 def delete_chat(
@@ -191,8 +485,8 @@ def delete_chat(
     db = get_dynamodb()
     table = db.get_table(settings.CHATS_TABLE)
     
-    # First verify the chat belongs to the user
-    response = table.get_item(Key={'id': chat_id})
+    # First verify the chat belongs to the user (messages are never decoded)
+    response = db.get_client().get_item(TableName=settings.CHATS_TABLE, Key=encode_values({'id': chat_id}))
     
     if 'Item' not in response:
         raise HTTPException(
@@ -200,7 +494,7 @@ def delete_chat(
             detail="Chat not found"
         )
     
-    chat = decimal_to_float(response['Item'])
+    chat = decode_item(response['Item'], lazy=('messages',))
     
     if chat.get('user_id') != current_user.id:
         raise HTTPException(
@@ -209,9 +503,169 @@ def delete_chat(
         )
     
     table.delete_item(Key={'id': chat_id})
+    get_search_index().remove_chats(current_user.id, [chat_id])
+    record_deletions(current_user.id, [chat_id])
     
     return {"message": "Chat deleted successfully"}
 
+async def _matching_chat_ids(table, user_id: str, request: BulkChatAction) -> List[str]:
+    """Ids of the user's chats matching the bulk filters, read from user-id-index"""
+    key_condition = 'user_id = :user_id'
+    values = {':user_id': user_id}
+    query_params = {'IndexName': 'user-id-index', 'ProjectionExpression': 'id'}
+    
+    if request.older_than:
+        older_than = request.older_than
+        if older_than.tzinfo:
+            older_than = older_than.astimezone(timezone.utc).replace(tzinfo=None)
+        key_condition += ' AND updated_at < :older_than'
+        values[':older_than'] = older_than.isoformat()
+    if request.unpinned_only:
+        query_params['FilterExpression'] = 'attribute_not_exists(pinned) OR pinned = :false'
+        values[':false'] = False
+    
+    query_params['KeyConditionExpression'] = key_condition
+    query_params['ExpressionAttributeValues'] = values
+    
+    chat_ids = []
+    while True:
+        response = await run_in_threadpool(table.query, **query_params)
+        chat_ids.extend(item['id'] for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return chat_ids
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+@router.post("/bulk/", response_model=BulkResult)
+async def bulk_chat_action(
+    request: BulkChatAction,
+    current_user: User = Depends(get_current_user)
+):
+    """Delete or archive many chats, given by chat_ids or selected by filters"""
+    has_filters = request.older_than is not None or request.unpinned_only
+    if (request.chat_ids is None) == (not has_filters):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either chat_ids or filters (older_than, unpinned_only)"
+        )
+    
+    resource = get_dynamodb().get_resource()
+    table = resource.Table(settings.CHATS_TABLE)
+    archive = request.action == 'archive'
+    
+    if request.chat_ids is not None:
+        chat_ids = list(dict.fromkeys(request.chat_ids))
+    else:
+        chat_ids = await _matching_chat_ids(table, current_user.id, request)
+    
+    # Ownership check in batches of 100; archiving needs the whole item anyway
+    found = {
+        item['id']: item
+        for item in await batch_get(
+            resource, settings.CHATS_TABLE, [{'id': chat_id} for chat_id in chat_ids],
+            projection=None if archive else 'id, user_id'
+        )
+    }
+    
+    errors = {}
+    selected = []
+    for chat_id in chat_ids:
+        chat = found.get(chat_id)
+        if not chat:
+            errors[chat_id] = "Chat not found"
+        elif chat.get('user_id') != current_user.id:
+            errors[chat_id] = "Not authorized to modify this chat"
+        else:
+            selected.append(chat)
+    
+    selected_ids = [chat['id'] for chat in selected]
+    if archive:
+        # Only chats whose archive copy was written get removed from the chat list
+        archived_at = datetime.utcnow().isoformat()
+        failed = await batch_write_each(
+            resource,
+            settings.CHATS_ARCHIVE_TABLE,
+            [{'PutRequest': {'Item': {**chat, 'archived_at': archived_at}}} for chat in selected]
+        )
+        for put in failed:
+            errors[put['PutRequest']['Item']['id']] = "Could not archive chat"
+        selected_ids = [chat_id for chat_id in selected_ids if chat_id not in errors]
+    
+    failed = await batch_write_each(
+        resource, settings.CHATS_TABLE, [{'DeleteRequest': {'Key': {'id': chat_id}}} for chat_id in selected_ids]
+    )
+    for delete in failed:
+        # Archiving again is safe: the copy is overwritten and the delete retried
+        errors[delete['DeleteRequest']['Key']['id']] = (
+            "Archived, but could not be removed from chats" if archive else "Could not delete chat"
+        )
+    removed = [chat_id for chat_id in selected_ids if chat_id not in errors]
+    await run_in_threadpool(get_search_index().remove_chats, current_user.id, removed)
+    await run_in_threadpool(record_deletions, current_user.id, removed)
+    
+    return summarize([
+        {'id': chat_id, 'success': chat_id not in errors, 'error': errors.get(chat_id)}
+        for chat_id in chat_ids
+    ])
+
+
+def _append_message(
+    table,
+    chat_id: str,
+    messages: List[dict],
+    message: dict,
+    timestamp: str,
+    set_clauses: str = '',
+    values: Optional[dict] = None,
+    add_clauses: str = ''
+) -> List[dict]:
+    """Append message to a chat's history and return the new history.
+
+    messages is the history as last read. The append only lands if the list
+    still has that length, so a reply streaming into the chat (or a message
+    from the other side of a direct chat) is never dropped or moved; if it
+    changed, the history is read again and the append retried.
+    """
+    for _ in range(3):
+        updated = messages + [message]
+        summary_expression, summary_values = summary_update(updated)
+        if messages:
+            condition = 'size(messages) = :count'
+        else:
+            condition = 'attribute_not_exists(messages) OR size(messages) = :count'
+        try:
+            table.update_item(
+                Key={'id': chat_id},
+                UpdateExpression=(
+                    'SET messages = list_append(if_not_exists(messages, :empty), :message), '
+                    f'updated_at = :updated_at, {summary_expression}{set_clauses} '
+                    f'ADD revision :one{add_clauses}'
+                ),
+                ConditionExpression=f'attribute_exists(id) AND ({condition})',
+                ExpressionAttributeValues={
+                    ':empty': [],
+                    ':message': [message],
+                    ':count': len(messages),
+                    ':updated_at': timestamp,
+                    ':one': 1,
+                    **summary_values,
+                    **(values or {})
+                }
+            )
+            return updated
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            response = table.get_item(Key={'id': chat_id}, ProjectionExpression='messages')
+            if 'Item' not in response:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Chat not found"
+                )
+            messages = decimal_to_float(response['Item']).get('messages', [])
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Chat kept changing while sending the message, please retry"
+    )
+
+
 @router.post("/{chat_id}/messages/", response_model=Chat)
 def send_message(
     chat_id: str,
@@ -223,7 +677,8 @@ def send_message(
     chats_table = db.get_table(settings.CHATS_TABLE)
     
     # First verify the chat belongs to the user
-    response = chats_table.get_item(Key={'id': chat_id})
+    client = db.get_client()
+    response = client.get_item(TableName=settings.CHATS_TABLE, Key=encode_values({'id': chat_id}))
     
     if 'Item' not in response:
         raise HTTPException(
@@ -231,7 +686,7 @@ def send_message(
             detail="Chat not found"
         )
     
-    chat = decimal_to_float(response['Item'])
+    chat = decode_item(response['Item'], lazy=('messages',))
     
     if chat.get('user_id') != current_user.id:
         raise HTTPException(
@@ -239,6 +694,8 @@ def send_message(
             detail="Not authorized to send messages in this chat"
         )
     
+    materialize(chat)
+    
     # Check context length limit
     if current_user.custom_role:
         roles_table = db.get_table(settings.ROLES_TABLE)
@@ -263,97 +720,248 @@ def send_message(
     message_dict['timestamp'] = datetime.utcnow().isoformat()
     message_dict['sender_id'] = current_user.id  # Add sender ID
     
-    # Get current messages and append new one
-    messages = chat.get('messages', [])
-    messages.append(message_dict)
-    
     timestamp = datetime.utcnow().isoformat()
     
-    # Update chat with new message
-    response = chats_table.update_item(
-        Key={'id': chat_id},
-        UpdateExpression='SET messages = :messages, updated_at = :updated_at',
-        ExpressionAttributeValues={
-            ':messages': messages,
-            ':updated_at': timestamp
-        },
-        ReturnValues='ALL_NEW'
+    is_direct = chat.get('chat_type') == 'direct' and chat.get('conversation_id')
+    
+    # Append the message along with the chat's summary
+    set_clauses, values, read_state = '', {}, {}
+    if is_direct:
+        # Replying means the sender has read the conversation
+        read_state = {'unread_count': 0, 'last_read_at': timestamp}
+        set_clauses, values = ', unread_count = :zero, last_read_at = :updated_at', {':zero': 0}
+    messages = _append_message(
+        chats_table, chat_id, chat.get('messages', []), message_dict, timestamp,
+        set_clauses=set_clauses, values=values
     )
     
-    updated_chat = decimal_to_float(response['Attributes'])
+    updated_chat = {**chat, 'messages': messages, 'updated_at': timestamp, **chat_summary(messages), **read_state}
+    search_index = get_search_index()
+    search_index.index_message(current_user.id, chat_id, len(messages) - 1, message_dict['content'])
     
     # If this is a direct chat, sync the message to the other user's chat
-    if chat.get('chat_type') == 'direct' and chat.get('conversation_id'):
+    if is_direct:
         conversation_id = chat.get('conversation_id')
         participant_id = chat.get('participant_id')
         
-        # Find the other user's chat entry
-        participant_response = chats_table.query(
+        # Find the other user's chat entry; only the match is decoded
+        participant_response = client.query(
+            TableName=settings.CHATS_TABLE,
             IndexName='user-id-index',
             KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': participant_id}
+            FilterExpression='conversation_id = :conversation_id',
+            ExpressionAttributeValues=encode_values({
+                ':user_id': participant_id,
+                ':conversation_id': conversation_id
+            })
         )
         
-        participant_chats = [decimal_to_float(item) for item in participant_response.get('Items', [])]
+        participant_chats = [decode_item(item) for item in participant_response.get('Items', [])]
         for p_chat in participant_chats:
             if p_chat.get('conversation_id') == conversation_id:
-                # Update the participant's chat with the same message
-                p_messages = p_chat.get('messages', [])
-                p_messages.append(message_dict)
-                
-                chats_table.update_item(
-                    Key={'id': p_chat['id']},
-                    UpdateExpression='SET messages = :messages, updated_at = :updated_at',
-                    ExpressionAttributeValues={
-                        ':messages': p_messages,
-                        ':updated_at': timestamp
-                    }
-                )
+                # The participant's unread count goes up in the same write, atomically
+                try:
+                    p_messages = _append_message(
+                        chats_table, p_chat['id'], p_chat.get('messages', []), message_dict, timestamp,
+                        add_clauses=', unread_count :one'
+                    )
+                except HTTPException as e:
+                    # The sender's copy is already written; don't fail their request
+                    print(f"Could not deliver message to chat {p_chat['id']}: {e.detail}")
+                    break
+                search_index.index_message(participant_id, p_chat['id'], len(p_messages) - 1, message_dict['content'])
                 break
     
-    return Chat(**updated_chat)
+    return model_response(Chat, updated_chat)
 
 
-@router.get("/paginated/", response_model=dict)
-async def get_chats_paginated(
-    limit: int = 20,
-    last_key: str = None,
+@router.post("/{chat_id}/read/", response_model=ChatReadState)
+def mark_chat_read(
+    chat_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Get user chats with pagination support"""
+    """Mark a chat read: clears its unread count and moves the last-read marker"""
     db = get_dynamodb()
-    table = db.get_table(settings.CHATS_TABLE)
+    client = db.get_client()
     
-    query_params = {
-        'IndexName': 'user-id-index',
-        'KeyConditionExpression': 'user_id = :user_id',
-        'ExpressionAttributeValues': {':user_id': current_user.id},
-        'ScanIndexForward': False,
-        'Limit': limit
-    }
+    # Only the owner is read, never the messages
+    response = client.get_item(
+        TableName=settings.CHATS_TABLE,
+        Key=encode_values({'id': chat_id}),
+        ProjectionExpression='user_id'
+    )
     
-    # Add pagination token if provided
-    if last_key:
-        import json
-        query_params['ExclusiveStartKey'] = json.loads(last_key)
+    if 'Item' not in response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found"
+        )
     
-    response = table.query(**query_params)
+    if decode_item(response['Item']).get('user_id') != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this chat"
+        )
     
-    chats = [decimal_to_float(item) for item in response.get('Items', [])]
+    # updated_at stays put so reading a chat doesn't reorder the list (nor
+    # reaches other sessions through delta sync; they see it on a full load)
+    read_at = datetime.utcnow().isoformat()
+    chats_table = db.get_table(settings.CHATS_TABLE)
+    try:
+        chats_table.update_item(
+            Key={'id': chat_id},
+            UpdateExpression='SET unread_count = :zero, last_read_at = :read_at ADD revision :one',
+            ConditionExpression='attribute_exists(id)',
+            ExpressionAttributeValues={':zero': 0, ':read_at': read_at, ':one': 1}
+        )
+    except chats_table.meta.client.exceptions.ConditionalCheckFailedException:
+        # Deleted since the ownership check
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found"
+        )
     
-    # Sort by pinned status
-    chats.sort(key=lambda x: (not x.get('pinned', False), x.get('updated_at', '')), reverse=True)
+    return model_response(ChatReadState, {'chat_id': chat_id, 'unread_count': 0, 'last_read_at': read_at})
+
+
+@router.post("/{chat_id}/completions/")
+async def stream_completion(
+    chat_id: str,
+    request: CompletionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Generate an AI reply to the chat and stream it back as server-sent events.
+
+    The reply is persisted while it streams, so it is not lost if the client
+    goes away and other readers of the chat see it in progress.
+    """
+    db = get_dynamodb()
+    chats_table = db.get_table(settings.CHATS_TABLE)
     
-    result = {
-        'chats': chats,
-        'has_more': 'LastEvaluatedKey' in response
-    }
+    response = db.get_client().get_item(TableName=settings.CHATS_TABLE, Key=encode_values({'id': chat_id}))
+    
+    if 'Item' not in response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found"
+        )
+    
+    chat = decode_item(response['Item'], lazy=('messages',))
+    
+    if chat.get('user_id') != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to send messages in this chat"
+        )
+    
+    if not get_model_catalog().can_use(current_user, request.model_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to use this model"
+        )
     
-    if 'LastEvaluatedKey' in response:
-        import json
-        result['last_key'] = json.dumps(response['LastEvaluatedKey'])
+    # Decrypted config comes from the credential cache, not a read per call
+    model = get_credential_cache().get(request.model_id)
     
-    return result
+    if model is None or not model.get('is_active', True):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    # Enforce the monthly token budget, counting usage not flushed yet
+    usage_tracker = get_usage_tracker()
+    if current_user.custom_role:
+        roles_table = db.get_table(settings.ROLES_TABLE)
+        role_response = roles_table.get_item(Key={'id': current_user.custom_role})
+        
+        if 'Item' in role_response:
+            role = decimal_to_float(role_response['Item'])
+            max_tokens = role.get('max_tokens_per_month')
+            tokens_used = tokens_this_month(current_user) + usage_tracker.pending(current_user.id)
+            
+            if max_tokens is not None and tokens_used >= max_tokens:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"Monthly token limit exceeded. Limit: {max_tokens}, Used: {tokens_used}"
+                )
+    
+    # Context is everything already in the chat except replies still streaming
+    messages = materialize(chat).get('messages', [])
+    context = [
+        {'role': m['role'], 'content': m['content']}
+        for m in messages if m.get('status') != 'streaming'
+    ]
+    
+    writer = ReplyWriter(chats_table, chat_id, {
+        'role': 'assistant',
+        'content': '',
+        'timestamp': datetime.utcnow().isoformat(),
+        'status': 'streaming',
+        'stream_id': str(uuid.uuid4())
+    })
+    await writer.start(len(messages))
+    
+    events = asyncio.Queue()
+    scheduler = get_scheduler()
+    
+    async def generate():
+        usage = {}
+        try:
+            async with scheduler.slot(
+                model['id'],
+                priority=scheduler.priority_for(current_user, request.data_generation),
+                limit=model.get('max_concurrency')
+            ):
+                async for event in stream_chat(model, context, request.max_tokens):
+                    if 'delta' in event:
+                        events.put_nowait(f"data: {json.dumps({'delta': event['delta']})}\n\n")
+                        await writer.append(event['delta'])
+                    elif 'usage' in event:
+                        usage = event['usage']
+            await writer.finish()
+            await run_in_threadpool(
+                get_search_index().index_message, current_user.id, chat_id, writer.index, writer.content
+            )
+            events.put_nowait(f"data: {json.dumps({'done': True, 'message_index': writer.index})}\n\n")
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                error = "Model is busy, timed out waiting for an upstream slot"
+            elif isinstance(e, UpstreamError):
+                error = f"{e}: {e.text}"
+            else:
+                error = str(e)
+            print(f"Completion failed for chat {chat_id}: {error}")
+            try:
+                await writer.finish(status='error', error=error)
+            except Exception as persist_error:
+                print(f"Could not persist failed reply for chat {chat_id}: {persist_error}")
+            events.put_nowait(f"data: {json.dumps({'error': error})}\n\n")
+        finally:
+            # Providers that don't report usage get the same estimate as the context check
+            if writer.tokens or usage:
+                usage_tracker.record(
+                    current_user.id,
+                    usage.get('prompt_tokens', sum(estimate_tokens(m['content']) for m in context)),
+                    usage.get('completion_tokens', writer.tokens)
+                )
+            events.put_nowait(None)
+    
+    # Generation runs on its own so a closed tab doesn't abandon the reply
+    spawn(generate())
+    
+    async def event_stream():
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @router.post("/direct/", response_model=Chat, status_code=status.HTTP_201_CREATED)
@@ -412,7 +1020,7 @@ def create_direct_chat(
     existing_chats = [decimal_to_float(item) for item in response.get('Items', [])]
     for chat in existing_chats:
         if chat.get('chat_type') == 'direct' and chat.get('participant_id') == participant_id:
-            return Chat(**chat)
+            return model_response(Chat, chat, status.HTTP_201_CREATED)
     
     # Generate a shared conversation ID for linking both chat entries
     conversation_id = str(uuid.uuid4())
@@ -427,7 +1035,9 @@ def create_direct_chat(
         'participant_id': participant_id,
         'conversation_id': conversation_id,  # Link both chats
         'messages': [],
+        'message_count': 0,
         'pinned': False,
+        **list_key(current_user.id, False),
         'shared': False,
         'shared_with': [],
         'created_at': timestamp,
@@ -443,7 +1053,9 @@ def create_direct_chat(
         'participant_id': current_user.id,
         'conversation_id': conversation_id,  # Same conversation ID
         'messages': [],
+        'message_count': 0,
         'pinned': False,
+        **list_key(participant_id, False),
         'shared': False,
         'shared_with': [],
         'created_at': timestamp,
@@ -453,5 +1065,7 @@ def create_direct_chat(
     # Save both chat entries
     chats_table.put_item(Item=current_user_chat)
     chats_table.put_item(Item=participant_chat)
+    get_search_index().set_title(current_user.id, current_user_chat['id'], current_user_chat['title'])
+    get_search_index().set_title(participant_id, participant_chat['id'], participant_chat['title'])
     
-    return Chat(**current_user_chat)
+    return model_response(Chat, current_user_chat, status.HTTP_201_CREATED)
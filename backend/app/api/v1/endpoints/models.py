@@ -1,35 +1,35 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 from datetime import datetime
+import asyncio
 import uuid
 
 from app.core.database import get_dynamodb
 from app.core.config import settings
-from app.models.model import ModelCreate, ModelUpdate, Model
+from app.core.catalog import get_model_catalog
+from app.core.responses import etag_headers, etag_matches, not_modified
+from app.core.credentials import get_credential_cache, seal_model
+from app.core.scheduler import get_scheduler
+from app.core.permissions import get_user_role, role_limits
+from app.core.upstream import resolve_endpoint, wire_format, build_headers, stream_chat, UpstreamError
+from app.core.usage import get_usage_tracker, estimate_tokens
+from app.models.model import ModelCreate, ModelUpdate, Model, ModelCompletionRequest, ModelCompletion
 from app.models.user import User
 from app.api.deps import get_current_user, get_current_admin, decimal_to_float
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Model])
-def get_models(current_user: User = Depends(get_current_user)):
-    """Get all active models"""
-    db = get_dynamodb()
-    table = db.get_table(settings.MODELS_TABLE)
-    
-    # Scan for active models
-    response = table.scan(
-        FilterExpression='is_active = :active',
-        ExpressionAttributeValues={':active': True}
-    )
-    
-    models = [decimal_to_float(item) for item in response.get('Items', [])]
+def get_models(request: Request, current_user: User = Depends(get_current_user)):
+    """Get the active models the user's role may view (served from the in-process catalog cache)"""
+    catalog = get_model_catalog().for_user(current_user)
     
-    # Remove sensitive data
-    for model in models:
-        model.pop('api_key', None)
+    # Client already has this version of the catalog
+    if etag_matches(request, catalog.etag):
+        return not_modified(catalog.etag)
     
-    return models
+    return Response(content=catalog.body, media_type='application/json', headers=etag_headers(catalog.etag))
 
 @router.post("/", response_model=Model, status_code=status.HTTP_201_CREATED)
 def create_model(
@@ -54,67 +54,54 @@ def create_model(
     model_dict['created_at'] = datetime.utcnow().isoformat()
     model_dict['updated_at'] = datetime.utcnow().isoformat()
     
-    table.put_item(Item=model_dict)
+    # Encrypt api_key and secure header values before they hit storage
+    seal_model(model_dict)
     
-    # Remove sensitive data before returning
-    model_dict.pop('api_key', None)
+    table.put_item(Item=model_dict)
+    get_model_catalog().invalidate()
     
     return Model(**model_dict)
 
+@router.get("/scheduler/stats/")
+def get_scheduler_stats(current_admin: User = Depends(get_current_admin)):
+    """Upstream queue depth, in-flight calls and queue-wait percentiles per model"""
+    return get_scheduler().stats()
+
 @router.post("/{model_id}/test/")
-def test_model(
+async def test_model(
     model_id: str,
     current_user: User = Depends(get_current_user)
 ):
     """Test model connection"""
     import requests
     
-    db = get_dynamodb()
-    table = db.get_table(settings.MODELS_TABLE)
-    
-    response = table.get_item(Key={'id': model_id})
+    # Decrypted config comes from the credential cache
+    model = get_credential_cache().get(model_id)
     
-    if 'Item' not in response:
+    if model is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Model not found"
         )
     
-    model = decimal_to_float(response['Item'])
+    if not get_model_catalog().can_use(current_user, model_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to use this model"
+        )
     
     # Implement actual model testing logic
     try:
         # Determine endpoint based on integration type
-        if model.get('integration_type') == 'easy':
-            # For easy integration, use provider-specific endpoints
-            provider = model.get('provider', '').lower()
-            if provider == 'openai':
-                endpoint = 'https://api.openai.com/v1/chat/completions'
-            elif provider == 'anthropic':
-                endpoint = 'https://api.anthropic.com/v1/messages'
-            else:
-                endpoint = model.get('endpoint', 'https://api.openai.com/v1/chat/completions')
-        else:
-            # For custom integration, use the configured endpoint
-            endpoint = model.get('endpoint')
-            if not endpoint:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Model endpoint not configured"
-                )
-        
-        # Build headers
-        headers = {
-            'Content-Type': 'application/json'
-        }
-        
-        # Add API key if present
-        if model.get('api_key'):
-            headers['Authorization'] = f"Bearer {model['api_key']}"
+        endpoint = resolve_endpoint(model)
+        if not endpoint:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Model endpoint not configured"
+            )
         
-        # Add custom headers
-        for header in model.get('headers', []):
-            headers[header['key']] = header['value']
+        # Build headers (API key plus custom headers)
+        headers = build_headers(model, wire_format(model, endpoint))
         
         # Make test request
         test_payload = {
@@ -123,12 +110,20 @@ def test_model(
             'max_tokens': 5
         }
         
-        api_response = requests.post(
-            endpoint,
-            headers=headers,
-            json=test_payload,
-            timeout=10
-        )
+        # Queue behind other calls to this model instead of piling onto the upstream
+        scheduler = get_scheduler()
+        async with scheduler.slot(
+            model_id,
+            priority=scheduler.priority_for(current_user),
+            limit=model.get('max_concurrency')
+        ):
+            api_response = await run_in_threadpool(
+                requests.post,
+                endpoint,
+                headers=headers,
+                json=test_payload,
+                timeout=10
+            )
         
         if api_response.status_code == 200:
             return {
@@ -151,6 +146,12 @@ def test_model(
                     "error": api_response.text[:200]
                 }
             }
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "message": "Model is busy, timed out waiting for an upstream slot",
+            "response": {"status": "error", "error": "Queue timeout"}
+        }
     except requests.exceptions.Timeout:
         return {
             "success": False,
@@ -170,6 +171,79 @@ def test_model(
             "response": {"status": "error", "error": str(e)}
         }
 
+@router.post("/{model_id}/complete/", response_model=ModelCompletion)
+async def complete(
+    model_id: str,
+    request: ModelCompletionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Run a completion that isn't part of a chat, with the model's credentials kept server-side
+
+    Chat replies go through POST /chats/{chat_id}/completions/ instead.
+    """
+    if not get_model_catalog().can_use(current_user, model_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to use this model"
+        )
+    
+    model = get_credential_cache().get(model_id)
+    if model is None or not model.get('is_active', True):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    # Same monthly token budget as chat replies
+    role = await run_in_threadpool(get_user_role, current_user)
+    limits = await run_in_threadpool(role_limits, current_user, role)
+    max_tokens = limits.get('max_tokens_per_month')
+    if max_tokens is not None and limits['tokens_used_this_month'] >= max_tokens:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Monthly token limit exceeded. Limit: {max_tokens}, Used: {limits['tokens_used_this_month']}"
+        )
+    
+    messages = [message.model_dump() for message in request.messages]
+    parts = []
+    usage = {}
+    scheduler = get_scheduler()
+    try:
+        async with scheduler.slot(
+            model_id,
+            priority=scheduler.priority_for(current_user),
+            limit=model.get('max_concurrency')
+        ):
+            async for event in stream_chat(model, messages, request.max_tokens):
+                if 'delta' in event:
+                    parts.append(event['delta'])
+                elif 'usage' in event:
+                    usage = event['usage']
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is busy, timed out waiting for an upstream slot"
+        )
+    except UpstreamError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"{e}: {e.text}"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    finally:
+        if parts or usage:
+            get_usage_tracker().record(
+                current_user.id,
+                usage.get('prompt_tokens', sum(estimate_tokens(m['content']) for m in messages)),
+                usage.get('completion_tokens', len(parts))
+            )
+    
+    return ModelCompletion(content=''.join(parts))
+
 @router.put("/{model_id}/", response_model=Model)
 def update_model(
     model_id: str,
@@ -188,6 +262,32 @@ def update_model(
             detail="No fields to update"
         )
     
+    # Re-seal credentials when either part of them changes
+    sealed = 'api_key' in update_dict or 'headers' in update_dict
+    if sealed:
+        current = get_credential_cache().get(model_id)
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Model not found"
+            )
+        
+        # Secure headers come back from GET /models/ blank; keep their stored value
+        current_values = {h['key']: h['value'] for h in current.get('headers') or []}
+        headers = update_dict.get('headers', current.get('headers') or [])
+        headers = [
+            {**h, 'value': current_values.get(h['key'], '')} if h.get('secure') and not h.get('value') else h
+            for h in headers
+        ]
+        
+        credentials = seal_model({
+            'id': model_id,
+            'api_key': update_dict.pop('api_key', current.get('api_key')),
+            'headers': headers
+        })
+        update_dict['headers'] = credentials['headers']
+        update_dict['secrets'] = credentials['secrets']
+    
     # Build update expression
     update_expr = 'SET updated_at = :updated_at'
     expr_values = {':updated_at': datetime.utcnow().isoformat()}
@@ -201,6 +301,10 @@ def update_model(
         expr_names[attr_name] = key
         expr_values[attr_value] = value
     
+    if sealed:
+        # Drop any plaintext key left from before encryption
+        update_expr += ' REMOVE api_key'
+    
     try:
         response = table.update_item(
             Key={'id': model_id},
@@ -210,6 +314,9 @@ def update_model(
             ReturnValues='ALL_NEW'
         )
         
+        get_model_catalog().invalidate()
+        get_credential_cache().invalidate(model_id)
+        
         updated_model = decimal_to_float(response['Attributes'])
         updated_model.pop('api_key', None)
         
@@ -243,5 +350,7 @@ def delete_model(
     
     # Delete the model
     table.delete_item(Key={'id': model_id})
+    get_model_catalog().invalidate()
+    get_credential_cache().invalidate(model_id)
     print(f"Model deleted successfully: {model_id}")
     return {"message": "Model deleted successfully"}
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from typing import Any, Dict, List
 from datetime import datetime
 import uuid
 
@@ -7,20 +7,22 @@ from app.core.database import get_dynamodb
 from app.core.config import settings
 from app.models.role import RoleCreate, RoleUpdate, Role
 from app.models.user import User
+from app.core.catalog import get_model_catalog
+from app.core.responses import conditional_response, etag_headers, etag_matches, not_modified
+from app.core.permissions import get_user_role, role_features, role_limits
 from app.api.deps import get_current_admin, get_current_user, decimal_to_float
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Role])
-async def get_roles(current_admin: User = Depends(get_current_admin)):
-    """Get all roles"""
-    db = get_dynamodb()
-    table = db.get_table(settings.ROLES_TABLE)
+async def get_roles(request: Request, current_admin: User = Depends(get_current_admin)):
+    """Get all roles (served from the in-process catalog cache)"""
+    roles = get_model_catalog().roles()
     
-    response = table.scan()
-    roles = [decimal_to_float(item) for item in response.get('Items', [])]
+    if etag_matches(request, roles.etag):
+        return not_modified(roles.etag)
     
-    return roles
+    return Response(content=roles.body, media_type='application/json', headers=etag_headers(roles.etag))
 
 @router.post("/", response_model=Role, status_code=status.HTTP_201_CREATED)
 async def create_role(
@@ -51,6 +53,7 @@ async def create_role(
     role_dict['updated_at'] = datetime.utcnow().isoformat()
     
     table.put_item(Item=role_dict)
+    get_model_catalog().invalidate_roles()
     
     return Role(**role_dict)
 
@@ -96,6 +99,8 @@ async def update_role(
             ReturnValues='ALL_NEW'
         )
         
+        get_model_catalog().invalidate_roles()
+        
         updated_role = decimal_to_float(response['Attributes'])
         
         return Role(**updated_role)
@@ -117,6 +122,7 @@ async def delete_role(
     
     try:
         table.delete_item(Key={'id': role_id})
+        get_model_catalog().invalidate_roles()
         return {"message": "Role deleted successfully"}
     except Exception as e:
         raise HTTPException(
@@ -126,95 +132,15 @@ async def delete_role(
 
 
 @router.get("/current/limits")
-async def get_current_user_limits(current_user: User = Depends(get_current_user)):
+async def get_current_user_limits(request: Request, current_user: User = Depends(get_current_user)):
     """Get role limits for the current user"""
-    if not current_user.custom_role:
-        # Users without custom_role (like admins) have no limits
-        return {
-            "max_chats": None,
-            "max_tokens_per_month": None,
-            "context_length": None,  # None means unlimited/not enforced
-            "tokens_used_this_month": 0
-        }
-    
-    db = get_dynamodb()
-    roles_table = db.get_table(settings.ROLES_TABLE)
-    
-    role_response = roles_table.get_item(Key={'id': current_user.custom_role})
-    
-    if 'Item' not in role_response:
-        # If custom_role is set but role not found, return defaults
-        return {
-            "max_chats": None,
-            "max_tokens_per_month": None,
-            "context_length": None,
-            "tokens_used_this_month": 0
-        }
-    
-    role = decimal_to_float(role_response['Item'])
-    
-    return {
-        "max_chats": role.get('max_chats'),
-        "max_tokens_per_month": role.get('max_tokens_per_month'),
-        "context_length": role.get('context_length'),  # Can be None for unlimited
-        "tokens_used_this_month": getattr(current_user, 'tokens_used_this_month', 0)
-    }
+    limits = role_limits(current_user, get_user_role(current_user))
+    return conditional_response(request, Dict[str, Any], limits)
 
 
 @router.get("/current/permissions")
-async def get_current_user_permissions(current_user: User = Depends(get_current_user)):
+async def get_current_user_permissions(request: Request, current_user: User = Depends(get_current_user)):
     """Get permissions for the current user"""
-    # Admins have all permissions
-    if current_user.role == 'admin':
-        return {
-            "user_chat": True,
-            "chat": True,
-            "history": True,
-            "export": True,
-            "share": True,
-            "settings": True,
-            "profile": True
-        }
-    
-    # Users without custom_role have default permissions
-    if not current_user.custom_role:
-        return {
-            "user_chat": False,
-            "chat": True,
-            "history": True,
-            "export": False,
-            "share": False,
-            "settings": True,
-            "profile": True
-        }
-    
-    db = get_dynamodb()
-    roles_table = db.get_table(settings.ROLES_TABLE)
-    
-    role_response = roles_table.get_item(Key={'id': current_user.custom_role})
-    
-    if 'Item' not in role_response:
-        # If custom_role is set but role not found, return defaults
-        return {
-            "user_chat": False,
-            "chat": True,
-            "history": True,
-            "export": False,
-            "share": False,
-            "settings": True,
-            "profile": True
-        }
-    
-    role = decimal_to_float(role_response['Item'])
-    permissions = role.get('permissions', {})
-    features = permissions.get('features', {})
-    
-    return {
-        "user_chat": features.get('user_chat', False),
-        "chat": features.get('chat', True),
-        "history": features.get('history', True),
-        "export": features.get('export', False),
-        "share": features.get('share', False),
-        "settings": features.get('settings', True),
-        "profile": features.get('profile', True)
-    }
+    # Admins don't need their role read
+    role = None if current_user.role == 'admin' else get_user_role(current_user)
+    return conditional_response(request, Dict[str, bool], role_features(current_user, role))
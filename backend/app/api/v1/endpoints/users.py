@@ -1,58 +1,162 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import List, Optional
 from datetime import datetime
 import uuid
+from functools import lru_cache
+
+from pydantic import create_model
 
 from app.core.database import get_dynamodb
 from app.core.config import settings
-from app.models.user import User
+from app.core.bulk import run_bulk, summarize
+from app.core.cursor import encode_cursor, decode_cursor
+from app.core.fields import parse_fields, partial_model, projection
+from app.core.responses import model_response
+from app.core.cleanup import enqueue_user_cleanup
+from app.core.jobs import get_job_registry
+from app.models.bulk import BulkResult, JobStatus
+from app.models.user import User, UserPage, BulkUserIds, BulkRoleUpdate
 from app.api.deps import get_current_admin, get_current_user, decimal_to_float
 
 router = APIRouter()
 
-@router.get("/", response_model=List[User])
-async def get_users(current_admin: User = Depends(get_current_admin)):
-    """Get all active users"""
-    db = get_dynamodb()
-    table = db.get_table(settings.USERS_TABLE)
-    
-    # Query using status-index
-    response = table.query(
-        IndexName='status-index',
-        KeyConditionExpression='#status = :status',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={':status': 'active'}
+# Listing indexes: the status partition sorted by created_at or name, projecting
+# only the fields the admin panel shows (never hashed_password)
+USER_LIST_INDEXES = {
+    'created_at': 'status-created-index',
+    'name': 'status-name-index'
+}
+USER_LIST_PROJECTION = (
+    'id, email, #name, bio, #role, custom_role, #status, created_at, updated_at, '
+    'tokens_used_this_month, token_usage_reset_date'
+)
+USER_LIST_MAX_QUERIES = 10  # Bound on round trips when a role filter is sparse
+
+@lru_cache(maxsize=256)
+def _user_page_model(names: tuple):
+    """UserPage holding only the given User fields"""
+    return create_model(
+        'UserPageFields',
+        users=(List[partial_model(User, names)], ...),
+        next_cursor=(Optional[str], None)
     )
-    
-    users = [decimal_to_float(item) for item in response.get('Items', [])]
-    
-    # Remove sensitive data
-    for user in users:
-        user.pop('hashed_password', None)
-    
-    return users
 
-@router.get("/pending/", response_model=List[User])
-async def get_pending_users(current_admin: User = Depends(get_current_admin)):
-    """Get all pending users"""
+def list_users_page(
+    user_status: str,
+    limit: int,
+    cursor: Optional[str],
+    sort: str,
+    order: str,
+    role: Optional[str],
+    custom_role: Optional[str],
+    fields: Optional[str] = None
+):
+    """One page of users with a given status, read from the projected listing index
+
+    With fields (comma-separated User fields), only those are read and returned.
+    """
+    try:
+        names = parse_fields(User, fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     db = get_dynamodb()
     table = db.get_table(settings.USERS_TABLE)
     
-    # Query using status-index
-    response = table.query(
-        IndexName='status-index',
-        KeyConditionExpression='#status = :status',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={':status': 'pending'}
-    )
-    
-    users = [decimal_to_float(item) for item in response.get('Items', [])]
-    
-    # Remove sensitive data
-    for user in users:
-        user.pop('hashed_password', None)
-    
-    return users
+    query_kwargs = {
+        'IndexName': USER_LIST_INDEXES[sort],
+        'KeyConditionExpression': '#status = :status',
+        'ProjectionExpression': USER_LIST_PROJECTION,
+        'ExpressionAttributeNames': {'#status': 'status', '#name': 'name', '#role': 'role'},
+        'ExpressionAttributeValues': {':status': user_status},
+        'ScanIndexForward': order == 'asc'
+    }
+    if names is not None:
+        expression, aliases = projection(names)
+        query_kwargs['ProjectionExpression'] = expression
+        # DynamoDB rejects unused names, so #role only goes in with the role filter
+        query_kwargs['ExpressionAttributeNames'] = {'#status': 'status', **aliases}
+        if role:
+            query_kwargs['ExpressionAttributeNames']['#role'] = 'role'
+    
+    filters = []
+    if role:
+        filters.append('#role = :role')
+        query_kwargs['ExpressionAttributeValues'][':role'] = role
+    if custom_role:
+        filters.append('custom_role = :custom_role')
+        query_kwargs['ExpressionAttributeValues'][':custom_role'] = custom_role
+    if filters:
+        query_kwargs['FilterExpression'] = ' AND '.join(filters)
+    
+    # Everything that decides which users a page holds, so a cursor only resumes its own listing
+    listing = {'status': user_status, 'sort': sort, 'order': order, 'role': role, 'custom_role': custom_role}
+    
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        if position.get('listing') != listing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match this listing"
+            )
+        query_kwargs['ExclusiveStartKey'] = position['key']
+    
+    users = []
+    last_key = None
+    for _ in range(USER_LIST_MAX_QUERIES):
+        # Never read past the page, so LastEvaluatedKey is always a valid resume point
+        query_kwargs['Limit'] = limit - len(users)
+        response = table.query(**query_kwargs)
+        users.extend(decimal_to_float(item) for item in response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if len(users) >= limit or not last_key:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+    
+    next_cursor = None
+    if last_key:
+        next_cursor = encode_cursor({'listing': listing, 'key': last_key})
+    
+    if names is None:
+        return UserPage(users=users, next_cursor=next_cursor)
+    return model_response(_user_page_model(names), {'users': users, 'next_cursor': next_cursor})
+
+@router.get("/", response_model=UserPage)
+async def get_users(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = Query('created_at', pattern='^(created_at|name)$'),
+    order: str = Query('desc', pattern='^(asc|desc)$'),
+    role: Optional[str] = None,
+    custom_role: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated User fields to return (id is always included)"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Get active users, one page at a time"""
+    return list_users_page('active', limit, cursor, sort, order, role, custom_role, fields)
+
+@router.get("/pending/", response_model=UserPage)
+async def get_pending_users(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = Query('created_at', pattern='^(created_at|name)$'),
+    order: str = Query('desc', pattern='^(asc|desc)$'),
+    role: Optional[str] = None,
+    custom_role: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated User fields to return (id is always included)"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Get pending users, one page at a time"""
+    return list_users_page('pending', limit, cursor, sort, order, role, custom_role, fields)
 
 @router.put("/{user_id}/approve/", response_model=User)
 async def approve_user(
@@ -142,18 +246,109 @@ async def delete_user(
     user_id: str,
     current_admin: User = Depends(get_current_admin)
 ):
-    """Delete a user"""
+    """Delete a user; their chats are removed by a background cleanup job"""
     db = get_dynamodb()
     table = db.get_table(settings.USERS_TABLE)
     
     try:
-        table.delete_item(Key={'id': user_id})
-        return {"message": "User deleted successfully"}
+        table.delete_item(Key={'id': user_id}, ConditionExpression='attribute_exists(id)')
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    
+    job = enqueue_user_cleanup([user_id])
+    return {"message": "User deleted successfully", "job_id": job.id}
+
+@router.get("/jobs/{job_id}/", response_model=JobStatus)
+async def get_user_job(
+    job_id: str,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Progress of a background job started by a user endpoint (e.g. chat cleanup after deletion)"""
+    job = get_job_registry().get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job.to_dict()
+
+
+@router.post("/bulk/approve/", response_model=BulkResult)
+async def bulk_approve_users(
+    request: BulkUserIds,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Approve many pending users at once"""
+    updated_at = datetime.utcnow().isoformat()
+    
+    def approve(table, user_id):
+        table.update_item(
+            Key={'id': user_id},
+            UpdateExpression='SET #status = :status, updated_at = :updated_at',
+            ConditionExpression='attribute_exists(id)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':status': 'active', ':updated_at': updated_at}
+        )
+    
+    results = await run_bulk(request.user_ids, settings.USERS_TABLE, approve, not_found="User not found")
+    return summarize(results)
+
+@router.post("/bulk/role/", response_model=BulkResult)
+async def bulk_update_user_role(
+    request: BulkRoleUpdate,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Assign the same role to many users at once"""
+    update_expr = 'SET #role = :role, updated_at = :updated_at'
+    expr_values = {
+        ':role': request.role,
+        ':updated_at': datetime.utcnow().isoformat()
+    }
+    
+    # Same rule as update_user_role: no custom role means remove it
+    if request.custom_role_id:
+        update_expr += ', custom_role = :custom_role'
+        expr_values[':custom_role'] = request.custom_role_id
+    else:
+        update_expr += ' REMOVE custom_role'
+    
+    def assign(table, user_id):
+        table.update_item(
+            Key={'id': user_id},
+            UpdateExpression=update_expr,
+            ConditionExpression='attribute_exists(id)',
+            ExpressionAttributeNames={'#role': 'role'},
+            ExpressionAttributeValues=expr_values
+        )
+    
+    results = await run_bulk(request.user_ids, settings.USERS_TABLE, assign, not_found="User not found")
+    return summarize(results)
+
+@router.post("/bulk/delete/", response_model=BulkResult)
+async def bulk_delete_users(
+    request: BulkUserIds,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Delete many users at once; their chats are removed by a background cleanup job"""
+    def delete(table, user_id):
+        if user_id == current_admin.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot delete yourself"
+            )
+        table.delete_item(Key={'id': user_id}, ConditionExpression='attribute_exists(id)')
+    
+    results = await run_bulk(request.user_ids, settings.USERS_TABLE, delete, not_found="User not found")
+    summary = summarize(results)
+    
+    # One cleanup job for everyone that was actually deleted
+    deleted_ids = [r['id'] for r in results if r['success']]
+    if deleted_ids:
+        summary['job_id'] = enqueue_user_cleanup(deleted_ids).id
+    return summary
 
 
 @router.post("/{user_id}/tokens/")
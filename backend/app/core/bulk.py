@@ -0,0 +1,233 @@
+"""
+Helpers for bulk operations against DynamoDB.
+
+Work is split into chunks that run in parallel worker threads, at most
+BULK_MAX_CONCURRENCY at a time. Each worker gets its own Table resource
+(boto3 resources are not thread-safe) and reports a result per item, so
+one bad id doesn't fail the whole request.
+"""
+import asyncio
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _error_message(error: Exception, not_found: str) -> str:
+    if isinstance(error, ClientError):
+        if error.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return not_found
+        return error.response['Error'].get('Message', str(error))
+    return str(error)
+
+
+async def run_bulk(
+    ids: List[str],
+    table_name: str,
+    operation: Callable,
+    not_found: str = "Not found",
+    concurrency: Optional[int] = None
+) -> List[dict]:
+    """Apply operation(table, id) to every id; returns [{id, success, error}] in input order.
+
+    operation signals a missing item by failing a ConditionExpression,
+    which is reported as not_found, and can reject an item by raising
+    HTTPException.
+    """
+    ids = list(dict.fromkeys(ids))  # Drop duplicates, keep order
+    if not ids:
+        return []
+
+    workers = min(concurrency or settings.BULK_MAX_CONCURRENCY, len(ids))
+    chunk_size = -(-len(ids) // workers)
+    db = get_dynamodb()
+
+    def work(table, chunk):
+        results = []
+        for item_id in chunk:
+            try:
+                operation(table, item_id)
+                results.append({'id': item_id, 'success': True, 'error': None})
+            except HTTPException as e:
+                results.append({'id': item_id, 'success': False, 'error': e.detail})
+            except Exception as e:
+                results.append({'id': item_id, 'success': False, 'error': _error_message(e, not_found)})
+        return results
+
+    # Resources are created here, one per worker, before any thread touches them
+    jobs = [
+        run_in_threadpool(work, db.get_table(table_name), chunk)
+        for chunk in chunked(ids, chunk_size)
+    ]
+    return [result for chunk_results in await asyncio.gather(*jobs) for result in chunk_results]
+
+
+def summarize(results: List[dict]) -> dict:
+    succeeded = sum(1 for r in results if r['success'])
+    return {
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    }
+
+
+class CapacityBudget:
+    """Paces background writes to an average of `units_per_second` WCUs
+
+    Callers report what each request consumed and wait until the budget
+    has caught up, leaving headroom for interactive traffic.
+    """
+
+    def __init__(self, units_per_second: float):
+        self.units_per_second = max(units_per_second, 0.1)
+        self._ready_at = 0.0
+
+    async def spend(self, units: float):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._ready_at = max(self._ready_at, now) + units / self.units_per_second
+        if self._ready_at > now:
+            await asyncio.sleep(self._ready_at - now)
+
+
+def consumed_capacity(response: dict) -> float:
+    capacity = response.get('ConsumedCapacity')
+    if isinstance(capacity, list):
+        return sum(float(c.get('CapacityUnits', 0)) for c in capacity)
+    if isinstance(capacity, dict):
+        return float(capacity.get('CapacityUnits', 0))
+    return 0.0
+
+
+def _backoff(attempt: int) -> float:
+    return min(0.05 * 2 ** attempt, 5.0)
+
+
+async def _write_chunk(
+    resource,
+    table_name: str,
+    chunk: List[dict],
+    budget: Optional[CapacityBudget],
+    max_retries: int
+) -> List[dict]:
+    """Send up to 25 write requests, retrying unprocessed ones with backoff
+
+    Returns the requests still unprocessed after max_retries.
+    """
+    request_items = {table_name: chunk}
+    for attempt in range(max_retries + 1):
+        response = await run_in_threadpool(
+            resource.batch_write_item,
+            RequestItems=request_items,
+            ReturnConsumedCapacity='TOTAL'
+        )
+        unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+        if budget:
+            done = len(request_items[table_name]) - len(unprocessed)
+            await budget.spend(consumed_capacity(response) or done)
+        if not unprocessed or attempt == max_retries:
+            return unprocessed
+        # Throttled: back off before resending what's left
+        request_items = {table_name: unprocessed}
+        await asyncio.sleep(_backoff(attempt))
+    return []
+
+
+async def batch_write(
+    resource,
+    table_name: str,
+    requests: List[dict],
+    budget: Optional[CapacityBudget] = None,
+    max_retries: int = 8
+) -> int:
+    """Send PutRequest/DeleteRequest entries with BatchWriteItem, 25 per request
+
+    Unprocessed items are retried with backoff. When a budget is given, each
+    request's consumed capacity is charged to it (one unit per item when
+    DynamoDB doesn't report it). Returns the number of items written.
+    """
+    written = 0
+    for chunk in chunked(requests, 25):
+        unprocessed = await _write_chunk(resource, table_name, chunk, budget, max_retries)
+        if unprocessed:
+            raise RuntimeError(f"{len(unprocessed)} writes still unprocessed after {max_retries} retries")
+        written += len(chunk)
+    return written
+
+
+async def batch_write_each(
+    resource,
+    table_name: str,
+    requests: List[dict],
+    max_retries: int = 8
+) -> List[dict]:
+    """Like batch_write, but returns the requests that failed instead of raising
+
+    A request fails when it is still unprocessed after max_retries or its
+    chunk was rejected outright, so callers can report a result per item.
+    """
+    failed = []
+    for chunk in chunked(requests, 25):
+        try:
+            failed.extend(await _write_chunk(resource, table_name, chunk, None, max_retries))
+        except ClientError as e:
+            print(f"Batch write to {table_name} failed: {e}")
+            failed.extend(chunk)
+    return failed
+
+
+async def batch_delete(
+    resource,
+    table_name: str,
+    keys: List[dict],
+    budget: Optional[CapacityBudget] = None
+) -> int:
+    """Delete keys with BatchWriteItem; returns the number deleted"""
+    return await batch_write(resource, table_name, [{'DeleteRequest': {'Key': key}} for key in keys], budget)
+
+
+async def batch_get(
+    resource,
+    table_name: str,
+    keys: List[dict],
+    projection: Optional[str] = None,
+    names: Optional[dict] = None,
+    max_retries: int = 8
+) -> List[dict]:
+    """Fetch keys with BatchGetItem, 100 per request, retrying unprocessed keys
+
+    Items come back in no particular order; missing keys are simply absent.
+    """
+    items = []
+    for chunk in chunked(keys, 100):
+        request = {'Keys': chunk}
+        if projection:
+            request['ProjectionExpression'] = projection
+        if names:
+            request['ExpressionAttributeNames'] = names
+        for attempt in range(max_retries + 1):
+            response = await run_in_threadpool(resource.batch_get_item, RequestItems={table_name: request})
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            unprocessed = response.get('UnprocessedKeys', {}).get(table_name)
+            if not unprocessed:
+                break
+            if attempt == max_retries:
+                raise RuntimeError(f"{len(unprocessed['Keys'])} reads still unprocessed after {max_retries} retries")
+            request = unprocessed
+            await asyncio.sleep(_backoff(attempt))
+    return items
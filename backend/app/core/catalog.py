@@ -0,0 +1,192 @@
+"""
+In-process cache of the active model catalog and of which roles may see it.
+
+GET /models/ used to scan the models table on every page load. The catalog
+is now built once (with a paginated scan), rendered to JSON once and served
+from memory with a content-hash ETag. Next to it sits a visibility table,
+role id -> model ids the role may view / use, precomputed from
+Permissions.models so listing and the chat path authorize with a set lookup.
+
+The admin roles listing is built in the same pass as the visibility table
+and served the same way, so GET /roles/ doesn't scan the roles table either.
+
+Model writes invalidate the catalog, role writes the roles; a TTL bounds how
+stale another worker's copy can get.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.models.model import Model
+from app.models.role import Role
+from app.api.deps import decimal_to_float
+
+
+class CatalogView:
+    """Rendered catalog body as one audience sees it"""
+
+    def __init__(self, models: List[dict]):
+        self.models = models
+        self.body = json.dumps(models, separators=(',', ':')).encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+
+class RoleAccess:
+    """Model ids a role may list (view) and call (use)"""
+
+    def __init__(self, view: FrozenSet[str], use: FrozenSet[str]):
+        self.view = view
+        self.use = use
+
+
+class RoleSnapshot:
+    """One build of the roles: model access per role and the rendered listing"""
+
+    def __init__(self, access: Dict[str, RoleAccess], roles: List[dict]):
+        self.access = access
+        self.listing = CatalogView(roles)
+        self.built_at = time.monotonic()
+
+
+class CatalogSnapshot:
+    """One immutable build of the catalog"""
+
+    def __init__(self, models: List[dict], version: int):
+        self.models = models
+        self.version = version
+        self.full = CatalogView(models)
+        self.built_at = time.monotonic()
+        self._views: Dict[str, tuple] = {}
+
+    def view(self, role_id: str, access: RoleAccess) -> CatalogView:
+        """Catalog trimmed to what a role may see, rendered once per role"""
+        cached = self._views.get(role_id)
+        if cached is not None and cached[0] is access:
+            return cached[1]
+        view = CatalogView([m for m in self.models if m['id'] in access.view])
+        self._views[role_id] = (access, view)
+        return view
+
+
+class ModelCatalog:
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.MODEL_CATALOG_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._roles: Optional[RoleSnapshot] = None
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.built_at < self.ttl:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have rebuilt it while we waited
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.built_at >= self.ttl:
+                snapshot = self._snapshot = self._build()
+            return snapshot
+
+    def invalidate(self):
+        """Drop the cached catalog; the next read rebuilds it"""
+        with self._lock:
+            self._snapshot = None
+
+    def invalidate_roles(self):
+        """Drop the roles after one is created, changed or deleted"""
+        with self._lock:
+            self._roles = None
+
+    def access_for(self, user) -> Optional[RoleAccess]:
+        """Model access for a user's role, None when every active model is allowed.
+
+        Admins and users without a (known) custom role keep the default of
+        seeing and using every active model.
+        """
+        if user.role == 'admin' or not user.custom_role:
+            return None
+        return self._role_snapshot().access.get(user.custom_role)
+
+    def for_user(self, user) -> CatalogView:
+        snapshot = self.get()
+        access = self.access_for(user)
+        if access is None:
+            return snapshot.full
+        return snapshot.view(user.custom_role, access)
+
+    def can_use(self, user, model_id: str) -> bool:
+        access = self.access_for(user)
+        return access is None or model_id in access.use
+
+    def roles(self) -> CatalogView:
+        """Every role, rendered for the admin listing"""
+        return self._role_snapshot().listing
+
+    def _role_snapshot(self) -> RoleSnapshot:
+        roles = self._roles
+        if roles is not None and time.monotonic() - roles.built_at < self.ttl:
+            return roles
+
+        with self._lock:
+            if self._roles is None or time.monotonic() - self._roles.built_at >= self.ttl:
+                self._roles = self._build_roles()
+            return self._roles
+
+    def _build_roles(self) -> RoleSnapshot:
+        table = get_dynamodb().get_table(settings.ROLES_TABLE)
+        scan_kwargs = {}
+
+        access, roles = {}, []
+        while True:
+            response = table.scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                roles.append(Role(**decimal_to_float(item)).model_dump(mode='json'))
+                model_permissions = (item.get('permissions') or {}).get('models') or {}
+                use = frozenset(
+                    model_id for model_id, perms in model_permissions.items() if perms.get('use')
+                )
+                # Being allowed to use a model implies being allowed to see it
+                view = use | frozenset(
+                    model_id for model_id, perms in model_permissions.items() if perms.get('view')
+                )
+                access[item['id']] = RoleAccess(view, use)
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        roles.sort(key=lambda r: (r['name'].lower(), r['id']))
+        return RoleSnapshot(access, roles)
+
+    def _build(self) -> CatalogSnapshot:
+        table = get_dynamodb().get_table(settings.MODELS_TABLE)
+        scan_kwargs = {
+            'FilterExpression': 'is_active = :active',
+            'ExpressionAttributeValues': {':active': True}
+        }
+
+        items = []
+        while True:
+            response = table.scan(**scan_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        # Validating through Model drops api_key and normalises types once per build
+        models = [Model(**decimal_to_float(item)).model_dump(mode='json') for item in items]
+        models.sort(key=lambda m: (m.get('display_name') or m['name']).lower())
+
+        self._version += 1
+        return CatalogSnapshot(models, self._version)
+
+
+model_catalog = ModelCatalog()
+
+
+def get_model_catalog():
+    return model_catalog
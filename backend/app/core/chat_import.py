@@ -0,0 +1,225 @@
+"""
+Streaming import of chat histories.
+
+The upload (JSONL/NDJSON, gzipped JSONL, or a ZIP of .jsonl/.ndjson files,
+so an export can be loaded back as is) is spooled to a temporary file and
+processed by a background job. Lines are read a batch at a time, validated
+with a TypeAdapter built once at import, and written 25 at a time through
+BatchWriteItem, paced by IMPORT_WCU_PER_SECOND.
+
+Chat ids are derived from the user and the source id (or the line's
+content), so re-running an import overwrites instead of duplicating, and
+overwritten chats don't count against the role's chat limit. The job
+reports a resume_from checkpoint: if it fails, upload the same file again
+with that value and nothing before it is rewritten.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.bulk import CapacityBudget, batch_get, batch_write
+from app.core.chat_pages import list_key
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.core.jobs import Job, get_job_registry
+from app.core.search import get_search_index
+from app.core.summary import chat_summary
+from app.core.sync import record_reset
+from app.models.chat import ChatImport
+
+IMPORT_SUFFIXES = ('.jsonl', '.ndjson')
+IMPORT_NAMESPACE = uuid.UUID('7f1d7c62-5a43-4a8e-9d0b-6f2f3c1b2a90')
+READ_BATCH_LINES = 200
+MAX_REPORTED_ERRORS = 100
+
+# Built once; rebuilding the validator per line dominates parse time
+_chat_adapter = TypeAdapter(ChatImport)
+
+
+def iter_lines(path: str) -> Iterator[bytes]:
+    """Lines of a JSONL file, gzipped JSONL file or ZIP of JSONL files"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(b'PK'):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMPORT_SUFFIXES):
+                    continue
+                with archive.open(info) as member:
+                    yield from member
+    elif magic.startswith(b'\x1f\x8b'):
+        with gzip.open(path, 'rb') as f:
+            yield from f
+    else:
+        with open(path, 'rb') as f:
+            yield from f
+
+
+def _iso(value: Optional[datetime], default: str) -> str:
+    if value is None:
+        return default
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _to_item(chat: ChatImport, line: bytes, user_id: str, now: str) -> dict:
+    source_id = chat.id or hashlib.sha256(line.strip()).hexdigest()
+    messages = [
+        {**message.model_dump(mode='json', exclude_none=True), 'timestamp': _iso(message.timestamp, now)}
+        for message in chat.messages
+    ]
+    created_at = _iso(chat.created_at, now)
+    return {
+        'id': str(uuid.uuid5(IMPORT_NAMESPACE, f"{user_id}:{source_id}")),
+        'user_id': user_id,
+        'title': chat.title,
+        'model_id': chat.model_id,
+        'pinned': chat.pinned,
+        **list_key(user_id, chat.pinned),
+        'chat_type': 'ai',
+        'messages': messages,
+        **chat_summary(messages),
+        'shared': False,
+        'shared_with': [],
+        'created_at': created_at,
+        'updated_at': _iso(chat.updated_at, messages[-1]['timestamp'] if messages else created_at)
+    }
+
+
+def _describe(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = '.'.join(str(part) for part in first.get('loc', ())) or 'line'
+    return f"{location}: {first.get('msg')}"
+
+
+def _record_failure(job: Job, record: int, error: str):
+    job.advance(lines_failed=1)
+    errors = job.details.setdefault('errors', [])
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append({'line': record, 'error': error})
+
+
+async def import_chats(job: Job, user_id: str, path: str, resume_from: int = 1, allowance: Optional[int] = None):
+    """allowance: how many more chats the user's role lets them have (None for no limit)"""
+    resource = get_dynamodb().get_resource()
+    budget = CapacityBudget(settings.IMPORT_WCU_PER_SECOND)
+    now = datetime.utcnow().isoformat()
+    lines = iter_lines(path)
+    pending: List[Tuple[int, dict]] = []
+    record = 0
+
+    async def flush():
+        nonlocal allowance
+        if not pending:
+            return
+        # Lines with the same source id map to the same chat, and BatchWriteItem
+        # rejects a batch that puts one key twice: the later line wins, as it
+        # would across batches
+        items = {}
+        for line_number, item in pending:
+            items[item['id']] = (line_number, item)
+
+        if allowance is not None:
+            # Overwriting a chat imported before doesn't add to the user's chats
+            existing = {
+                item['id']
+                for item in await batch_get(
+                    resource, settings.CHATS_TABLE, [{'id': chat_id} for chat_id in items], projection='id'
+                )
+            }
+            for chat_id, (line_number, _) in list(items.items()):
+                if chat_id in existing:
+                    continue
+                if allowance <= 0:
+                    _record_failure(job, line_number, "Chat limit reached")
+                    del items[chat_id]
+                else:
+                    allowance -= 1
+
+        written = [item for _, item in items.values()]
+        try:
+            await batch_write(
+                resource, settings.CHATS_TABLE,
+                [{'PutRequest': {'Item': item}} for item in written],
+                budget
+            )
+        except Exception:
+            job.details['resume_from'] = pending[0][0]
+            raise
+        await run_in_threadpool(get_search_index().index_chats, user_id, written)
+        job.advance(chats_imported=len(written))
+        job.details['resume_from'] = pending[-1][0] + 1
+        pending.clear()
+
+    try:
+        while True:
+            batch = await run_in_threadpool(lambda: list(islice(lines, READ_BATCH_LINES)))
+            if not batch:
+                break
+            for line in batch:
+                if not line.strip():
+                    continue
+                record += 1
+                job.advance(lines_read=1)
+                if record < resume_from:
+                    continue
+
+                try:
+                    chat = _chat_adapter.validate_json(line)
+                except ValidationError as e:
+                    _record_failure(job, record, _describe(e))
+                    continue
+
+                pending.append((record, _to_item(chat, line, user_id, now)))
+                if len(pending) == 25:
+                    await flush()
+        await flush()
+        job.details['resume_from'] = record + 1
+    finally:
+        os.unlink(path)
+        if job.progress.get('chats_imported'):
+            # Imported chats keep their own updated_at, so delta sync can't see them
+            await run_in_threadpool(record_reset, user_id)
+
+
+def enqueue_chat_import(user_id: str, path: str, resume_from: int = 1, allowance: Optional[int] = None) -> Job:
+    """Start importing the spooled upload at path; the file is removed when the job ends"""
+    job = get_job_registry().submit(
+        'chat_import',
+        lambda job: import_chats(job, user_id, path, resume_from, allowance),
+        owner_id=user_id
+    )
+    job.details = {'resume_from': resume_from}
+    job.progress = {'lines_read': 0, 'chats_imported': 0, 'lines_failed': 0}
+    return job
+
+
+def spool_upload(source) -> str:
+    """Copy an uploaded file to a temporary path, 1 MB at a time
+
+    Raises ValueError if it is larger than IMPORT_MAX_BYTES.
+    """
+    fd, path = tempfile.mkstemp(prefix='chat-import-')
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            while chunk := source.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_BYTES:
+                    raise ValueError(f"Import files are limited to {settings.IMPORT_MAX_BYTES} bytes")
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
@@ -0,0 +1,91 @@
+"""
+Pinned-first pagination of a user's chat list.
+
+Pinned and unpinned chats live in separate sparse indexes. Every chat carries
+exactly one of pinned_user_id and unpinned_user_id, and user-pinned-index and
+user-unpinned-index are keyed on those with updated_at as the sort key. A
+page reads pinned chats, newest first, until there are none left and then
+continues with the rest. Pinned chats therefore lead the whole list, not
+just each page, and every page is a plain range read with nothing filtered
+away. The two attributes change only when a chat is pinned or unpinned; a
+new message moves updated_at, which reorders the chat within its own index.
+
+The signed cursor (app/core/cursor.py) says which index the next page
+continues in and from which key.
+"""
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.database import get_dynamodb
+from app.core.dynamo import decode_item, encode_values
+
+PINNED, UNPINNED = 'pinned', 'unpinned'
+PHASES = {
+    PINNED: ('user-pinned-index', 'pinned_user_id'),
+    UNPINNED: ('user-unpinned-index', 'unpinned_user_id')
+}
+
+
+def list_key(user_id: str, pinned: bool) -> dict:
+    """The sparse index attribute a chat of user_id carries"""
+    return {PHASES[PINNED if pinned else UNPINNED][1]: user_id}
+
+
+def list_key_names(pinned: bool) -> Tuple[str, str]:
+    """(attribute to set to the user id, attribute to remove) when pinning changes"""
+    if pinned:
+        return PHASES[PINNED][1], PHASES[UNPINNED][1]
+    return PHASES[UNPINNED][1], PHASES[PINNED][1]
+
+
+def chat_page(user_id: str, cursor: Optional[str], limit: int) -> dict:
+    """One page of chat summaries (ChatPage); raises ValueError for a bad cursor"""
+    position = {'phase': PINNED}
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get('user') != user_id or position.get('phase') not in PHASES:
+            raise ValueError("Cursor does not match this user")
+
+    client = get_dynamodb().get_client()
+    phase = position['phase']
+    start_key = position.get('key')
+    chats = []
+    next_position = None
+    while True:
+        index_name, attribute = PHASES[phase]
+        query_params = {
+            'TableName': settings.CHATS_TABLE,
+            'IndexName': index_name,
+            'KeyConditionExpression': f'{attribute} = :user_id',
+            'ExpressionAttributeValues': encode_values({':user_id': user_id}),
+            'ScanIndexForward': False,
+            'Limit': limit - len(chats)
+        }
+        if start_key:
+            query_params['ExclusiveStartKey'] = start_key
+
+        response = client.query(**query_params)
+        chats.extend(decode_item(item) for item in response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        if last_key:
+            # Page full (or cut short at 1 MB); carry on from here next time
+            next_position = {'user': user_id, 'phase': phase, 'key': last_key}
+            break
+        if phase == UNPINNED:
+            break
+        # Out of pinned chats: fill the rest of the page from the others
+        phase, start_key = UNPINNED, None
+        if len(chats) == limit:
+            next_position = {'user': user_id, 'phase': phase}
+            break
+
+    for chat in chats:
+        chat['messages'] = []
+
+    return {
+        'chats': chats,
+        'next_cursor': encode_cursor(next_position) if next_position else None,
+        'has_more': next_position is not None
+    }
@@ -0,0 +1,110 @@
+"""
+Cascading cleanup of a deleted user's chats.
+
+Runs as a background job after the user row is gone. The user's chats are
+streamed page by page from user-id-index (keys and direct-chat links only)
+and removed with BatchWriteItem, paced by CLEANUP_WCU_PER_SECOND so a large
+account doesn't starve interactive traffic. The other side of each direct
+conversation is kept for its owner but detached: conversation_id is removed
+so nothing mirrors into it any more, and participant_deleted is set.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Set
+
+from botocore.exceptions import ClientError
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.bulk import CapacityBudget, batch_delete, chunked, consumed_capacity
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.core.jobs import Job, get_job_registry
+from app.core.search import get_search_index
+
+
+async def _query_pages(table, **kwargs):
+    """Yield user-id-index query pages, following LastEvaluatedKey"""
+    while True:
+        response = await run_in_threadpool(table.query, IndexName='user-id-index', **kwargs)
+        yield response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+async def _detach(table, chat_id: str, budget: CapacityBudget) -> bool:
+    try:
+        response = await run_in_threadpool(
+            table.update_item,
+            Key={'id': chat_id},
+            # updated_at moves so the owner's next delta sync sees the change
+            UpdateExpression=(
+                'SET participant_deleted = :true, updated_at = :now '
+                'REMOVE conversation_id ADD revision :one'
+            ),
+            # Don't recreate a chat its owner deleted meanwhile
+            ConditionExpression='attribute_exists(id)',
+            ExpressionAttributeValues={':true': True, ':now': datetime.utcnow().isoformat(), ':one': 1},
+            ReturnConsumedCapacity='TOTAL'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+    await budget.spend(consumed_capacity(response) or 1)
+    return True
+
+
+async def _detach_counterparts(table, links: Dict[str, Set[str]], budget: CapacityBudget) -> int:
+    """Detach the participant-side rows of direct conversations; links is {participant_id: {conversation_id}}"""
+    detached = 0
+    for participant_id, conversation_ids in links.items():
+        # IN takes at most 100 operands
+        for group in chunked(conversation_ids, 100):
+            values = {f':c{i}': cid for i, cid in enumerate(group)}
+            async for items in _query_pages(
+                table,
+                KeyConditionExpression='user_id = :user_id',
+                FilterExpression=f"conversation_id IN ({', '.join(values)})",
+                ProjectionExpression='id',
+                ExpressionAttributeValues={**values, ':user_id': participant_id}
+            ):
+                for item in items:
+                    detached += await _detach(table, item['id'], budget)
+    return detached
+
+
+async def delete_user_chats(job: Job, user_ids: List[str]):
+    resource = get_dynamodb().get_resource()
+    table = resource.Table(settings.CHATS_TABLE)
+    budget = CapacityBudget(settings.CLEANUP_WCU_PER_SECOND)
+
+    for user_id in user_ids:
+        async for items in _query_pages(
+            table,
+            KeyConditionExpression='user_id = :user_id',
+            ProjectionExpression='id, chat_type, participant_id, conversation_id',
+            ExpressionAttributeValues={':user_id': user_id},
+            Limit=settings.CLEANUP_PAGE_SIZE
+        ):
+            links = defaultdict(set)
+            for item in items:
+                if item.get('chat_type') == 'direct' and item.get('conversation_id') and item.get('participant_id'):
+                    links[item['participant_id']].add(item['conversation_id'])
+            if links:
+                job.advance(counterparts_detached=await _detach_counterparts(table, links, budget))
+
+            deleted = await batch_delete(
+                resource, settings.CHATS_TABLE, [{'id': item['id']} for item in items], budget
+            )
+            job.advance(chats_deleted=deleted)
+        await run_in_threadpool(get_search_index().drop_user, user_id)
+        job.advance(users_completed=1)
+
+
+def enqueue_user_cleanup(user_ids: List[str]) -> Job:
+    """Start deleting the chats of already-deleted users; returns the job to poll"""
+    job = get_job_registry().submit('user_cleanup', lambda job: delete_user_chats(job, user_ids))
+    job.details = {'user_ids': user_ids, 'users_total': len(user_ids)}
+    job.progress = {'users_completed': 0, 'chats_deleted': 0, 'counterparts_detached': 0}
+    return job
@@ -0,0 +1,196 @@
+"""
+Response compression (Brotli or gzip) negotiated from Accept-Encoding.
+
+Bodies sent in one piece are compressed whole once they reach
+COMPRESSION_MIN_SIZE. Streamed bodies (StreamingResponse, SSE) are
+compressed chunk by chunk with a sync flush after each one, so every event
+reaches the client as soon as it is produced instead of waiting in the
+encoder. Responses that already carry a Content-Encoding, are of an
+already-compressed type (gzipped exports, images...) or ask for
+no-transform pass through untouched.
+
+A strong ETag names exact bytes, so once an encoding is negotiated the
+ETag of every response we may transform is sent weak (W/"..."), 304s
+included, whether or not this body turned out big enough to compress.
+etag_matches() compares weakly, so revalidation still works.
+"""
+import zlib
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+SKIP_CONTENT_TYPES = (
+    'application/gzip',
+    'application/x-gzip',
+    'application/zip',
+    'application/octet-stream',
+    'image/',
+    'audio/',
+    'video/',
+    'font/woff'
+)
+THREAD_MIN_SIZE = 256 * 1024  # Whole bodies this large are compressed off the event loop
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def choose_encoding(accept_encoding: str, preferred: List[str]) -> Optional[str]:
+    """First of our preferred encodings the client accepts (q > 0)"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in preferred:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[List[str]] = None,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None
+    ):
+        self.app = app
+        self.encodings = settings.COMPRESSION_ENCODINGS if encodings is None else encodings
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = gzip_level or settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = brotli_quality or settings.COMPRESSION_BROTLI_QUALITY
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = None
+        if scope['type'] == 'http' and scope.get('method') != 'HEAD':
+            encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self, encoding, send).run(scope, receive)
+
+    def encoder(self, encoding: str):
+        if encoding == 'br':
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+
+class CompressionResponder:
+    """Wraps send() for one response, deciding on its first body message"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.decided = False
+
+    async def run(self, scope: Scope, receive: Receive):
+        await self.middleware.app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self.start = message  # Held until we know whether to compress
+            return
+        if message['type'] != 'http.response.body':
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if not self.decided:
+            self.decided = True
+            headers = MutableHeaders(raw=self.start['headers'])
+            transformable = self._transformable(headers)
+            if transformable:
+                self._weaken_etag(headers)
+            if transformable and self._worth_compressing(headers, body, more_body):
+                self.encoder = self.middleware.encoder(self.encoding)
+                headers['Content-Encoding'] = self.encoder.name
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    body = await self._finish_whole(body)
+                    headers['Content-Length'] = str(len(body))
+                    await self.send(self.start)
+                    await self.send({'type': 'http.response.body', 'body': body})
+                    return
+            await self.send(self.start)
+
+        if self.encoder is None:
+            await self.send(message)
+        elif more_body:
+            await self.send({'type': 'http.response.body', 'body': self.encoder.chunk(body), 'more_body': True})
+        else:
+            await self.send({'type': 'http.response.body', 'body': self.encoder.finish(body)})
+
+    def _transformable(self, headers: MutableHeaders) -> bool:
+        if 'content-encoding' in headers:
+            return False
+        return 'no-transform' not in headers.get('cache-control', '')
+
+    def _weaken_etag(self, headers: MutableHeaders):
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+
+    def _worth_compressing(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if self.start['status'] < 200 or self.start['status'] in (204, 304):
+            return False
+        content_type = headers.get('content-type', '').lower()
+        if not content_type or content_type.startswith(SKIP_CONTENT_TYPES):
+            return False
+        # Streams are compressed from the start; whole bodies only when worth it
+        return more_body or len(body) >= self.middleware.minimum_size
+
+    async def _finish_whole(self, body: bytes) -> bytes:
+        if len(body) >= THREAD_MIN_SIZE:
+            return await run_in_threadpool(self.encoder.finish, body)
+        return self.encoder.finish(body)
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 import json
@@ -20,12 +20,71 @@ class Settings(BaseSettings):
     MODELS_TABLE: str = "chat_app_models"
     ROLES_TABLE: str = "chat_app_roles"
     CHATS_TABLE: str = "chat_app_chats"
+    CHATS_ARCHIVE_TABLE: str = "chat_app_chats_archive"
+    CHAT_TOMBSTONES_TABLE: str = "chat_app_chat_tombstones"
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Upstream model scheduler
+    SCHEDULER_MAX_CONCURRENCY: int = 8  # Concurrent upstream calls per model
+    SCHEDULER_QUEUE_TIMEOUT: float = 30.0  # Seconds a call may wait for a slot
+    SCHEDULER_CLASS_WEIGHTS: Dict[str, int] = {"interactive": 8, "batch": 1}
+    SCHEDULER_ROLE_CLASSES: Dict[str, str] = {}  # role or custom role id -> priority class
+    
+    # Upstream HTTP client
+    UPSTREAM_TIMEOUT: float = 120.0  # Seconds between bytes from the provider
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    
+    # Streamed reply persistence
+    STREAM_PERSIST_EVERY_TOKENS: int = 64  # Flush after this many new tokens...
+    STREAM_PERSIST_INTERVAL_MS: int = 1000  # ...or after this long, whichever first
+    STREAM_PERSIST_MAX_WRITES: int = 20  # Writes per reply before the final commit
+    
+    # Token usage accounting
+    USAGE_FLUSH_INTERVAL: float = 10.0  # Seconds between batched usage commits
+    
+    # Model catalog cache
+    MODEL_CATALOG_TTL: float = 60.0  # Seconds before a worker re-reads models written elsewhere
+    
+    # Model credential encryption
+    SECRETS_KEY_PROVIDER: str = "local"  # "local" (key file) or "kms"
+    SECRETS_KEY_FILE: str = "model_secrets.key"  # Master key for the local provider
+    SECRETS_KMS_KEY_ID: str = ""  # KMS key id/ARN/alias for the kms provider
+    SECRETS_CACHE_TTL: float = 300.0  # Seconds decrypted credentials stay in memory
+    
+    # Bulk operations
+    BULK_MAX_CONCURRENCY: int = 16  # Parallel DynamoDB workers per bulk request
+    CLEANUP_WCU_PER_SECOND: float = 25.0  # Write capacity background cleanup may use
+    CLEANUP_PAGE_SIZE: int = 100  # Chats read per user-id-index page during cleanup
+    EXPORT_PAGE_SIZE: int = 25  # Full chats held in memory at once while exporting
+    IMPORT_WCU_PER_SECOND: float = 50.0  # Write capacity a chat import may use
+    IMPORT_MAX_BYTES: int = 200 * 1024 * 1024  # Largest accepted import upload
+    
+    # Chat search
+    SEARCH_INDEX_DIR: str = "search_index"  # Per-user postings logs
+    SEARCH_MAX_LOADED_USERS: int = 256  # Users whose postings stay parsed in memory
+    SEMANTIC_EMBEDDER: str = "hashing"  # "hashing" or "package.module:factory"
+    SEMANTIC_DIM: int = 256  # Vector size of the hashing embedder
+    SEMANTIC_FLUSH_INTERVAL: float = 2.0  # Seconds between background embedding batches
+    SEMANTIC_BATCH_SIZE: int = 64  # Messages embedded per call
+    SEMANTIC_EXACT_LIMIT: int = 20000  # Above this many vectors, shortlist by SimHash first
+    SEMANTIC_CANDIDATES: int = 2000  # Shortlist size rescored exactly
+    
+    # Chat list delta sync
+    SYNC_PAGE_SIZE: int = 100  # Chats per sync page
+    SYNC_OVERLAP_SECONDS: float = 5.0  # Re-read window for writes that commit late
+    SYNC_TOMBSTONE_TTL_DAYS: int = 30  # Older cursors get a full listing instead
+    CHAT_PREVIEW_CHARS: int = 140  # Length of the last-message preview kept on each chat
+    
+    # Response compression
+    COMPRESSION_ENCODINGS: List[str] = ["br", "gzip"]  # In order of preference; [] disables
+    COMPRESSION_MIN_SIZE: int = 1024  # Smaller non-streamed bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5  # 0-11; higher is smaller but much slower
+    
     # CORS
     BACKEND_CORS_ORIGINS: Union[List[str], str] = '["http://localhost:5173"]'
     
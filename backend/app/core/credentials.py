@@ -0,0 +1,216 @@
+"""
+Model credentials: envelope encryption at rest and a decrypted in-memory cache.
+
+A model's api_key and the values of its secure headers are sealed together
+with AES-256-GCM under a fresh data key per write. The data key is wrapped
+by a key provider (a local key file by default, AWS KMS in production) and
+stored next to the ciphertext in the model item as `secrets`. The model id
+is bound in as associated data, so envelopes can't be swapped between rows.
+
+Calls to a model read its decrypted config from a short-TTL cache, so the
+hot path does no storage reads and no crypto. Model writes drop the entry.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.api.deps import decimal_to_float
+
+ENVELOPE_VERSION = 1
+
+
+class KeyProvider(ABC):
+    """Wraps and unwraps data keys with a key that never leaves the provider"""
+
+    @abstractmethod
+    def wrap(self, data_key: bytes) -> Tuple[str, bytes]:
+        """Return (key_id, wrapped data key)"""
+
+    @abstractmethod
+    def unwrap(self, key_id: str, wrapped: bytes) -> bytes:
+        """Return the data key"""
+
+
+class LocalKeyProvider(KeyProvider):
+    """Stand-in for a KMS: a master key kept in a local file (created on first use)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._key = self._load()
+        self.key_id = 'local:' + hashlib.sha256(self._key).hexdigest()[:16]
+
+    def wrap(self, data_key: bytes) -> Tuple[str, bytes]:
+        nonce = os.urandom(12)
+        return self.key_id, nonce + AESGCM(self._key).encrypt(nonce, data_key, b'data-key')
+
+    def unwrap(self, key_id: str, wrapped: bytes) -> bytes:
+        if key_id != self.key_id:
+            raise ValueError(f"Data key was wrapped with {key_id}, not {self.key_id}")
+        return AESGCM(self._key).decrypt(wrapped[:12], wrapped[12:], b'data-key')
+
+    def _load(self) -> bytes:
+        if not os.path.exists(self.path):
+            self._create()
+        with open(self.path, 'rb') as f:
+            return base64.b64decode(f.read().strip())
+
+    def _create(self):
+        # Workers can start together: each writes a complete key to its own
+        # temp file and links it into place, so the file only ever appears
+        # whole, and whoever loses the race reads the winner's key
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(base64.b64encode(AESGCM.generate_key(bit_length=256)))
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(temp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temp_path)
+
+
+class KmsKeyProvider(KeyProvider):
+    """AWS KMS customer managed key"""
+
+    def __init__(self, key_id: str):
+        self.key_id = key_id
+        self.client = get_dynamodb().session.client('kms', region_name=settings.AWS_REGION)
+
+    def wrap(self, data_key: bytes) -> Tuple[str, bytes]:
+        response = self.client.encrypt(
+            KeyId=self.key_id,
+            Plaintext=data_key,
+            EncryptionContext={'purpose': 'model-secrets'}
+        )
+        return response['KeyId'], response['CiphertextBlob']
+
+    def unwrap(self, key_id: str, wrapped: bytes) -> bytes:
+        response = self.client.decrypt(
+            KeyId=key_id,
+            CiphertextBlob=wrapped,
+            EncryptionContext={'purpose': 'model-secrets'}
+        )
+        return response['Plaintext']
+
+
+@lru_cache()
+def get_key_provider() -> KeyProvider:
+    if settings.SECRETS_KEY_PROVIDER == 'kms':
+        return KmsKeyProvider(settings.SECRETS_KMS_KEY_ID)
+    return LocalKeyProvider(settings.SECRETS_KEY_FILE)
+
+
+def encrypt_secrets(data: dict, model_id: str) -> dict:
+    data_key = AESGCM.generate_key(bit_length=256)
+    nonce = os.urandom(12)
+    ciphertext = AESGCM(data_key).encrypt(nonce, json.dumps(data).encode(), model_id.encode())
+    key_id, wrapped = get_key_provider().wrap(data_key)
+    return {
+        'v': ENVELOPE_VERSION,
+        'kid': key_id,
+        'dek': base64.b64encode(wrapped).decode(),
+        'nonce': base64.b64encode(nonce).decode(),
+        'ct': base64.b64encode(ciphertext).decode()
+    }
+
+
+def decrypt_secrets(envelope: dict, model_id: str) -> dict:
+    data_key = get_key_provider().unwrap(envelope['kid'], base64.b64decode(envelope['dek']))
+    plaintext = AESGCM(data_key).decrypt(
+        base64.b64decode(envelope['nonce']),
+        base64.b64decode(envelope['ct']),
+        model_id.encode()
+    )
+    return json.loads(plaintext)
+
+
+def seal_model(model: dict) -> dict:
+    """Move api_key and secure header values of a model item into an encrypted envelope"""
+    secret_headers = {
+        h['key']: h['value'] for h in model.get('headers') or [] if h.get('secure') and h.get('value')
+    }
+    api_key = model.pop('api_key', None)
+
+    if api_key or secret_headers:
+        model['secrets'] = encrypt_secrets({'api_key': api_key, 'headers': secret_headers}, model['id'])
+        model['headers'] = [
+            {**h, 'value': ''} if h['key'] in secret_headers else h
+            for h in model.get('headers') or []
+        ]
+    else:
+        model['secrets'] = None
+    return model
+
+
+def unseal_model(model: dict) -> dict:
+    """Model item with api_key and secure header values restored.
+
+    Items written before encryption still carry plaintext and are returned as is.
+    """
+    envelope = model.get('secrets')
+    if not envelope:
+        return model
+
+    data = decrypt_secrets(envelope, model['id'])
+    secret_headers = data.get('headers') or {}
+    model = {k: v for k, v in model.items() if k != 'secrets'}
+    model['api_key'] = data.get('api_key')
+    model['headers'] = [
+        {**h, 'value': secret_headers[h['key']]} if h['key'] in secret_headers else h
+        for h in model.get('headers') or []
+    ]
+    return model
+
+
+class CredentialCache:
+    """Decrypted model configs by id, kept for a short TTL"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.SECRETS_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, dict]] = {}
+        self._generation = 0
+
+    def get(self, model_id: str) -> Optional[dict]:
+        """Decrypted model item, None if the model doesn't exist"""
+        entry = self._entries.get(model_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        generation = self._generation
+        table = get_dynamodb().get_table(settings.MODELS_TABLE)
+        response = table.get_item(Key={'id': model_id})
+        if 'Item' not in response:
+            return None
+
+        model = unseal_model(decimal_to_float(response['Item']))
+        with self._lock:
+            # Don't cache a read that raced with an update
+            if generation == self._generation:
+                self._entries[model_id] = (time.monotonic() + self.ttl, model)
+        return model
+
+    def invalidate(self, model_id: str):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(model_id, None)
+
+
+credential_cache = CredentialCache()
+
+
+def get_credential_cache():
+    return credential_cache
@@ -0,0 +1,49 @@
+"""
+Opaque pagination cursors.
+
+A cursor wraps a DynamoDB LastEvaluatedKey (plus anything else a listing
+needs to resume) as base64url JSON with an HMAC, so clients can hand it back
+but can't forge or edit the ExclusiveStartKey it turns into.
+"""
+import base64
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+
+from app.core.config import settings
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode(), payload.encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Can't put {type(value).__name__} in a cursor")
+
+
+def encode_cursor(data: dict) -> str:
+    payload = _b64encode(json.dumps(data, separators=(',', ':'), default=_default).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Raises ValueError for a cursor that is malformed or was not issued by us"""
+    payload, _, signature = cursor.partition('.')
+    if not payload or not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid cursor")
+    try:
+        return json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
@@ -1,6 +1,22 @@
 import boto3
 from app.core.config import settings
 
+# User attributes projected into the admin listing indexes
+USER_LIST_ATTRIBUTES = [
+    'email', 'bio', 'role', 'custom_role', 'updated_at',
+    'tokens_used_this_month', 'token_usage_reset_date'
+]
+
+# Chat attributes projected into user-summary-index: everything the sidebar
+# shows, including the summary kept by app.core.summary
+CHAT_SUMMARY_ATTRIBUTES = [
+    'title', 'model_id', 'chat_type', 'participant_id', 'conversation_id', 'participant_deleted',
+    'pinned', 'created_at', 'revision', 'message_count', 'last_message', 'unread_count', 'last_read_at'
+]
+
+# Chat lists fetched without messages read only these
+CHAT_LIST_PROJECTION = ', '.join(['id', 'user_id', 'updated_at'] + CHAT_SUMMARY_ATTRIBUTES)
+
 class DynamoDB:
     def __init__(self):
         # Create boto3 session
@@ -15,6 +31,7 @@ class DynamoDB:
         else:
             # Use default credentials
             self.session = boto3.Session(region_name=settings.AWS_REGION)
+        self._client = None
     
     def get_resource(self):
         kwargs = {'region_name': settings.AWS_REGION}
@@ -25,6 +42,15 @@ class DynamoDB:
     def get_table(self, table_name):
         resource = self.get_resource()
         return resource.Table(table_name)
+    
+    def get_client(self):
+        """Low-level client (thread-safe, shared); items come back as AttributeValues, see app.core.dynamo"""
+        if self._client is None:
+            kwargs = {'region_name': settings.AWS_REGION}
+            if settings.DYNAMODB_ENDPOINT_URL:
+                kwargs['endpoint_url'] = settings.DYNAMODB_ENDPOINT_URL
+            self._client = self.session.client('dynamodb', **kwargs)
+        return self._client
 
 db = DynamoDB()
 
@@ -52,7 +78,9 @@ async def init_dynamodb():
             AttributeDefinitions=[
                 {'AttributeName': 'id', 'AttributeType': 'S'},
                 {'AttributeName': 'email', 'AttributeType': 'S'},
-                {'AttributeName': 'status', 'AttributeType': 'S'}
+                {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'created_at', 'AttributeType': 'S'},
+                {'AttributeName': 'name', 'AttributeType': 'S'}
             ],
             GlobalSecondaryIndexes=[
                 {
@@ -66,6 +94,29 @@ async def init_dynamodb():
                     'KeySchema': [{'AttributeName': 'status', 'KeyType': 'HASH'}],
                     'Projection': {'ProjectionType': 'ALL'},
                     'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+                },
+                # Admin listings: only display fields, sorted by signup date or name
+                {
+                    'IndexName': 'status-created-index',
+                    'KeySchema': [
+                        {'AttributeName': 'status', 'KeyType': 'HASH'},
+                        {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'INCLUDE',
+                        'NonKeyAttributes': USER_LIST_ATTRIBUTES + ['name']
+                    }
+                },
+                {
+                    'IndexName': 'status-name-index',
+                    'KeySchema': [
+                        {'AttributeName': 'status', 'KeyType': 'HASH'},
+                        {'AttributeName': 'name', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'INCLUDE',
+                        'NonKeyAttributes': USER_LIST_ATTRIBUTES + ['created_at']
+                    }
                 }
             ],
             BillingMode='PAY_PER_REQUEST'
@@ -75,8 +126,102 @@ async def init_dynamodb():
         if 'ResourceInUseException' not in str(e):
             print(f"Error creating users table: {e}")
     
+    try:
+        # Chats are listed per user, in full or from the slim summary index
+        dynamodb.create_table(
+            TableName=settings.CHATS_TABLE,
+            KeySchema=[
+                {'AttributeName': 'id', 'KeyType': 'HASH'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'updated_at', 'AttributeType': 'S'},
+                {'AttributeName': 'pinned_user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'unpinned_user_id', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'user-id-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'user-summary-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'INCLUDE',
+                        'NonKeyAttributes': CHAT_SUMMARY_ATTRIBUTES
+                    }
+                },
+                # Sparse: each chat is in exactly one of these (see app.core.chat_pages)
+                {
+                    'IndexName': 'user-pinned-index',
+                    'KeySchema': [
+                        {'AttributeName': 'pinned_user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'INCLUDE',
+                        'NonKeyAttributes': CHAT_SUMMARY_ATTRIBUTES + ['user_id']
+                    }
+                },
+                {
+                    'IndexName': 'user-unpinned-index',
+                    'KeySchema': [
+                        {'AttributeName': 'unpinned_user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'INCLUDE',
+                        'NonKeyAttributes': CHAT_SUMMARY_ATTRIBUTES + ['user_id']
+                    }
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"Created table: {settings.CHATS_TABLE}")
+    except Exception as e:
+        if 'ResourceInUseException' not in str(e):
+            print(f"Error creating chats table: {e}")
+    
+    try:
+        # Archived chats are read back per user (export with include_archived)
+        dynamodb.create_table(
+            TableName=settings.CHATS_ARCHIVE_TABLE,
+            KeySchema=[
+                {'AttributeName': 'id', 'KeyType': 'HASH'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'updated_at', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'user-id-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"Created table: {settings.CHATS_ARCHIVE_TABLE}")
+    except Exception as e:
+        if 'ResourceInUseException' not in str(e):
+            print(f"Error creating {settings.CHATS_ARCHIVE_TABLE}: {e}")
+    
     # Create other tables
-    for table_name in [settings.MODELS_TABLE, settings.ROLES_TABLE, settings.CHATS_TABLE]:
+    for table_name in [settings.MODELS_TABLE, settings.ROLES_TABLE]:
         try:
             dynamodb.create_table(
                 TableName=table_name,
@@ -92,6 +237,24 @@ async def init_dynamodb():
         except Exception as e:
             if 'ResourceInUseException' not in str(e):
                 print(f"Error creating {table_name}: {e}")
+    
+    try:
+        dynamodb.create_table(
+            TableName=settings.CHAT_TOMBSTONES_TABLE,
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'change_key', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'change_key', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"Created table: {settings.CHAT_TOMBSTONES_TABLE}")
+    except Exception as e:
+        if 'ResourceInUseException' not in str(e):
+            print(f"Error creating {settings.CHAT_TOMBSTONES_TABLE}: {e}")
 
 async def close_dynamodb():
     """Cleanup DynamoDB connection"""
@@ -0,0 +1,82 @@
+"""
+Single-pass decoding of low-level DynamoDB items.
+
+The resource layer runs every item through boto3's TypeDeserializer, which
+yields Decimals, and decimal_to_float then walks the result again,
+rebuilding every dict and list. Hot chat paths call the low-level client
+(get_dynamodb().get_client()) instead and decode its AttributeValue JSON
+here: numbers become int or float directly and each container is built
+once. Attributes named in `lazy` stay encoded until materialize() is called,
+so a chat loaded only to check its owner never decodes its messages.
+"""
+from typing import Any, Dict, Iterable
+
+from boto3.dynamodb.types import TypeSerializer
+
+_serializer = TypeSerializer()
+
+
+def _number(text: str):
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def decode(value: Dict[str, Any]) -> Any:
+    """Native Python value of one AttributeValue ({'S': ...}, {'M': ...}, ...)"""
+    for tag, inner in value.items():
+        if tag == 'S':
+            return inner
+        if tag == 'M':
+            return {key: decode(item) for key, item in inner.items()}
+        if tag == 'L':
+            return [decode(item) for item in inner]
+        if tag == 'N':
+            return _number(inner)
+        if tag == 'BOOL':
+            return inner
+        if tag == 'NULL':
+            return None
+        if tag == 'SS' or tag == 'BS':
+            return set(inner)
+        if tag == 'NS':
+            return {_number(item) for item in inner}
+        if tag == 'B':
+            return inner
+        raise ValueError(f"Unknown DynamoDB type {tag}")
+
+
+class Lazy:
+    """An attribute left encoded; .value decodes it (once)"""
+    __slots__ = ('raw', '_value')
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self._value = self
+
+    @property
+    def value(self):
+        if self._value is self:
+            self._value = decode(self.raw)
+        return self._value
+
+
+def decode_item(item: Dict[str, Dict], lazy: Iterable[str] = ()) -> Dict[str, Any]:
+    lazy = frozenset(lazy)
+    return {
+        key: Lazy(value) if key in lazy else decode(value)
+        for key, value in item.items()
+    }
+
+
+def materialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode any Lazy attributes of a decoded item in place"""
+    for key, value in item.items():
+        if isinstance(value, Lazy):
+            item[key] = value.value
+    return item
+
+
+def encode_values(values: Dict[str, Any]) -> Dict[str, Dict]:
+    """ExpressionAttributeValues (or a Key) for the low-level client"""
+    return {name: _serializer.serialize(value) for name, value in values.items()}
@@ -0,0 +1,69 @@
+"""
+Text embedders for semantic chat search.
+
+An embedder turns a batch of texts into an (n, dim) float32 array of unit
+vectors. SEMANTIC_EMBEDDER selects it: "hashing" for the built-in local
+embedder, or "package.module:factory" for anything else (a sentence
+transformer, an embeddings API...). The factory is called once with no
+arguments and returns an object with `name`, `dim` and `embed(texts)`.
+"""
+import hashlib
+import importlib
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+
+WORD_RE = re.compile(r'\w+')
+
+
+class Embedder(ABC):
+    name = 'base'
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return an (n, dim) float32 array of unit vectors"""
+
+
+class HashingEmbedder(Embedder):
+    """Feature hashing of words and character trigrams
+
+    Deterministic and dependency-free, so tests and local setups get
+    stable vectors with no model to download. It captures shared
+    vocabulary and spelling variants, not meaning.
+    """
+    name = 'hashing'
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _bucket(self, feature: str):
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD_RE.findall(text.lower()):
+                column, sign = self._bucket(word)
+                vectors[row, column] += sign
+                padded = f"#{word}#"
+                for i in range(len(padded) - 2):
+                    column, sign = self._bucket(padded[i:i + 3])
+                    vectors[row, column] += 0.5 * sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+@lru_cache()
+def get_embedder() -> Embedder:
+    if settings.SEMANTIC_EMBEDDER == 'hashing':
+        return HashingEmbedder(settings.SEMANTIC_DIM)
+    module_name, _, factory = settings.SEMANTIC_EMBEDDER.partition(':')
+    return getattr(importlib.import_module(module_name), factory)()
@@ -0,0 +1,43 @@
+"""
+Sparse fieldsets: ?fields=id,title,updated_at on list endpoints.
+
+The requested names are checked against the endpoint's response model and
+turned into a DynamoDB ProjectionExpression (every name aliased, so reserved
+words like name, status and role need no special casing) and into a trimmed
+copy of the model that renders only those fields. DynamoDB bills a read by
+the size of the whole item either way; what a projection saves is transfer,
+decoding and rendering, which for chats with long histories is most of it.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str], always: Iterable[str] = ('id',)) -> Optional[Tuple[str, ...]]:
+    """Field names from a comma-separated list, or None when none was given
+
+    Raises ValueError naming any field the model doesn't have.
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys([*always, *names]))
+
+
+def projection(names: Sequence[str]) -> Tuple[str, Dict[str, str]]:
+    """ProjectionExpression and ExpressionAttributeNames reading only names"""
+    aliases = {f'#f{i}': name for i, name in enumerate(dict.fromkeys(names))}
+    return ', '.join(aliases), aliases
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    """model with only the given fields, keeping their types and defaults"""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in names}
+    )
@@ -0,0 +1,95 @@
+"""
+In-process background jobs with progress reporting.
+
+Long-running maintenance (cascading deletes, imports) runs as an asyncio
+task after the request that started it has returned. The job keeps
+counters the task updates as it goes, and admins poll them by id. Jobs
+live in the memory of the worker that runs them; a bounded number of
+finished ones are kept for inspection.
+"""
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class Job:
+    def __init__(self, kind: str, owner_id: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.owner_id = owner_id
+        self.status = 'queued'  # queued -> running -> completed | failed
+        self.progress: Dict[str, int] = {}
+        self.details: Dict = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[str] = None
+
+    def advance(self, **counters):
+        """Add to progress counters, e.g. job.advance(chats_deleted=25)"""
+        for name, value in counters.items():
+            self.progress[name] = self.progress.get(name, 0) + value
+        self.updated_at = datetime.utcnow().isoformat()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'details': self.details,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobRegistry:
+    def __init__(self, max_finished: int = 200):
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks = set()
+
+    def submit(self, kind: str, run: Callable[[Job], Awaitable], owner_id: Optional[str] = None) -> Job:
+        """Start run(job) in the background and return the job right away"""
+        job = Job(kind, owner_id)
+        self._jobs[job.id] = job
+        self._trim()
+
+        task = asyncio.create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable]):
+        job.status = 'running'
+        try:
+            await run(job)
+            job.status = 'completed'
+        except Exception as e:
+            print(f"Job {job.kind} {job.id} failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+        job.finished_at = job.updated_at = datetime.utcnow().isoformat()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+
+job_registry = JobRegistry()
+
+
+def get_job_registry():
+    return job_registry
@@ -0,0 +1,54 @@
+"""
+What a user's role grants them: feature permissions and usage limits.
+
+Both come from the same role item, so callers that need both (the bootstrap
+endpoint) read it once with get_user_role and derive each from it.
+"""
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.core.usage import get_usage_tracker, tokens_this_month
+from app.api.deps import decimal_to_float
+
+# Features of users without a (known) custom role; a role's own flags override these
+DEFAULT_FEATURES = {
+    "user_chat": False,
+    "chat": True,
+    "history": True,
+    "export": False,
+    "share": False,
+    "settings": True,
+    "profile": True
+}
+LIMIT_NAMES = ('max_chats', 'max_tokens_per_month', 'context_length')  # None means unlimited
+
+
+def get_user_role(user) -> Optional[dict]:
+    """The user's custom role, read only for what permissions and limits use"""
+    if not user.custom_role:
+        return None
+    roles_table = get_dynamodb().get_table(settings.ROLES_TABLE)
+    role_response = roles_table.get_item(
+        Key={'id': user.custom_role},
+        ProjectionExpression='#permissions, ' + ', '.join(LIMIT_NAMES),
+        ExpressionAttributeNames={'#permissions': 'permissions'}
+    )
+    if 'Item' not in role_response:
+        return None
+    return decimal_to_float(role_response['Item'])
+
+
+def role_features(user, role: Optional[dict]) -> Dict[str, bool]:
+    # Admins have all permissions
+    if user.role == 'admin':
+        return {name: True for name in DEFAULT_FEATURES}
+    features = ((role or {}).get('permissions') or {}).get('features') or {}
+    return {name: features.get(name, default) for name, default in DEFAULT_FEATURES.items()}
+
+
+def role_limits(user, role: Optional[dict]) -> dict:
+    # Stored usage plus anything counted but not flushed yet
+    tokens_used = tokens_this_month(user) + get_usage_tracker().pending(user.id)
+    limits = {name: (role or {}).get(name) for name in LIMIT_NAMES}
+    return {**limits, "tokens_used_this_month": tokens_used}
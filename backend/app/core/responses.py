@@ -0,0 +1,92 @@
+"""
+Fast JSON responses for chat payloads.
+
+An endpoint that returns a model or dicts under response_model gets them
+validated again by FastAPI and then serialized, so every message of a chat
+is walked several times. model_response validates once with a cached
+TypeAdapter and renders straight to JSON bytes with pydantic-core's
+serializer; since it returns a Response, FastAPI's own pass is skipped.
+Endpoints keep response_model for the OpenAPI schema.
+
+benchmark_serialization.py compares the two paths.
+
+Read endpoints also answer conditional GETs: they derive a strong ETag from
+what versions the data (a chat's updated_at and revision, a content hash)
+and, when the client's If-None-Match still matches, return 304 before
+anything is rendered.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Request, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+CACHE_CONTROL = 'private, no-cache'  # Clients may keep a copy but must revalidate it
+
+
+@lru_cache(maxsize=None)
+def get_adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def render(tp, data: Any) -> bytes:
+    """Validate data (dicts or model instances) as tp once and encode it as JSON"""
+    adapter = get_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def model_response(tp, data: Any, status_code: int = 200, etag: Optional[str] = None) -> Response:
+    return Response(
+        render(tp, data),
+        status_code=status_code,
+        media_type='application/json',
+        headers=etag_headers(etag)
+    )
+
+
+def conditional_response(request: Request, tp, data: Any) -> Response:
+    """Render data, answering 304 when the client already holds exactly this body
+
+    For small payloads whose inputs have no version of their own.
+    """
+    body = render(tp, data)
+    etag = make_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(body, media_type='application/json', headers=etag_headers(etag))
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values that version a response (or from its body bytes)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b'\0')
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+def etag_headers(etag: Optional[str]) -> Dict[str, str]:
+    if etag is None:
+        return {}
+    return {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names this ETag (weak comparison, as RFC 9110 asks for GETs)
+
+    Compressed responses carry the ETag weakened (see compression.py), which
+    this matches too.
+    """
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in header.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
@@ -0,0 +1,211 @@
+"""
+Scheduler for outbound model calls.
+
+Every model gets a fixed number of concurrent upstream slots. When they are
+all taken, callers wait in a start-time fair queue keyed by priority class,
+so interactive chats keep being served while data_generation batch work
+backs up behind them instead of in front of them.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class _ClassStats:
+    """Counters for one priority class on one model"""
+
+    def __init__(self, window: int):
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.waits = deque(maxlen=window)  # Recent queue waits in seconds
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.waits)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+
+        return {
+            "queued": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "p99": pct(0.99),
+            },
+        }
+
+
+class _ModelQueue:
+    """Slots and waiters for a single model"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.active = 0
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        # Heap entries: [finish_tag, seq, start_tag, priority, enqueued_at, future]
+        self.waiters = []
+        self.window = window
+        self.classes: Dict[str, _ClassStats] = {}
+
+    def class_stats(self, priority: str) -> _ClassStats:
+        if priority not in self.classes:
+            self.classes[priority] = _ClassStats(self.window)
+        return self.classes[priority]
+
+
+class UpstreamScheduler:
+    """Per-model concurrency caps with weighted fair queuing between priority classes"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        class_weights: Optional[Dict[str, int]] = None,
+        window: int = 1024
+    ):
+        self.max_concurrency = max_concurrency or settings.SCHEDULER_MAX_CONCURRENCY
+        self.class_weights = class_weights or settings.SCHEDULER_CLASS_WEIGHTS
+        self.window = window
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+
+    def priority_for(self, user, data_generation: bool = False) -> str:
+        """Pick the priority class for a call made on behalf of a user"""
+        if data_generation:
+            return BATCH
+        role_classes = settings.SCHEDULER_ROLE_CLASSES
+        if user.custom_role and user.custom_role in role_classes:
+            return role_classes[user.custom_role]
+        return role_classes.get(user.role, INTERACTIVE)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model_id: str,
+        priority: str = INTERACTIVE,
+        limit: Optional[int] = None,
+        cost: float = 1.0,
+        timeout: Optional[float] = None
+    ):
+        """Hold one upstream slot for model_id for the duration of the block.
+
+        Raises asyncio.TimeoutError if no slot frees up within timeout seconds.
+        """
+        queue = self._queue(model_id, limit)
+        await self._acquire(queue, priority, cost, timeout or settings.SCHEDULER_QUEUE_TIMEOUT)
+        try:
+            yield
+        finally:
+            self._release(queue, priority)
+
+    def stats(self) -> dict:
+        """Queue depth, in-flight calls and queue-wait percentiles per model and class"""
+        return {
+            model_id: {
+                "limit": queue.limit,
+                "active": queue.active,
+                "queued": sum(1 for w in queue.waiters if not w[-1].done()),
+                "classes": {
+                    priority: class_stats.snapshot()
+                    for priority, class_stats in queue.classes.items()
+                },
+            }
+            for model_id, queue in self._queues.items()
+        }
+
+    def _queue(self, model_id: str, limit: Optional[int]) -> _ModelQueue:
+        queue = self._queues.get(model_id)
+        if queue is None:
+            queue = self._queues[model_id] = _ModelQueue(limit or self.max_concurrency, self.window)
+        elif limit and limit != queue.limit:
+            # Model config changed; wake anyone the new limit lets through
+            queue.limit = limit
+            while queue.active < queue.limit and self._grant_next(queue):
+                pass
+        return queue
+
+    async def _acquire(self, queue: _ModelQueue, priority: str, cost: float, timeout: float):
+        class_stats = queue.class_stats(priority)
+
+        while queue.waiters and queue.waiters[0][-1].done():
+            heapq.heappop(queue.waiters)
+
+        if queue.active < queue.limit and not queue.waiters:
+            queue.active += 1
+            class_stats.active += 1
+            class_stats.waits.append(0.0)
+            return
+
+        # Start-time fair queuing: a class that has been sending a lot is
+        # pushed back in virtual time in proportion to 1 / weight
+        weight = max(self.class_weights.get(priority, 1), 1)
+        start = max(queue.virtual_time, queue.last_finish.get(priority, 0.0))
+        finish = start + cost / weight
+        queue.last_finish[priority] = finish
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, [finish, next(self._seq), start, priority, time.monotonic(), future])
+        class_stats.queued += 1
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us as we gave up: take back the grant
+                # (the call never ran, so it isn't completed) and pass it along
+                queue.active -= 1
+                class_stats.active -= 1
+                if queue.active < queue.limit:
+                    self._grant_next(queue)
+            else:
+                class_stats.queued -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                class_stats.timeouts += 1
+            raise
+
+    def _release(self, queue: _ModelQueue, priority: str):
+        class_stats = queue.class_stats(priority)
+        class_stats.active -= 1
+        class_stats.completed += 1
+        queue.active -= 1
+        if queue.active < queue.limit:
+            self._grant_next(queue)
+
+    def _grant_next(self, queue: _ModelQueue) -> bool:
+        while queue.waiters:
+            _, _, start, priority, enqueued_at, future = heapq.heappop(queue.waiters)
+            if future.done():
+                continue
+            queue.virtual_time = start
+            queue.active += 1
+            class_stats = queue.class_stats(priority)
+            class_stats.queued -= 1
+            class_stats.active += 1
+            class_stats.waits.append(time.monotonic() - enqueued_at)
+            future.set_result(None)
+            return True
+        return False
+
+
+scheduler = UpstreamScheduler()
+
+
+def get_scheduler():
+    return scheduler
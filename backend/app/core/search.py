@@ -0,0 +1,275 @@
+"""
+Full-text search over chat history.
+
+Each user's index is an append-only postings log under SEARCH_INDEX_DIR:
+one JSON line per indexed message (token -> count), title or deleted chat.
+Any worker can append to it; readers keep the parsed postings in memory and
+on each query replay only what was appended since last time, so workers on
+a host stay in step without coordinating. rebuild_search_index.py rewrites
+a user's log from the chats table (dropping deleted chats along the way);
+readers notice the replaced file and reload.
+
+Chats are ranked with BM25 over their message text, plus a boost for
+title matches. The same writes also feed the semantic index (semantic.py).
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.semantic import get_semantic_index
+
+TOKEN_RE = re.compile(r'\w+')
+STOPWORDS = frozenset(
+    'a an and are as at be but by can do for from has have how i if in is it '
+    'me my of on or so that the this to was we what when with you your'.split()
+)
+MAX_TOKEN_LENGTH = 64
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2.0
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and len(token) <= MAX_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+class UserIndex:
+    """In-memory postings for one user, built by replaying their log"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Dict[int, int]]] = {}  # token -> chat -> {message index: count}
+        self.title_postings: Dict[str, Set[str]] = {}  # token -> chats with it in the title
+        self.chat_tokens: Dict[str, Dict[int, Set[str]]] = {}  # chat -> message index -> tokens, for re-indexing and removal
+        self.titles: Dict[str, str] = {}
+        self.lengths: Dict[str, int] = {}  # chat -> tokens indexed
+        self.total_length = 0
+        self.inode: Optional[int] = None
+        self.offset = 0
+
+    def apply(self, entry: dict):
+        chat_id = entry['c']
+        if entry.get('del'):
+            self._remove(chat_id)
+        elif 'title' in entry:
+            self._set_title(chat_id, entry['title'])
+        else:
+            message_index = entry['m']
+            counts = entry['t']
+            message_tokens = self.chat_tokens.setdefault(chat_id, {})
+            # Re-indexed message: drop the tokens it no longer has, count only the difference for the rest
+            for token in message_tokens.pop(message_index, set()) - counts.keys():
+                self._unpost(token, chat_id, message_index)
+            for token, count in counts.items():
+                messages = self.postings.setdefault(token, {}).setdefault(chat_id, {})
+                count -= messages.get(message_index, 0)
+                messages[message_index] = messages.get(message_index, 0) + count
+                self.lengths[chat_id] = self.lengths.get(chat_id, 0) + count
+                self.total_length += count
+            if counts:
+                message_tokens[message_index] = set(counts)
+
+    def _unpost(self, token: str, chat_id: str, message_index: int):
+        chats = self.postings.get(token, {})
+        messages = chats.get(chat_id, {})
+        count = messages.pop(message_index, 0)
+        self.lengths[chat_id] = self.lengths.get(chat_id, 0) - count
+        self.total_length -= count
+        if not messages:
+            chats.pop(chat_id, None)
+        if not chats:
+            self.postings.pop(token, None)
+
+    def _set_title(self, chat_id: str, title: str):
+        for token in tokenize(self.titles.get(chat_id, '')):
+            self.title_postings.get(token, set()).discard(chat_id)
+        self.titles[chat_id] = title
+        for token in tokenize(title):
+            self.title_postings.setdefault(token, set()).add(chat_id)
+
+    def _remove(self, chat_id: str):
+        self._set_title(chat_id, '')
+        del self.titles[chat_id]
+        for token in set().union(*self.chat_tokens.pop(chat_id, {}).values()):
+            chats = self.postings.get(token, {})
+            chats.pop(chat_id, None)
+            if not chats:
+                self.postings.pop(token, None)
+        self.total_length -= self.lengths.pop(chat_id, 0)
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        terms = set(tokenize(query))
+        chat_count = len(self.titles.keys() | self.lengths.keys())
+        if not terms or not chat_count:
+            return []
+
+        average_length = self.total_length / max(len(self.lengths), 1) or 1
+        scores: Dict[str, float] = {}
+        hits: Dict[str, Counter] = {}
+
+        for term in terms:
+            chats = self.postings.get(term, {})
+            if chats:
+                idf = math.log(1 + (chat_count - len(chats) + 0.5) / (len(chats) + 0.5))
+                for chat_id, messages in chats.items():
+                    tf = sum(messages.values())
+                    norm = 1 - BM25_B + BM25_B * self.lengths.get(chat_id, 0) / average_length
+                    scores[chat_id] = scores.get(chat_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    hits.setdefault(chat_id, Counter()).update(messages)
+
+            titled = self.title_postings.get(term)
+            if titled:
+                idf = math.log(1 + (chat_count - len(titled) + 0.5) / (len(titled) + 0.5))
+                for chat_id in titled:
+                    scores[chat_id] = scores.get(chat_id, 0.0) + TITLE_BOOST * idf
+
+        return [
+            {
+                'chat_id': chat_id,
+                'title': self.titles.get(chat_id),
+                'score': round(score, 4),
+                'message_indexes': [index for index, _ in hits.get(chat_id, Counter()).most_common(5)]
+            }
+            for chat_id, score in nlargest(limit, scores.items(), key=lambda item: item[1])
+        ]
+
+
+class SearchIndex:
+    def __init__(self, directory: Optional[str] = None, max_loaded_users: Optional[int] = None):
+        self.directory = directory or settings.SEARCH_INDEX_DIR
+        self.max_loaded_users = max_loaded_users or settings.SEARCH_MAX_LOADED_USERS
+        self._loaded: "OrderedDict[str, UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, user_id: str) -> str:
+        name = hashlib.sha256(user_id.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.log")
+
+    # Writes: one append per call, never raising into the request
+
+    def index_message(self, user_id: str, chat_id: str, index: int, content: str):
+        self._append(user_id, [_message_entry(chat_id, index, content)])
+        get_semantic_index().enqueue(user_id, chat_id, index, content)
+
+    def index_chats(self, user_id: str, chats: Iterable[dict]):
+        """(Re)index whole chats: title and every message, replacing what was there"""
+        semantic = get_semantic_index()
+        entries = []
+        for chat in chats:
+            entries.append({'c': chat['id'], 'del': 1})
+            entries.extend(_chat_entries(chat))
+            semantic.remove_chats(user_id, [chat['id']])
+            for index, message in enumerate(chat.get('messages') or []):
+                semantic.enqueue(user_id, chat['id'], index, message.get('content') or '')
+        self._append(user_id, entries)
+
+    def set_title(self, user_id: str, chat_id: str, title: str):
+        self._append(user_id, [{'c': chat_id, 'title': title}])
+
+    def remove_chats(self, user_id: str, chat_ids: Iterable[str]):
+        chat_ids = list(chat_ids)
+        self._append(user_id, [{'c': chat_id, 'del': 1} for chat_id in chat_ids])
+        get_semantic_index().remove_chats(user_id, chat_ids)
+
+    def drop_user(self, user_id: str):
+        get_semantic_index().drop_user(user_id)
+        with self._lock:
+            self._loaded.pop(user_id, None)
+        try:
+            os.unlink(self.path(user_id))
+        except FileNotFoundError:
+            pass
+
+    def rebuild(self, user_id: str, chats: Iterable[dict]) -> int:
+        """Replace a user's log with one built from chats (an iterable, read once); returns chats indexed"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(user_id)
+        count = 0
+        with open(path + '.tmp', 'wb') as f:
+            for chat in chats:
+                f.write(_encode(_chat_entries(chat)))
+                count += 1
+        os.replace(path + '.tmp', path)
+        return count
+
+    def _append(self, user_id: str, entries: List[dict]):
+        if not entries:
+            return
+        data = _encode(entries)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path(user_id), 'ab') as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Error updating search index for user {user_id}: {e}")
+
+    # Reads
+
+    def search(self, user_id: str, query: str, limit: int = 20) -> List[dict]:
+        with self._lock:
+            return self._catch_up(user_id).search(query, limit)
+
+    def _catch_up(self, user_id: str) -> UserIndex:
+        index = self._loaded.get(user_id) or UserIndex()
+        self._loaded[user_id] = index
+        self._loaded.move_to_end(user_id)
+        while len(self._loaded) > self.max_loaded_users:
+            self._loaded.popitem(last=False)
+
+        try:
+            f = open(self.path(user_id), 'rb')
+        except FileNotFoundError:
+            self._loaded[user_id] = UserIndex()
+            return self._loaded[user_id]
+
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != index.inode or stat.st_size < index.offset:
+                # Rebuilt (or truncated) since we last read it: start over
+                index = self._loaded[user_id] = UserIndex()
+                index.inode = stat.st_ino
+            f.seek(index.offset)
+            data = f.read()
+
+        # A writer may be mid-line; leave the partial line for next time
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                index.apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+        index.offset += end
+        return index
+
+
+def _message_entry(chat_id: str, index: int, content: str) -> dict:
+    return {'c': chat_id, 'm': index, 't': dict(Counter(tokenize(content)))}
+
+
+def _chat_entries(chat: dict) -> List[dict]:
+    entries = [{'c': chat['id'], 'title': chat.get('title') or ''}]
+    for index, message in enumerate(chat.get('messages') or []):
+        entry = _message_entry(chat['id'], index, message.get('content') or '')
+        if entry['t']:
+            entries.append(entry)
+    return entries
+
+
+def _encode(entries: List[dict]) -> bytes:
+    return ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries).encode()
+
+
+search_index = SearchIndex()
+
+
+def get_search_index():
+    return search_index
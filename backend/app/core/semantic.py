@@ -0,0 +1,300 @@
+"""
+Semantic chat search over message embeddings.
+
+Messages are queued as they arrive and embedded in batches by a background
+flusher, off the request path. Each user's vectors live in one file of
+fixed-size records (chat id, message index, 64-bit SimHash code, vector)
+under SEARCH_INDEX_DIR/vectors/<embedder>-<dim>/. Whole records are
+appended, so any worker can write, and readers memory-map the file: after
+a restart nothing is recomputed. A record with message index -1 is a
+tombstone that hides the chat's earlier records, and a record for a message
+that is already in the file replaces the earlier one (a re-indexed message,
+or a batch written again after a failed flush).
+
+Small indexes are searched exactly. Above SEMANTIC_EXACT_LIMIT records, the
+SEMANTIC_CANDIDATES nearest by Hamming distance between SimHash codes are
+shortlisted and only those are rescored with the full vectors.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.embeddings import get_embedder
+
+MAX_TEXT_CHARS = 2000  # Longer messages are embedded from their start
+CHAT_ID_BYTES = 36  # Chat ids are UUIDs; records hold them in a fixed-size field
+SIMHASH_SEED = 20240611
+POPCOUNT16 = np.array([bin(i).count('1') for i in range(1 << 16)], dtype=np.uint8)
+
+
+def record_dtype(dim: int) -> np.dtype:
+    return np.dtype([
+        ('chat', f'S{CHAT_ID_BYTES}'),
+        ('message', '<i4'),
+        ('code', '<u8'),
+        ('vector', '<f4', (dim,))
+    ])
+
+
+class UserVectors:
+    """Memory-mapped records of one user plus which rows are still live"""
+
+    def __init__(self):
+        self.records: Optional[np.memmap] = None
+        self.valid = np.zeros(0, dtype=bool)
+        self.rows_by_chat: Dict[bytes, Dict[int, int]] = {}  # chat -> message index -> row
+        self.inode: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.valid)
+
+    def extend(self, records: np.memmap):
+        """Take in the rows appended since the last call"""
+        start = self.size
+        self.records = records
+        self.valid = np.concatenate([self.valid, records['message'][start:] >= 0])
+        for row in range(start, len(records)):
+            chat = records['chat'][row]
+            message = int(records['message'][row])
+            if message < 0:
+                self.valid[list(self.rows_by_chat.pop(chat, {}).values())] = False
+                continue
+            rows = self.rows_by_chat.setdefault(chat, {})
+            if message in rows:
+                self.valid[rows[message]] = False
+            rows[message] = row
+
+
+class SemanticIndex:
+    def __init__(self, directory: Optional[str] = None, flush_interval: Optional[float] = None):
+        self.embedder = get_embedder()
+        self.dtype = record_dtype(self.embedder.dim)
+        self.directory = directory or os.path.join(
+            settings.SEARCH_INDEX_DIR, 'vectors', f"{self.embedder.name}-{self.embedder.dim}"
+        )
+        self.flush_interval = flush_interval or settings.SEMANTIC_FLUSH_INTERVAL
+        planes = np.random.default_rng(SIMHASH_SEED).standard_normal((64, self.embedder.dim))
+        self.planes = planes.astype(np.float32)
+        self._pending: List[Tuple] = []  # ('add', user, chat, index, text) or ('del', user, chat)
+        self._pending_lock = threading.Lock()
+        self._loaded: "OrderedDict[str, UserVectors]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def path(self, user_id: str) -> str:
+        name = hashlib.sha256(user_id.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.vec")
+
+    # Writes are queued and applied in order by flush()
+
+    def enqueue(self, user_id: str, chat_id: str, index: int, text: str):
+        if text.strip() and _fits(chat_id):
+            with self._pending_lock:
+                self._pending.append(('add', user_id, chat_id, index, text[:MAX_TEXT_CHARS]))
+
+    def remove_chats(self, user_id: str, chat_ids: Iterable[str]):
+        with self._pending_lock:
+            self._pending.extend(('del', user_id, chat_id) for chat_id in chat_ids if _fits(chat_id))
+
+    def drop_user(self, user_id: str):
+        with self._pending_lock:
+            self._pending = [entry for entry in self._pending if entry[1] != user_id]
+        with self._lock:
+            self._loaded.pop(user_id, None)
+        try:
+            os.unlink(self.path(user_id))
+        except FileNotFoundError:
+            pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        while True:
+            with self._pending_lock:
+                batch = self._pending[:settings.SEMANTIC_BATCH_SIZE]
+                del self._pending[:len(batch)]
+            if not batch:
+                return
+            written = set()
+            try:
+                await run_in_threadpool(self._write, batch, written)
+            except Exception:
+                # Put back what didn't reach its user's file, in front so order
+                # is kept; retried next interval
+                with self._pending_lock:
+                    self._pending[:0] = [entry for entry in batch if entry[1] not in written]
+                raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Semantic index flush failed: {e}")
+
+    def _records(self, entries: List[Tuple], vectors: np.ndarray) -> np.ndarray:
+        records = np.zeros(len(entries), dtype=self.dtype)
+        records['chat'] = [entry[0].encode() for entry in entries]
+        records['message'] = [entry[1] for entry in entries]
+        records['vector'] = vectors
+        records['code'] = self._codes(vectors)
+        return records
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        bits = np.packbits(vectors @ self.planes.T > 0, axis=-1, bitorder='little')
+        return bits.view('<u8').reshape(len(vectors))
+
+    def _write(self, batch: List[Tuple], written: set):
+        """Append batch's records; written collects the users whose records are in"""
+        additions = [entry for entry in batch if entry[0] == 'add']
+        vectors = self.embedder.embed([entry[4] for entry in additions]) if additions else None
+        by_user: Dict[str, Tuple[list, list]] = OrderedDict()
+        position = 0
+        for entry in batch:
+            entries, rows = by_user.setdefault(entry[1], ([], []))
+            if entry[0] == 'add':
+                entries.append((entry[2], entry[3]))
+                rows.append(vectors[position])
+                position += 1
+            else:
+                entries.append((entry[2], -1))
+                rows.append(np.zeros(self.embedder.dim, dtype=np.float32))
+
+        os.makedirs(self.directory, exist_ok=True)
+        for user_id, (entries, rows) in by_user.items():
+            with open(self.path(user_id), 'ab') as f:
+                f.write(self._records(entries, np.stack(rows)).tobytes())
+            written.add(user_id)
+
+    def rebuild(self, user_id: str, chats: Iterable[dict]) -> int:
+        """Replace a user's vectors with embeddings of chats' messages; returns messages indexed"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(user_id)
+        count = 0
+        with open(path + '.tmp', 'wb') as f:
+            entries, texts = [], []
+            for chat in chats:
+                if not _fits(chat['id']):
+                    continue
+                for index, message in enumerate(chat.get('messages') or []):
+                    text = (message.get('content') or '')[:MAX_TEXT_CHARS]
+                    if text.strip():
+                        entries.append((chat['id'], index))
+                        texts.append(text)
+                if len(texts) >= settings.SEMANTIC_BATCH_SIZE:
+                    f.write(self._records(entries, self.embedder.embed(texts)).tobytes())
+                    count += len(texts)
+                    entries, texts = [], []
+            if texts:
+                f.write(self._records(entries, self.embedder.embed(texts)).tobytes())
+                count += len(texts)
+        os.replace(path + '.tmp', path)
+        with self._lock:
+            self._loaded.pop(user_id, None)
+        return count
+
+    # Reads
+
+    def search(self, user_id: str, query: str, limit: int = 20) -> List[dict]:
+        query_vector = self.embedder.embed([query[:MAX_TEXT_CHARS]])[0]
+        if not query_vector.any():
+            return []
+        with self._lock:
+            vectors = self._catch_up(user_id)
+            if not vectors.size or not vectors.valid.any():
+                return []
+
+            if vectors.size <= settings.SEMANTIC_EXACT_LIMIT:
+                candidates = np.flatnonzero(vectors.valid)
+            else:
+                query_code = self._codes(query_vector[None, :])[0]
+                lanes = (vectors.records['code'] ^ query_code).view('<u2').reshape(-1, 4)
+                distances = POPCOUNT16[lanes].sum(axis=1, dtype=np.uint16)
+                distances[~vectors.valid] = 65
+                shortlist = min(settings.SEMANTIC_CANDIDATES, vectors.size - 1)
+                candidates = np.argpartition(distances, shortlist)[:shortlist]
+                candidates = candidates[vectors.valid[candidates]]
+
+            scores = vectors.records['vector'][candidates] @ query_vector
+            chats = vectors.records['chat'][candidates]
+            messages = vectors.records['message'][candidates]
+
+        results: "OrderedDict[bytes, dict]" = OrderedDict()
+        for position in np.argsort(-scores):
+            if scores[position] <= 0:
+                break  # Unrelated from here on
+            chat = chats[position]
+            if chat not in results:
+                if len(results) == limit:
+                    continue
+                results[chat] = {
+                    'chat_id': chat.decode(),
+                    'title': None,
+                    'score': round(float(scores[position]), 4),
+                    'message_indexes': []
+                }
+            if len(results[chat]['message_indexes']) < 5:
+                results[chat]['message_indexes'].append(int(messages[position]))
+        return list(results.values())
+
+    def _catch_up(self, user_id: str) -> UserVectors:
+        vectors = self._loaded.get(user_id) or UserVectors()
+        self._loaded[user_id] = vectors
+        self._loaded.move_to_end(user_id)
+        while len(self._loaded) > settings.SEARCH_MAX_LOADED_USERS:
+            self._loaded.popitem(last=False)
+
+        try:
+            stat = os.stat(self.path(user_id))
+        except FileNotFoundError:
+            self._loaded[user_id] = UserVectors()
+            return self._loaded[user_id]
+
+        rows = stat.st_size // self.dtype.itemsize  # A trailing partial record is still being written
+        if stat.st_ino != vectors.inode or rows < vectors.size:
+            vectors = self._loaded[user_id] = UserVectors()
+            vectors.inode = stat.st_ino
+        if rows > vectors.size:
+            vectors.extend(np.memmap(self.path(user_id), dtype=self.dtype, mode='r', shape=(rows,)))
+        return vectors
+
+
+def _fits(chat_id: str) -> bool:
+    # numpy would silently truncate a longer id, and its records would then
+    # be reported under (and deleted with) the wrong chat
+    if len(chat_id.encode()) <= CHAT_ID_BYTES:
+        return True
+    print(f"Not indexing chat {chat_id!r} for semantic search: ids are limited to {CHAT_ID_BYTES} bytes")
+    return False
+
+
+semantic_index: Optional[SemanticIndex] = None
+
+
+def get_semantic_index() -> SemanticIndex:
+    # Built on first use so the embedder isn't loaded at import time
+    global semantic_index
+    if semantic_index is None:
+        semantic_index = SemanticIndex()
+    return semantic_index
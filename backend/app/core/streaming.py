@@ -0,0 +1,185 @@
+"""
+Incremental persistence of assistant replies that stream through the backend.
+
+The reply is added to the chat as a placeholder message up front and its
+content is rewritten in coalesced chunks (every N tokens or T ms, capped per
+reply) followed by a final commit. Readers of the chat see the partial text
+with status "streaming", and a reply survives the browser tab going away.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.summary import message_preview
+
+# Strong references to replies that outlive their HTTP request
+_background_tasks = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    """Run coro to completion even if the client that started it disconnects"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class ReplyWriter:
+    """Writes one streamed assistant reply into a chat's message list"""
+
+    def __init__(
+        self,
+        table,
+        chat_id: str,
+        message: dict,
+        every_tokens: Optional[int] = None,
+        interval_ms: Optional[int] = None,
+        max_writes: Optional[int] = None
+    ):
+        self.table = table
+        self.chat_id = chat_id
+        self.message = message
+        self.every_tokens = every_tokens or settings.STREAM_PERSIST_EVERY_TOKENS
+        self.interval = (interval_ms or settings.STREAM_PERSIST_INTERVAL_MS) / 1000
+        self.max_writes = settings.STREAM_PERSIST_MAX_WRITES if max_writes is None else max_writes
+        self.index: Optional[int] = None
+        self.writes = 0
+        self.tokens = 0
+        self._parts = []
+        self._pending_tokens = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def content(self) -> str:
+        return ''.join(self._parts)
+
+    async def start(self, message_count: int):
+        """Append the placeholder message; message_count is the list length we last read"""
+        for _ in range(3):
+            try:
+                await run_in_threadpool(self._append_placeholder, message_count)
+                self.index = message_count
+                return
+            except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+                # Someone appended in between; re-read the length and retry
+                response = await run_in_threadpool(
+                    self.table.get_item,
+                    Key={'id': self.chat_id},
+                    ProjectionExpression='messages'
+                )
+                message_count = len(response.get('Item', {}).get('messages', []))
+        raise RuntimeError("Chat kept changing while starting the reply")
+
+    async def append(self, delta: str):
+        self._parts.append(delta)
+        self.tokens += 1
+        self._pending_tokens += 1
+
+        if self.writes >= self.max_writes:
+            return  # Budget spent; the rest goes out with the final commit
+        if (self._pending_tokens >= self.every_tokens
+                or time.monotonic() - self._last_flush >= self.interval):
+            await self._flush()
+
+    async def finish(self, status: str = 'complete', error: Optional[str] = None):
+        """Final commit of the full content; also bumps the chat's updated_at"""
+        # The preview assumes the reply is still the chat's last message; a
+        # message sent meanwhile is older than the reply's completion anyway
+        update_expr = (
+            'SET messages[{index}].content = :content, '
+            'messages[{index}].#status = :status, updated_at = :updated_at, last_message = :last_message'
+        )
+        expr_values = {
+            ':content': self.content,
+            ':status': status,
+            ':updated_at': datetime.utcnow().isoformat(),
+            ':last_message': message_preview({**self.message, 'content': self.content, 'status': status}),
+            ':one': 1
+        }
+        if error:
+            update_expr += ', messages[{index}].#error = :error'
+            expr_values[':error'] = error
+        update_expr += ' ADD revision :one'
+
+        await self._update(
+            update_expr,
+            expr_values,
+            ExpressionAttributeNames={'#status': 'status', **({'#error': 'error'} if error else {})}
+        )
+
+    async def _flush(self):
+        # Only the reply's content is rewritten; updated_at (the GSI sort key)
+        # is left alone so partial writes don't churn the index, and so is the
+        # summary's preview. The revision still moves so pollers' ETags see
+        # the new text.
+        await self._update(
+            'SET messages[{index}].content = :content ADD revision :one',
+            {':content': self.content, ':one': 1}
+        )
+        self._pending_tokens = 0
+        self._last_flush = time.monotonic()
+
+    async def _update(self, update_expr: str, values: dict, **kwargs):
+        """Update the reply's message; {index} in update_expr is its position.
+
+        The write only lands while the placeholder is still at self.index. If
+        it isn't, the placeholder is looked up again by its stream_id and the
+        write retried there; a reply that is gone from the chat is an error.
+        """
+        for _ in range(3):
+            try:
+                await run_in_threadpool(
+                    self.table.update_item,
+                    Key={'id': self.chat_id},
+                    UpdateExpression=update_expr.format(index=self.index),
+                    ConditionExpression=f'messages[{self.index}].stream_id = :stream_id',
+                    ExpressionAttributeValues={**values, ':stream_id': self.message['stream_id']},
+                    **kwargs
+                )
+                self.writes += 1
+                return
+            except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+                response = await run_in_threadpool(
+                    self.table.get_item,
+                    Key={'id': self.chat_id},
+                    ProjectionExpression='messages'
+                )
+                messages = response.get('Item', {}).get('messages', [])
+                index = next(
+                    (i for i, m in enumerate(messages) if m.get('stream_id') == self.message['stream_id']),
+                    None
+                )
+                if index is None:
+                    raise RuntimeError("Reply is no longer in the chat")
+                self.index = index
+        raise RuntimeError("Chat kept changing while writing the reply")
+
+    def _append_placeholder(self, message_count: int):
+        if message_count:
+            condition = 'size(messages) = :count'
+        else:
+            condition = 'attribute_not_exists(messages) OR size(messages) = :count'
+
+        self.table.update_item(
+            Key={'id': self.chat_id},
+            UpdateExpression=(
+                'SET messages = list_append(if_not_exists(messages, :empty), :message), '
+                'updated_at = :updated_at, message_count = :new_count, last_message = :last_message '
+                'ADD revision :one'
+            ),
+            ConditionExpression=condition,
+            ExpressionAttributeValues={
+                ':empty': [],
+                ':message': [self.message],
+                ':count': message_count,
+                ':new_count': message_count + 1,
+                ':last_message': message_preview(self.message),
+                ':updated_at': datetime.utcnow().isoformat(),
+                ':one': 1
+            }
+        )
+        self.writes += 1
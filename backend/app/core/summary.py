@@ -0,0 +1,49 @@
+"""
+Denormalized chat summaries for the sidebar.
+
+Every write that changes a chat's messages also sets message_count and
+last_message (role, sender, time and the first CHAT_PREVIEW_CHARS characters
+of its content) in the same update. user-summary-index projects only these
+and the other list attributes (CHAT_SUMMARY_ATTRIBUTES), so listings read
+from it are billed by the size of the summary rather than of the history.
+
+Partial writes of a streaming reply leave the summary alone, like they leave
+updated_at: the placeholder shows as the last message until the final commit.
+"""
+from datetime import datetime
+from typing import List, Tuple
+
+from app.core.config import settings
+
+
+def message_preview(message: dict) -> dict:
+    """What the sidebar shows of a message"""
+    timestamp = message.get('timestamp')
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    preview = {
+        'role': message.get('role'),
+        'content': ' '.join((message.get('content') or '').split())[:settings.CHAT_PREVIEW_CHARS],
+        'timestamp': timestamp
+    }
+    for name in ('sender_id', 'status'):
+        if message.get(name):
+            preview[name] = message[name]
+    return preview
+
+
+def chat_summary(messages: List[dict]) -> dict:
+    """Summary attributes of a chat holding messages"""
+    return {
+        'message_count': len(messages),
+        'last_message': message_preview(messages[-1]) if messages else None
+    }
+
+
+def summary_update(messages: List[dict]) -> Tuple[str, dict]:
+    """SET clauses and values that store the summary of messages"""
+    summary = chat_summary(messages)
+    return (
+        'message_count = :message_count, last_message = :last_message',
+        {':message_count': summary['message_count'], ':last_message': summary['last_message']}
+    )
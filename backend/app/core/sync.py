@@ -0,0 +1,165 @@
+"""
+Delta sync of the chat list.
+
+GET /chats/sync/ finds created and updated chats through user-id-index (or
+user-summary-index when messages aren't wanted), whose sort key is
+updated_at. Chats that leave the table (deleted or archived) can't be found
+that way, so each one leaves a tombstone in CHAT_TOMBSTONES_TABLE, keyed
+by user and "<time>#<chat id>". Writes that change chats without moving
+their updated_at forward (an import keeps the original timestamps) leave a
+reset marker instead, which tells syncing clients to refetch their list in
+full.
+
+Records expire through DynamoDB TTL after SYNC_TOMBSTONE_TTL_DAYS; a client
+whose cursor is older than that is reset too.
+
+The signed cursor (app/core/cursor.py) holds the position within a sync and,
+on its last page, where the next sync starts: SYNC_OVERLAP_SECONDS before
+this one did, so writes stamped before it started but committed after they
+were read past still get picked up. A chat may be sent twice; clients apply
+changes by id.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.database import CHAT_LIST_PROJECTION, get_dynamodb
+from app.core.dynamo import decode_item, encode_values
+
+RESET_MARKER = '*'  # Sorts before any chat id after the same timestamp
+
+
+def _expires_at() -> int:
+    return int(time.time() + settings.SYNC_TOMBSTONE_TTL_DAYS * 86400)
+
+
+def record_deletions(user_id: str, chat_ids: Iterable[str]):
+    """Leave tombstones for chats removed from a user's list"""
+    deleted_at = datetime.utcnow().isoformat()
+    expires_at = _expires_at()
+    table = get_dynamodb().get_table(settings.CHAT_TOMBSTONES_TABLE)
+    try:
+        with table.batch_writer() as batch:
+            for chat_id in chat_ids:
+                batch.put_item(Item={
+                    'user_id': user_id,
+                    'change_key': f"{deleted_at}#{chat_id}",
+                    'chat_id': chat_id,
+                    'expires_at': expires_at
+                })
+    except Exception as e:
+        # The chats are gone either way; without tombstones clients only keep stale entries
+        print(f"Error recording deleted chats for user {user_id}: {e}")
+
+
+def record_reset(user_id: str):
+    """Make the user's next delta sync start over with a full listing"""
+    table = get_dynamodb().get_table(settings.CHAT_TOMBSTONES_TABLE)
+    try:
+        table.put_item(Item={
+            'user_id': user_id,
+            'change_key': f"{datetime.utcnow().isoformat()}#{RESET_MARKER}",
+            'expires_at': _expires_at()
+        })
+    except Exception as e:
+        print(f"Error recording sync reset for user {user_id}: {e}")
+
+
+def is_expired(since: str) -> bool:
+    """Whether tombstones written after since may already have expired"""
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)
+    return datetime.fromisoformat(since) < datetime.utcnow() - retention
+
+
+def changes_since(user_id: str, since: str) -> Tuple[List[str], bool]:
+    """Chat ids removed after since, and whether a reset was recorded meanwhile"""
+    table = get_dynamodb().get_table(settings.CHAT_TOMBSTONES_TABLE)
+    query_kwargs = {
+        'KeyConditionExpression': Key('user_id').eq(user_id) & Key('change_key').gt(since),
+        'ProjectionExpression': 'chat_id'
+    }
+
+    deleted = []
+    reset = False
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            chat_id: Optional[str] = item.get('chat_id')
+            if chat_id is None:
+                reset = True
+            else:
+                deleted.append(chat_id)
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return list(dict.fromkeys(deleted)), reset
+
+
+def sync_page(user_id: str, cursor: Optional[str], limit: int, include_messages: bool = False) -> dict:
+    """One page of changes (ChatSyncPage); raises ValueError for a bad cursor"""
+    position = {}
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get('user') != user_id:
+            raise ValueError("Cursor does not match this user")
+
+    since = position.get('since')
+    started = position.get('started') or datetime.utcnow().isoformat()
+    reset = position.get('reset', since is None)
+    deleted = []
+
+    # Deletions are read once per sync, on its first page
+    if since and 'key' not in position:
+        if is_expired(since):
+            reset = True
+        else:
+            deleted, reset = changes_since(user_id, since)
+        if reset:
+            since, deleted = None, []
+
+    key_condition = 'user_id = :user_id'
+    values = {':user_id': user_id}
+    if since:
+        key_condition += ' AND updated_at > :since'
+        values[':since'] = since
+
+    # Oldest change first: a chat updated while we page moves ahead of the
+    # position and is read again later instead of being skipped
+    query_params = {
+        'TableName': settings.CHATS_TABLE,
+        'IndexName': 'user-id-index' if include_messages else 'user-summary-index',
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': encode_values(values),
+        'ScanIndexForward': True,
+        'Limit': limit
+    }
+    if not include_messages:
+        query_params['ProjectionExpression'] = CHAT_LIST_PROJECTION
+    if 'key' in position:
+        query_params['ExclusiveStartKey'] = position['key']
+
+    response = get_dynamodb().get_client().query(**query_params)
+    chats = [decode_item(item) for item in response.get('Items', [])]
+    if not include_messages:
+        for chat in chats:
+            chat['messages'] = []
+
+    last_key = response.get('LastEvaluatedKey')
+    if last_key:
+        next_position = {'user': user_id, 'since': since, 'started': started, 'reset': reset, 'key': last_key}
+    else:
+        watermark = datetime.fromisoformat(started) - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        next_position = {'user': user_id, 'since': watermark.isoformat()}
+
+    return {
+        'chats': chats,
+        'deleted': deleted,
+        'reset': reset,
+        'cursor': encode_cursor(next_position),
+        'has_more': last_key is not None
+    }
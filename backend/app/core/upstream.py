@@ -0,0 +1,159 @@
+"""
+Outbound HTTP calls to model providers.
+
+Speaks the two wire formats the app uses, OpenAI chat completions and
+Anthropic messages, over one pooled async client.
+"""
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+OPENAI_ENDPOINT = 'https://api.openai.com/v1/chat/completions'
+ANTHROPIC_ENDPOINT = 'https://api.anthropic.com/v1/messages'
+ANTHROPIC_VERSION = '2023-06-01'
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class UpstreamError(Exception):
+    """Model provider answered with a non-200 status"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Model API error: {status_code}")
+        self.status_code = status_code
+        self.text = text
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client so calls reuse pooled keep-alive connections"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.UPSTREAM_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UPSTREAM_MAX_CONNECTIONS
+            )
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def resolve_endpoint(model: dict) -> Optional[str]:
+    """Endpoint for a model, None if a custom model has none configured"""
+    if model.get('integration_type') == 'easy':
+        provider = (model.get('provider') or '').lower()
+        if provider == 'openai':
+            return OPENAI_ENDPOINT
+        if provider == 'anthropic':
+            return ANTHROPIC_ENDPOINT
+        return model.get('endpoint') or OPENAI_ENDPOINT
+    return model.get('endpoint')
+
+
+def wire_format(model: dict, endpoint: str) -> str:
+    if (model.get('provider') or '').lower() == 'anthropic' or endpoint.rstrip('/').endswith('/v1/messages'):
+        return 'anthropic'
+    return 'openai'
+
+
+def build_headers(model: dict, fmt: str = 'openai') -> Dict[str, str]:
+    headers = {'Content-Type': 'application/json'}
+
+    if model.get('api_key'):
+        if fmt == 'anthropic':
+            headers['x-api-key'] = model['api_key']
+            headers['anthropic-version'] = ANTHROPIC_VERSION
+        else:
+            headers['Authorization'] = f"Bearer {model['api_key']}"
+
+    for header in model.get('headers') or []:
+        headers[header['key']] = header['value']
+
+    return headers
+
+
+def build_payload(model: dict, messages: List[dict], max_tokens: int, fmt: str, stream: bool) -> dict:
+    if fmt == 'anthropic':
+        system = '\n\n'.join(m['content'] for m in messages if m['role'] == 'system')
+        payload = {
+            'model': model['name'],
+            'messages': [m for m in messages if m['role'] != 'system'],
+            'max_tokens': max_tokens,
+            'stream': stream
+        }
+        if system:
+            payload['system'] = system
+        return payload
+
+    payload = {
+        'model': model['name'],
+        'messages': messages,
+        'max_tokens': max_tokens,
+        'stream': stream
+    }
+    if stream:
+        payload['stream_options'] = {'include_usage': True}
+    return payload
+
+
+async def stream_chat(model: dict, messages: List[dict], max_tokens: int = 1000) -> AsyncIterator[dict]:
+    """Stream a chat completion.
+
+    Yields {'delta': text} for each content chunk and, when the provider
+    reports it, a final {'usage': {'prompt_tokens': n, 'completion_tokens': n}}.
+    """
+    endpoint = resolve_endpoint(model)
+    if not endpoint:
+        raise ValueError("Model endpoint not configured")
+    fmt = wire_format(model, endpoint)
+
+    async with get_http_client().stream(
+        'POST',
+        endpoint,
+        headers=build_headers(model, fmt),
+        json=build_payload(model, messages, max_tokens, fmt, stream=True)
+    ) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise UpstreamError(response.status_code, body.decode(errors='replace')[:200])
+
+        usage = {}
+        async for line in response.aiter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[5:].strip()
+            if not data or data == '[DONE]':
+                continue
+            event = json.loads(data)
+
+            if fmt == 'anthropic':
+                kind = event.get('type')
+                if kind == 'content_block_delta':
+                    text = event.get('delta', {}).get('text')
+                    if text:
+                        yield {'delta': text}
+                elif kind == 'message_start':
+                    usage['prompt_tokens'] = event['message'].get('usage', {}).get('input_tokens', 0)
+                elif kind == 'message_delta':
+                    usage['completion_tokens'] = event.get('usage', {}).get('output_tokens', 0)
+            else:
+                for choice in event.get('choices') or []:
+                    text = (choice.get('delta') or {}).get('content')
+                    if text:
+                        yield {'delta': text}
+                if event.get('usage'):
+                    usage['prompt_tokens'] = event['usage'].get('prompt_tokens', 0)
+                    usage['completion_tokens'] = event['usage'].get('completion_tokens', 0)
+
+        if usage:
+            yield {'usage': usage}
@@ -0,0 +1,151 @@
+"""
+Token usage accounting for replies that stream through the backend.
+
+Prompt and completion tokens are added up in memory per user and flushed
+periodically as one atomic ADD per user, so accounting costs no DynamoDB
+writes per token or per request. Counts roll over to zero when a flush is
+the first of a new month, matching the reset in users.track_token_usage.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+
+from botocore.exceptions import ClientError
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 chars per token), same estimate as the context limit check"""
+    return len(text) // 4 + 10
+
+
+def month_key(when: Optional[datetime] = None) -> str:
+    return (when or datetime.utcnow()).strftime('%Y-%m')
+
+
+def tokens_this_month(user) -> int:
+    """Stored monthly usage, treating a counter from an earlier month as zero"""
+    reset_date = getattr(user, 'token_usage_reset_date', None)
+    if not reset_date or month_key(reset_date) != month_key():
+        return 0
+    return int(getattr(user, 'tokens_used_this_month', 0) or 0)
+
+
+class UsageTracker:
+    """In-memory per-user token counters with batched commits"""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval or settings.USAGE_FLUSH_INTERVAL
+        self._pending: Dict[str, int] = {}
+        self._inflight: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: str, prompt_tokens: int, completion_tokens: int):
+        tokens = int(prompt_tokens) + int(completion_tokens)
+        if tokens > 0:
+            self._pending[user_id] = self._pending.get(user_id, 0) + tokens
+
+    def pending(self, user_id: str) -> int:
+        """Tokens recorded for a user that are not in the table yet"""
+        return self._pending.get(user_id, 0) + self._inflight.get(user_id, 0)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._inflight = batch
+        try:
+            failed = await run_in_threadpool(self._commit, batch)
+        finally:
+            self._inflight = {}
+        # Carry anything that didn't make it into the next flush
+        for user_id, tokens in failed.items():
+            self._pending[user_id] = self._pending.get(user_id, 0) + tokens
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Token usage flush failed: {e}")
+
+    def _commit(self, batch: Dict[str, int]) -> Dict[str, int]:
+        table = get_dynamodb().get_table(settings.USERS_TABLE)
+        month = month_key()
+        failed = {}
+
+        for user_id, tokens in batch.items():
+            try:
+                self._add(table, user_id, tokens, month)
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    continue  # User no longer exists
+                print(f"Error committing token usage for {user_id}: {e}")
+                failed[user_id] = tokens
+
+        return failed
+
+    def _add(self, table, user_id: str, tokens: int, month: str):
+        try:
+            # Common case: counter already belongs to this month
+            table.update_item(
+                Key={'id': user_id},
+                UpdateExpression='ADD tokens_used_this_month :tokens',
+                ConditionExpression='attribute_exists(id) AND begins_with(token_usage_reset_date, :month)',
+                ExpressionAttributeValues={':tokens': tokens, ':month': month}
+            )
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+        try:
+            # First usage this month: start the counter over
+            table.update_item(
+                Key={'id': user_id},
+                UpdateExpression='SET tokens_used_this_month = :tokens, token_usage_reset_date = :now',
+                ConditionExpression=(
+                    'attribute_exists(id) AND (attribute_not_exists(token_usage_reset_date) '
+                    'OR NOT begins_with(token_usage_reset_date, :month))'
+                ),
+                ExpressionAttributeValues={
+                    ':tokens': tokens,
+                    ':now': datetime.utcnow().isoformat(),
+                    ':month': month
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # Either the user is gone or another worker reset the month first
+            table.update_item(
+                Key={'id': user_id},
+                UpdateExpression='ADD tokens_used_this_month :tokens',
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeValues={':tokens': tokens}
+            )
+
+
+usage_tracker = UsageTracker()
+
+
+def get_usage_tracker():
+    return usage_tracker
@@ -3,7 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
 from app.core.database import init_dynamodb, close_dynamodb
+from app.core.upstream import close_http_client
+from app.core.semantic import get_semantic_index
+from app.core.usage import get_usage_tracker
 from app.api.v1.api import api_router
 
 @asynccontextmanager
@@ -12,8 +16,13 @@ async def lifespan(app: FastAPI):
     print(f"AWS Profile: '{settings.AWS_PROFILE}'")
     print(f"AWS Region: {settings.AWS_REGION}")
     await init_dynamodb()
+    get_usage_tracker().start()
+    get_semantic_index().start()
     yield
     # Shutdown
+    await get_usage_tracker().stop()
+    await get_semantic_index().stop()
+    await close_http_client()
     await close_dynamodb()
 
 app = FastAPI(
@@ -37,6 +46,9 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Compression (outermost, so it sees the final headers)
+app.add_middleware(CompressionMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
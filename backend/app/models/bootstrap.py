@@ -0,0 +1,13 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel
+
+from app.models.chat import ChatSyncPage
+from app.models.model import Model
+from app.models.user import User
+
+class Bootstrap(BaseModel):
+    user: User
+    chats: ChatSyncPage  # First delta sync page; follow has_more with /chats/sync/
+    models: List[Model]
+    limits: Dict[str, Any]  # Same as /roles/current/limits
+    permissions: Dict[str, bool]  # Same as /roles/current/permissions
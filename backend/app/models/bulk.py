@@ -0,0 +1,24 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class BulkItemResult(BaseModel):
+    id: str
+    success: bool
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+    job_id: Optional[str] = None  # Background follow-up work, see GET /users/jobs/{id}/
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, completed or failed
+    progress: Dict[str, int] = {}
+    details: Dict[str, Any] = {}
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+    finished_at: Optional[str] = None
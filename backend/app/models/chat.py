@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -7,6 +7,16 @@ class Message(BaseModel):
     content: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     sender_id: Optional[str] = None  # ID of user who sent the message
+    status: Optional[str] = None  # "streaming" while an AI reply is being generated, "error" if it failed
+    error: Optional[str] = None  # Why a reply failed (status "error")
+    stream_id: Optional[str] = None  # Identifies an AI reply across polls while it streams
+
+class MessagePreview(BaseModel):
+    role: Optional[str] = None
+    content: str = ""  # First CHAT_PREVIEW_CHARS characters, whitespace collapsed
+    timestamp: Optional[datetime] = None
+    sender_id: Optional[str] = None
+    status: Optional[str] = None
 
 class ChatBase(BaseModel):
     title: str = "New Chat"
@@ -27,6 +37,11 @@ class ChatInDB(ChatBase):
     id: str
     user_id: str
     messages: List[Message] = []
+    participant_deleted: bool = False  # The other user's account was deleted
+    message_count: Optional[int] = None  # Summary kept with every message write (None: not summarized yet)
+    last_message: Optional[MessagePreview] = None
+    unread_count: int = 0  # Direct chats: messages from the other side since last_read_at
+    last_read_at: Optional[datetime] = None
     shared: bool = False
     shared_with: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -38,6 +53,52 @@ class ChatInDB(ChatBase):
 class Chat(ChatInDB):
     pass
 
+class ChatSyncPage(BaseModel):
+    chats: List[Chat]  # Created or updated since the cursor
+    deleted: List[str] = []  # Ids of chats removed since the cursor
+    reset: bool = False  # chats is the full list: replace local state instead of merging
+    cursor: str  # Pass back as ?cursor= (next page, or the next sync)
+    has_more: bool = False
+
+class ChatPage(BaseModel):
+    chats: List[Chat]  # Summaries, pinned first; messages are left out
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
+    has_more: bool = False
+
+class ChatReadState(BaseModel):
+    chat_id: str
+    unread_count: int = 0
+    last_read_at: Optional[datetime] = None
+
 class MessageCreate(BaseModel):
     role: str
     content: str
+
+class CompletionRequest(BaseModel):
+    model_id: str
+    max_tokens: int = 1000
+    data_generation: bool = False  # Bulk generation, queued behind interactive chats
+
+class BulkChatAction(BaseModel):
+    action: Literal['delete', 'archive'] = 'delete'
+    chat_ids: Optional[List[str]] = Field(None, min_length=1, max_length=1000)
+    # Filters, used instead of chat_ids
+    older_than: Optional[datetime] = None  # Last updated before this
+    unpinned_only: bool = False
+
+class ChatImport(BaseModel):
+    """One line of an import file; the export format is accepted as is"""
+    id: Optional[str] = None  # Source id, makes re-importing the same chat idempotent
+    title: str = "Imported Chat"
+    model_id: Optional[str] = None
+    pinned: bool = False
+    messages: List[Message] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class SearchHit(BaseModel):
+    chat_id: str
+    title: Optional[str] = None
+    score: float
+    message_indexes: List[int] = []  # Best matching messages first
+    updated_at: Optional[datetime] = None
@@ -24,6 +24,7 @@ class ModelBase(BaseModel):
     streaming: bool = False
     tool_calling: Optional[Dict] = {}
     modalities: Optional[List[str]] = []
+    max_concurrency: Optional[int] = None  # Concurrent upstream calls, None uses the default
 
 class ModelCreate(ModelBase):
     api_key: Optional[str] = None
@@ -47,6 +48,7 @@ class ModelUpdate(BaseModel):
     streaming: Optional[bool] = None
     tool_calling: Optional[Dict] = None
     modalities: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
 
 class ModelInDB(ModelBase):
     id: str
@@ -78,9 +80,22 @@ class Model(BaseModel):
     streaming: bool = False
     tool_calling: Optional[Dict] = {}
     modalities: Optional[List[str]] = []
+    max_concurrency: Optional[int] = None
     created_by: str
     created_at: datetime
     updated_at: datetime
 
     class Config:
         populate_by_name = True
+
+class CompletionMessage(BaseModel):
+    role: str
+    content: str
+
+class ModelCompletionRequest(BaseModel):
+    """A one-off completion that isn't stored in any chat (titles, @mentions)"""
+    messages: List[CompletionMessage] = Field(..., min_length=1)
+    max_tokens: int = Field(1000, ge=1, le=4000)
+
+class ModelCompletion(BaseModel):
+    content: str
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 
@@ -30,3 +30,19 @@ class User(UserBase):
     status: str
     created_at: datetime
     updated_at: datetime
+    tokens_used_this_month: int = 0
+    token_usage_reset_date: Optional[datetime] = None
+
+class UserPage(BaseModel):
+    users: List[User]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
+
+class BulkUserIds(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+class BulkRoleUpdate(BulkUserIds):
+    role: str
+    custom_role_id: Optional[str] = Field(None, alias='customRoleId')
+
+    class Config:
+        populate_by_name = True
@@ -0,0 +1,78 @@
+"""
+Benchmark for chat response serialization
+Compares FastAPI's default path for a response_model (build Chat(**item),
+then FastAPI validates and serializes it again and json.dumps the result)
+with app.core.responses.render (validate once, encode with pydantic-core).
+Usage: python benchmark_serialization.py [chats] [messages_per_chat]
+"""
+import sys
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import List
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import render
+from app.models.chat import Chat
+
+# Configuration
+ROUNDS = 20
+
+def make_chats(count, messages):
+    """Chat items shaped like decimal_to_float output from the chats table"""
+    now = datetime.utcnow().isoformat()
+    text = "Here is a longer assistant answer with some code and explanation. " * 8
+    return [{
+        'id': str(uuid.uuid4()),
+        'user_id': str(uuid.uuid4()),
+        'title': f"Chat {i}",
+        'model_id': 'model-1',
+        'pinned': i % 7 == 0,
+        'chat_type': 'ai',
+        'messages': [
+            {'role': 'user' if m % 2 == 0 else 'assistant', 'content': text, 'timestamp': now}
+            for m in range(messages)
+        ],
+        'shared': False,
+        'shared_with': [],
+        'created_at': now,
+        'updated_at': now
+    } for i in range(count)]
+
+async def default_path(field, items):
+    content = await serialize_response(field=field, response_content=[Chat(**item) for item in items])
+    return JSONResponse(content).body
+
+def fast_path(items):
+    return render(List[Chat], items)
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = fn()
+    return (time.perf_counter() - start) / rounds * 1000, len(body)
+
+def run_benchmark(count=50, messages=40):
+    import asyncio
+    items = make_chats(count, messages)
+    field = create_model_field(name='Response', type_=List[Chat], mode='serialization')
+    loop = asyncio.new_event_loop()
+
+    print(f"Serializing {count} chats x {messages} messages, {ROUNDS} rounds")
+    print("=" * 60)
+    fast_path(items)  # Build the adapter outside the timing
+    default_ms, default_size = timed(lambda: loop.run_until_complete(default_path(field, items)), ROUNDS)
+    fast_ms, fast_size = timed(lambda: fast_path(items), ROUNDS)
+
+    print(f"response_model path: {default_ms:8.2f} ms  ({default_size} bytes)")
+    print(f"model_response path: {fast_ms:8.2f} ms  ({fast_size} bytes)")
+    print(f"Speedup: {default_ms / fast_ms:.1f}x")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run_benchmark(*args)
@@ -16,7 +16,9 @@ TABLES = {
         'AttributeDefinitions': [
             {'AttributeName': 'id', 'AttributeType': 'S'},
             {'AttributeName': 'email', 'AttributeType': 'S'},
-            {'AttributeName': 'status', 'AttributeType': 'S'}
+            {'AttributeName': 'status', 'AttributeType': 'S'},
+            {'AttributeName': 'created_at', 'AttributeType': 'S'},
+            {'AttributeName': 'name', 'AttributeType': 'S'}
         ],
         'GlobalSecondaryIndexes': [
             {
@@ -32,6 +34,30 @@ TABLES = {
                     {'AttributeName': 'status', 'KeyType': 'HASH'}
                 ],
                 'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'status-created-index',
+                'KeySchema': [
+                    {'AttributeName': 'status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['email', 'name', 'bio', 'role', 'custom_role', 'updated_at',
+                                         'tokens_used_this_month', 'token_usage_reset_date']
+                }
+            },
+            {
+                'IndexName': 'status-name-index',
+                'KeySchema': [
+                    {'AttributeName': 'status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'name', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['email', 'created_at', 'bio', 'role', 'custom_role', 'updated_at',
+                                         'tokens_used_this_month', 'token_usage_reset_date']
+                }
             }
         ]
     },
@@ -52,6 +78,73 @@ TABLES = {
         ]
     },
     'chat_app_chats': {
+        'KeySchema': [
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'updated_at', 'AttributeType': 'S'},
+            {'AttributeName': 'pinned_user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'unpinned_user_id', 'AttributeType': 'S'}
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'user-id-index',
+                'KeySchema': [
+                    {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                # The sidebar's listing: summaries only, no message history
+                'IndexName': 'user-summary-index',
+                'KeySchema': [
+                    {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['title', 'model_id', 'chat_type', 'participant_id', 'conversation_id',
+                                         'participant_deleted', 'pinned', 'created_at', 'revision',
+                                         'message_count', 'last_message', 'unread_count', 'last_read_at']
+                }
+            },
+            {
+                # Sparse: only pinned chats carry pinned_user_id (GET /api/chats/paginated/)
+                'IndexName': 'user-pinned-index',
+                'KeySchema': [
+                    {'AttributeName': 'pinned_user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['user_id', 'title', 'model_id', 'chat_type', 'participant_id',
+                                         'conversation_id', 'participant_deleted', 'pinned', 'created_at',
+                                         'revision', 'message_count', 'last_message', 'unread_count',
+                                         'last_read_at']
+                }
+            },
+            {
+                # Sparse: only unpinned chats carry unpinned_user_id
+                'IndexName': 'user-unpinned-index',
+                'KeySchema': [
+                    {'AttributeName': 'unpinned_user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {
+                    'ProjectionType': 'INCLUDE',
+                    'NonKeyAttributes': ['user_id', 'title', 'model_id', 'chat_type', 'participant_id',
+                                         'conversation_id', 'participant_deleted', 'pinned', 'created_at',
+                                         'revision', 'message_count', 'last_message', 'unread_count',
+                                         'last_read_at']
+                }
+            }
+        ]
+    },
+    # Chats moved out of the sidebar by POST /api/chats/bulk/ with action=archive
+    'chat_app_chats_archive': {
         'KeySchema': [
             {'AttributeName': 'id', 'KeyType': 'HASH'}
         ],
@@ -70,6 +163,18 @@ TABLES = {
                 'Projection': {'ProjectionType': 'ALL'}
             }
         ]
+    },
+    # Deleted/archived chats for GET /api/chats/sync/, expired by TTL
+    'chat_app_chat_tombstones': {
+        'KeySchema': [
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'change_key', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'change_key', 'AttributeType': 'S'}
+        ],
+        'TimeToLiveAttribute': 'expires_at'
     }
 }
 
@@ -125,6 +230,14 @@ def create_tables():
             print(f"  ARN: {response['TableDescription']['TableArn']}")
             created_tables.append(table_name)
             
+            if 'TimeToLiveAttribute' in config:
+                dynamodb.get_waiter('table_exists').wait(TableName=table_name)
+                dynamodb.update_time_to_live(
+                    TableName=table_name,
+                    TimeToLiveSpecification={'Enabled': True, 'AttributeName': config['TimeToLiveAttribute']}
+                )
+                print(f"  TTL: {config['TimeToLiveAttribute']}")
+            
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceInUseException':
                 print(f"⚠ Table '{table_name}' already exists")
@@ -0,0 +1,53 @@
+"""
+Migration script to give existing chats their pagination index attribute
+Sets pinned_user_id or unpinned_user_id (see app/core/chat_pages.py) on
+every chat that has neither, so it shows up in GET /api/chats/paginated/.
+A chat pinned or unpinned while this runs keeps what that write set.
+Safe to run more than once.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.database import get_dynamodb
+from app.core.config import settings
+from app.core.chat_pages import list_key
+
+def migrate_chat_list_keys():
+    """Add the sparse index attribute to chats that have none"""
+    db = get_dynamodb()
+    table = db.get_table(settings.CHATS_TABLE)
+    conditional_failed = table.meta.client.exceptions.ConditionalCheckFailedException
+
+    updated = skipped = 0
+    scan_kwargs = {'ProjectionExpression': 'id, user_id, pinned, pinned_user_id, unpinned_user_id'}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for chat in response.get('Items', []):
+            if 'pinned_user_id' in chat or 'unpinned_user_id' in chat:
+                skipped += 1
+                continue
+
+            [(attribute, user_id)] = list_key(chat['user_id'], chat.get('pinned', False)).items()
+            try:
+                table.update_item(
+                    Key={'id': chat['id']},
+                    UpdateExpression=f'SET {attribute} = :user_id',
+                    ConditionExpression=(
+                        'attribute_exists(id) AND attribute_not_exists(pinned_user_id) '
+                        'AND attribute_not_exists(unpinned_user_id)'
+                    ),
+                    ExpressionAttributeValues={':user_id': user_id}
+                )
+                updated += 1
+            except conditional_failed:
+                skipped += 1  # Deleted, or pinned/unpinned since the scan
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"✓ Updated {updated} chats ({skipped} skipped)")
+    print("\nMigration completed!")
+
+if __name__ == "__main__":
+    migrate_chat_list_keys()
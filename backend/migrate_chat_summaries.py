@@ -0,0 +1,50 @@
+"""
+Migration script to fill in chat summaries (message_count, last_message)
+Chats written before summaries existed show no preview in the sidebar until
+this has run. Chats that already have a summary are skipped, and a chat
+that gets one from a live write while this runs keeps it.
+Safe to run more than once.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.database import get_dynamodb
+from app.core.config import settings
+from app.core.summary import summary_update
+
+def migrate_chat_summaries():
+    """Store the summary of every chat that has none"""
+    db = get_dynamodb()
+    table = db.get_table(settings.CHATS_TABLE)
+    conditional_failed = table.meta.client.exceptions.ConditionalCheckFailedException
+
+    updated = skipped = 0
+    scan_kwargs = {'ProjectionExpression': 'id, messages, message_count'}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for chat in response.get('Items', []):
+            if 'message_count' in chat:
+                skipped += 1
+                continue
+
+            expression, values = summary_update(chat.get('messages') or [])
+            try:
+                table.update_item(
+                    Key={'id': chat['id']},
+                    UpdateExpression=f'SET {expression}',
+                    ConditionExpression='attribute_exists(id) AND attribute_not_exists(message_count)',
+                    ExpressionAttributeValues=values
+                )
+                updated += 1
+            except conditional_failed:
+                skipped += 1  # Deleted, or summarized by a write since the scan
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"✓ Summarized {updated} chats ({skipped} skipped)")
+    print("\nMigration completed!")
+
+if __name__ == "__main__":
+    migrate_chat_summaries()
@@ -0,0 +1,62 @@
+"""
+Migration script to encrypt model credentials stored in plaintext
+Moves api_key and secure header values of every model into an encrypted
+envelope using the configured key provider (SECRETS_KEY_PROVIDER).
+Safe to run more than once; already encrypted models are skipped.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.database import get_dynamodb
+from app.core.config import settings
+from app.core.credentials import seal_model
+
+def migrate_model_secrets():
+    """Encrypt plaintext credentials on existing models"""
+    db = get_dynamodb()
+    table = db.get_table(settings.MODELS_TABLE)
+
+    # Get all models (following scan pagination)
+    models = []
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        models.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"Found {len(models)} models")
+
+    for model in models:
+        name = model.get('display_name') or model.get('name')
+        has_plaintext = model.get('api_key') or any(
+            h.get('secure') and h.get('value') for h in model.get('headers') or []
+        )
+
+        if model.get('secrets') or not has_plaintext:
+            print(f"Model '{name}' has no plaintext credentials, skipping...")
+            continue
+
+        sealed = seal_model({
+            'id': model['id'],
+            'api_key': model.get('api_key'),
+            'headers': model.get('headers') or []
+        })
+
+        table.update_item(
+            Key={'id': model['id']},
+            UpdateExpression='SET secrets = :secrets, headers = :headers REMOVE api_key',
+            ExpressionAttributeValues={
+                ':secrets': sealed['secrets'],
+                ':headers': sealed['headers']
+            }
+        )
+
+        print(f"✓ Encrypted credentials for model: {name}")
+
+    print("\nMigration completed!")
+
+if __name__ == "__main__":
+    migrate_model_secrets()
@@ -0,0 +1,200 @@
+"""
+Local mock LLM upstream for latency and throughput benchmarking
+Speaks the OpenAI chat completions and Anthropic messages wire formats,
+plain and streaming, with configurable time-to-first-token, token rate,
+jitter and error rate. No network access or API keys needed.
+
+Usage: python mock_llm_server.py [--port 9000] [--ttft-ms 300] [--tokens-per-sec 50]
+                                 [--jitter-ms 20] [--error-rate 0.0] [--seed N]
+
+Point a model at it with integration type "custom" and endpoint
+  http://localhost:9000/v1/chat/completions   (OpenAI format)
+  http://localhost:9000/v1/messages           (Anthropic format)
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Defaults (overridable from the command line)
+PORT = 9000
+TTFT_MS = 300  # Time to first token
+TOKENS_PER_SEC = 50
+JITTER_MS = 20  # Random +/- added to every delay
+ERROR_RATE = 0.0  # Fraction of requests answered with a 500 / 529
+
+WORDS = (
+    "the quick brown fox jumps over the lazy dog while a model streams tokens "
+    "back to the chat window one small piece at a time"
+).split()
+
+config = argparse.Namespace(
+    ttft_ms=TTFT_MS, tokens_per_sec=TOKENS_PER_SEC, jitter_ms=JITTER_MS, error_rate=ERROR_RATE
+)
+rng = random.Random()
+app = FastAPI(title="Mock LLM upstream")
+
+
+def delay(base_ms: float) -> float:
+    jitter = rng.uniform(-config.jitter_ms, config.jitter_ms) if config.jitter_ms else 0
+    return max(base_ms + jitter, 0) / 1000
+
+
+def completion_tokens(max_tokens: int):
+    return [rng.choice(WORDS) + " " for _ in range(max(int(max_tokens), 1))]
+
+
+def prompt_tokens(messages) -> int:
+    return sum(len(str(m.get('content', ''))) // 4 + 1 for m in messages)
+
+
+def should_fail() -> bool:
+    return config.error_rate > 0 and rng.random() < config.error_rate
+
+
+async def generate(max_tokens: int):
+    """Yield tokens at the configured pace"""
+    await asyncio.sleep(delay(config.ttft_ms))
+    per_token_ms = 1000 / config.tokens_per_sec if config.tokens_per_sec else 0
+    for i, token in enumerate(completion_tokens(max_tokens)):
+        if i:
+            await asyncio.sleep(delay(per_token_ms))
+        yield token
+
+
+def sse(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat(request: Request):
+    body = await request.json()
+    model = body.get('model', 'mock')
+    max_tokens = body.get('max_tokens', 16)
+    prompt = prompt_tokens(body.get('messages', []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+
+    if should_fail():
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": "Mock upstream error", "type": "server_error"}}
+        )
+
+    if not body.get('stream'):
+        text = ''.join([token async for token in generate(max_tokens)])
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "length"
+            }],
+            "usage": {
+                "prompt_tokens": prompt,
+                "completion_tokens": max_tokens,
+                "total_tokens": prompt + max_tokens
+            }
+        }
+
+    include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+
+    async def stream():
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+        yield sse({**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+        count = 0
+        async for token in generate(max_tokens):
+            count += 1
+            yield sse({**chunk, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+        yield sse({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "length"}]})
+        if include_usage:
+            yield sse({**chunk, "choices": [], "usage": {
+                "prompt_tokens": prompt,
+                "completion_tokens": count,
+                "total_tokens": prompt + count
+            }})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type='text/event-stream')
+
+
+@app.post("/v1/messages")
+async def anthropic_messages(request: Request):
+    body = await request.json()
+    model = body.get('model', 'mock')
+    max_tokens = body.get('max_tokens', 16)
+    prompt = prompt_tokens(body.get('messages', []))
+    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+
+    if should_fail():
+        return JSONResponse(
+            status_code=529,
+            content={"type": "error", "error": {"type": "overloaded_error", "message": "Mock upstream overloaded"}}
+        )
+
+    if not body.get('stream'):
+        text = ''.join([token async for token in generate(max_tokens)])
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "max_tokens",
+            "usage": {"input_tokens": prompt, "output_tokens": max_tokens}
+        }
+
+    def event(kind: str, data: dict) -> str:
+        return f"event: {kind}\ndata: {json.dumps({'type': kind, **data})}\n\n"
+
+    async def stream():
+        yield event("message_start", {"message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model,
+            "content": [], "usage": {"input_tokens": prompt, "output_tokens": 0}
+        }})
+        yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        count = 0
+        async for token in generate(max_tokens):
+            count += 1
+            yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": token}})
+        yield event("content_block_stop", {"index": 0})
+        yield event("message_delta", {"delta": {"stop_reason": "max_tokens"}, "usage": {"output_tokens": count}})
+        yield event("message_stop", {})
+
+    return StreamingResponse(stream(), media_type='text/event-stream')
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", **vars(config)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Anthropic upstream for benchmarking")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--ttft-ms', type=float, default=TTFT_MS, help='time to first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=TOKENS_PER_SEC, help='0 streams as fast as possible')
+    parser.add_argument('--jitter-ms', type=float, default=JITTER_MS, help='random +/- added to each delay')
+    parser.add_argument('--error-rate', type=float, default=ERROR_RATE, help='fraction of requests that fail')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible runs')
+    args = parser.parse_args()
+
+    config.ttft_ms = args.ttft_ms
+    config.tokens_per_sec = args.tokens_per_sec
+    config.jitter_ms = args.jitter_ms
+    config.error_rate = args.error_rate
+    rng.seed(args.seed)
+
+    print(f"Mock LLM upstream on http://{args.host}:{args.port}")
+    print(f"TTFT: {config.ttft_ms}ms, {config.tokens_per_sec} tok/s, jitter: ±{config.jitter_ms}ms, error rate: {config.error_rate}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
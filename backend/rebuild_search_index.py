@@ -0,0 +1,66 @@
+"""
+Script to rebuild the chat search indexes from the chats table
+Rewrites each user's postings log and message vectors under SEARCH_INDEX_DIR
+from their chats (via user-id-index), which also compacts away deleted
+chats and repeated edits. Run it after changing SEMANTIC_EMBEDDER. Running
+workers pick up the new files on their next search.
+Usage: python rebuild_search_index.py [user_id ...]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.database import get_dynamodb
+from app.core.config import settings
+from app.core.search import get_search_index
+from app.core.semantic import get_semantic_index
+
+def iter_user_ids(users_table):
+    """All user ids (following scan pagination)"""
+    scan_kwargs = {'ProjectionExpression': 'id'}
+    while True:
+        response = users_table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            yield item['id']
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def iter_chats(chats_table, user_id):
+    """A user's chats, one page at a time"""
+    query_kwargs = {
+        'IndexName': 'user-id-index',
+        'KeyConditionExpression': 'user_id = :user_id',
+        'ExpressionAttributeValues': {':user_id': user_id},
+        'ProjectionExpression': 'id, title, messages'
+    }
+    while True:
+        response = chats_table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def rebuild_search_index(user_ids=None):
+    """Rebuild the postings logs of the given users (all users by default)"""
+    db = get_dynamodb()
+    chats_table = db.get_table(settings.CHATS_TABLE)
+    search_index = get_search_index()
+    semantic_index = get_semantic_index()
+
+    print(f"Rebuilding search index in: {os.path.abspath(search_index.directory)}")
+    print(f"Embedder: {semantic_index.embedder.name} ({semantic_index.embedder.dim} dimensions)")
+    users = 0
+    chats = 0
+    for user_id in user_ids or iter_user_ids(db.get_table(settings.USERS_TABLE)):
+        # Two passes keep a single page of chats in memory at a time
+        count = search_index.rebuild(user_id, iter_chats(chats_table, user_id))
+        messages = semantic_index.rebuild(user_id, iter_chats(chats_table, user_id))
+        users += 1
+        chats += count
+        print(f"✓ {user_id}: {count} chats, {messages} messages embedded")
+
+    print(f"\nRebuild completed! {chats} chats across {users} users")
+
+if __name__ == "__main__":
+    rebuild_search_index(sys.argv[1:])
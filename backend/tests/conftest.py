@@ -0,0 +1,106 @@
+"""
+Shared fixtures: the app against an in-memory DynamoDB (moto).
+
+Tables are created by init_dynamodb() itself, so tests run against the same
+schema and indexes as a local setup. A non-empty DYNAMODB_ENDPOINT_URL is
+what makes it create them; moto answers the regular AWS endpoint.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.update({
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_REGION': 'us-east-1',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'DYNAMODB_ENDPOINT_URL': 'https://dynamodb.us-east-1.amazonaws.com',
+    'SEARCH_INDEX_DIR': tempfile.mkdtemp(prefix='search-index-'),
+    'SECRETS_KEY_FILE': os.path.join(tempfile.mkdtemp(prefix='secrets-'), 'model_secrets.key')
+})
+os.environ.pop('AWS_PROFILE', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_aws
+
+from app.core.catalog import get_model_catalog
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.core.security import create_access_token
+
+
+@pytest.fixture
+def client():
+    with mock_aws():
+        from app.main import app
+        # The in-process caches would otherwise outlive the last test's tables
+        get_model_catalog().invalidate()
+        get_model_catalog().invalidate_roles()
+        with TestClient(app) as test_client:  # Startup creates the tables
+            yield test_client
+
+
+@pytest.fixture
+def add_user(client):
+    """add_user(user_id, role='user', custom_role=None) -> auth headers for that user"""
+    users = get_dynamodb().get_table(settings.USERS_TABLE)
+
+    def add(user_id: str, role: str = 'user', custom_role: str = None, **fields) -> dict:
+        now = datetime.utcnow().isoformat()
+        item = {
+            'id': user_id,
+            'email': f'{user_id}@example.com',
+            'name': user_id.title(),
+            'hashed_password': 'x',
+            'role': role,
+            'status': 'active',
+            'created_at': now,
+            'updated_at': now,
+            **fields
+        }
+        if custom_role:
+            item['custom_role'] = custom_role
+        users.put_item(Item=item)
+        return auth_headers(user_id)
+
+    return add
+
+
+@pytest.fixture
+def add_role(client):
+    """add_role(role_id, **limits) stores a custom role"""
+    roles = get_dynamodb().get_table(settings.ROLES_TABLE)
+
+    def add(role_id: str, **fields):
+        now = datetime.utcnow().isoformat()
+        roles.put_item(Item={
+            'id': role_id,
+            'name': role_id,
+            'description': '',
+            'permissions': {},
+            'created_by': 'admin',
+            'created_at': now,
+            'updated_at': now,
+            **fields
+        })
+        get_model_catalog().invalidate_roles()
+
+    return add
+
+
+def auth_headers(user_id: str) -> dict:
+    return {'Authorization': f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+def wait_for_job(client, url: str, headers: dict, timeout: float = 10.0) -> dict:
+    """Poll a job status URL until the job has finished"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(url, headers=headers).json()
+        if job['status'] in ('completed', 'failed') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
@@ -0,0 +1,80 @@
+import botocore.client
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+
+
+def _new_chats(client, headers, count):
+    return [
+        client.post('/api/chats/', json={'title': f'Chat {i}'}, headers=headers).json()['id']
+        for i in range(count)
+    ]
+
+
+def _ids(table_name):
+    return {item['id'] for item in get_dynamodb().get_table(table_name).scan()['Items']}
+
+
+def _bulk(client, headers, **body):
+    response = client.post('/api/chats/bulk/', json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return {result['id']: result for result in response.json()['results']}
+
+
+def test_bulk_delete_reports_per_chat(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    mine = _new_chats(client, alice, 2)
+    theirs = _new_chats(client, bob, 1)
+
+    results = _bulk(client, alice, chat_ids=mine + theirs + ['missing'])
+    assert [results[chat_id]['success'] for chat_id in mine] == [True, True]
+    assert results[theirs[0]]['error'] == "Not authorized to modify this chat"
+    assert results['missing']['error'] == "Chat not found"
+    assert _ids(settings.CHATS_TABLE) == set(theirs)
+
+
+def test_bulk_archive_moves_chats(client, add_user):
+    alice = add_user('alice')
+    chats = _new_chats(client, alice, 3)
+
+    results = _bulk(client, alice, action='archive', chat_ids=chats[:2])
+    assert all(result['success'] for result in results.values())
+    assert _ids(settings.CHATS_TABLE) == {chats[2]}
+    assert _ids(settings.CHATS_ARCHIVE_TABLE) == set(chats[:2])
+
+
+def test_bulk_archive_keeps_chats_it_could_not_archive(client, add_user):
+    alice = add_user('alice')
+    chats = _new_chats(client, alice, 2)
+    get_dynamodb().get_client().delete_table(TableName=settings.CHATS_ARCHIVE_TABLE)
+
+    results = _bulk(client, alice, action='archive', chat_ids=chats)
+    assert {result['error'] for result in results.values()} == {"Could not archive chat"}
+    assert _ids(settings.CHATS_TABLE) == set(chats)
+
+
+def test_bulk_archive_reports_chats_it_could_not_remove(client, add_user, monkeypatch):
+    alice = add_user('alice')
+    stuck, moved = _new_chats(client, alice, 2)
+    make_call = botocore.client.BaseClient._make_api_call
+
+    def throttled(self, operation, params):
+        # Deletes of one chat keep coming back unprocessed (the resource
+        # layer serializes keys further down, so they are plain strings here)
+        requests = params.get('RequestItems', {}).get(settings.CHATS_TABLE) if operation == 'BatchWriteItem' else None
+        if not requests:
+            return make_call(self, operation, params)
+        failing = [r for r in requests if r['DeleteRequest']['Key']['id'] == stuck]
+        passing = [r for r in requests if r not in failing]
+        response = make_call(self, operation, {**params, 'RequestItems': {settings.CHATS_TABLE: passing}}) if passing else {}
+        response['UnprocessedItems'] = {settings.CHATS_TABLE: failing} if failing else {}
+        return response
+
+    monkeypatch.setattr(botocore.client.BaseClient, '_make_api_call', throttled)
+    monkeypatch.setattr('app.core.bulk._backoff', lambda attempt: 0)
+
+    results = _bulk(client, alice, action='archive', chat_ids=[stuck, moved])
+    assert results[moved]['success'] is True
+    assert results[stuck]['error'] == "Archived, but could not be removed from chats"
+    assert _ids(settings.CHATS_TABLE) == {stuck}
@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+import zipfile
+
+from app.core import chat_import
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from tests.conftest import wait_for_job
+
+
+def _lines(*chats) -> bytes:
+    return '\n'.join(json.dumps(chat) for chat in chats).encode()
+
+
+def _chat(source_id, title='Imported', content='hello'):
+    return {
+        'id': source_id,
+        'title': title,
+        'messages': [{'role': 'user', 'content': content, 'timestamp': '2024-01-01T00:00:00Z'}]
+    }
+
+
+def _import(client, headers, body: bytes, filename='chats.jsonl', **params) -> dict:
+    response = client.post('/api/chats/import/', params=params, files={'file': (filename, body)}, headers=headers)
+    assert response.status_code == 202, response.text
+    return wait_for_job(client, f"/api/chats/import/{response.json()['id']}/", headers)
+
+
+def _chats(user_id):
+    table = get_dynamodb().get_table(settings.CHATS_TABLE)
+    return [item for item in table.scan()['Items'] if item['user_id'] == user_id]
+
+
+def test_import_reports_bad_lines_and_is_idempotent(client, add_user):
+    alice = add_user('alice')
+    body = _lines(_chat('a'), _chat('b')) + b'\n{not json\n' + _lines({'title': 5}, _chat('c'))
+
+    job = _import(client, alice, body)
+    assert job['status'] == 'completed'
+    assert job['progress'] == {'lines_read': 5, 'chats_imported': 3, 'lines_failed': 2}
+    assert [error['line'] for error in job['details']['errors']] == [3, 4]
+
+    # The same file again, gzipped: overwrites instead of duplicating
+    job = _import(client, alice, gzip.compress(body), filename='chats.jsonl.gz')
+    assert job['progress']['chats_imported'] == 3
+    assert len(_chats('alice')) == 3
+
+
+def test_import_with_repeated_source_id_in_one_batch(client, add_user, monkeypatch):
+    # DynamoDB rejects a BatchWriteItem that puts one key twice; moto only
+    # does when the items are identical, so check the batches sent
+    batches = []
+    write = chat_import.batch_write
+
+    async def recording_write(resource, table_name, requests, *args, **kwargs):
+        batches.append([request['PutRequest']['Item']['id'] for request in requests])
+        return await write(resource, table_name, requests, *args, **kwargs)
+
+    monkeypatch.setattr(chat_import, 'batch_write', recording_write)
+    alice = add_user('alice')
+    body = _lines(_chat('same', title='first'), _chat('other'), _chat('same', title='second'))
+
+    job = _import(client, alice, body)
+    assert job['status'] == 'completed', job
+    assert batches and all(len(ids) == len(set(ids)) for ids in batches)
+    titles = sorted(chat['title'] for chat in _chats('alice'))
+    assert titles == ['Imported', 'second']
+
+
+def test_import_from_zip_resumes_from_checkpoint(client, add_user):
+    alice = add_user('alice')
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as z:
+        z.writestr('export/chats.jsonl', _lines(_chat('a'), _chat('b'), _chat('c')))
+        z.writestr('README.txt', 'not chats')
+
+    job = _import(client, alice, archive.getvalue(), filename='export.zip', resume_from=2)
+    assert job['progress']['chats_imported'] == 2
+    assert job['details']['resume_from'] == 4
+
+
+def test_import_allowance_ignores_overwritten_chats(client, add_user, add_role):
+    add_role('limited', max_chats=2)
+    bob = add_user('bob', custom_role='limited')
+    body = _lines(_chat('a'), _chat('b'), _chat('c'))
+
+    job = _import(client, bob, body)
+    assert job['progress']['chats_imported'] == 2
+    assert job['details']['errors'] == [{'line': 3, 'error': "Chat limit reached"}]
+
+    # At the limit, importing the same file again still rewrites the two chats
+    job = _import(client, bob, body)
+    assert job['progress']['chats_imported'] == 2
+    assert len(_chats('bob')) == 2
+
+
+def test_import_status_is_private(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    response = client.post('/api/chats/import/', files={'file': ('c.jsonl', _lines(_chat('a')))}, headers=alice)
+    url = f"/api/chats/import/{response.json()['id']}/"
+    assert client.get(url, headers=bob).status_code == 404
+    wait_for_job(client, url, alice)  # Don't leave it writing into the next test
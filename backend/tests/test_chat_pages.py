@@ -0,0 +1,66 @@
+def _new_chat(client, headers, title, pinned=False):
+    response = client.post('/api/chats/', json={'title': title, 'pinned': pinned}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()['id']
+
+
+def _all_pages(client, headers, limit):
+    """Titles of every page, in order, following next_cursor"""
+    pages, params = [], {'limit': limit}
+    while True:
+        response = client.get('/api/chats/paginated/', params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append([chat['title'] for chat in page['chats']])
+        assert page['has_more'] == (page['next_cursor'] is not None)
+        if not page['has_more']:
+            return pages
+        params['cursor'] = page['next_cursor']
+
+
+def test_pinned_chats_lead_the_whole_list(client, add_user):
+    alice = add_user('alice')
+    for i in range(4):
+        _new_chat(client, alice, f'plain {i}')
+    for i in range(3):
+        _new_chat(client, alice, f'pinned {i}', pinned=True)
+    _new_chat(client, add_user('bob'), 'not yours', pinned=True)
+
+    pages = _all_pages(client, alice, limit=2)
+    titles = [title for page in pages for title in page]
+    assert titles == ['pinned 2', 'pinned 1', 'pinned 0', 'plain 3', 'plain 2', 'plain 1', 'plain 0']
+    assert all(len(page) <= 2 for page in pages)
+    assert pages[-1]  # No trailing empty page
+
+
+def test_page_boundary_at_the_end_of_pinned_chats(client, add_user):
+    alice = add_user('alice')
+    _new_chat(client, alice, 'plain')
+    _new_chat(client, alice, 'pinned 0', pinned=True)
+    _new_chat(client, alice, 'pinned 1', pinned=True)
+
+    assert _all_pages(client, alice, limit=2) == [['pinned 1', 'pinned 0'], ['plain']]
+
+
+def test_pinning_moves_a_chat_between_phases(client, add_user):
+    alice = add_user('alice')
+    first = _new_chat(client, alice, 'first')
+    _new_chat(client, alice, 'second')
+
+    assert client.put(f'/api/chats/{first}/', json={'pinned': True}, headers=alice).status_code == 200
+    assert _all_pages(client, alice, limit=10) == [['first', 'second']]
+
+    assert client.put(f'/api/chats/{first}/', json={'pinned': False}, headers=alice).status_code == 200
+    titles = _all_pages(client, alice, limit=10)[0]
+    assert sorted(titles) == ['first', 'second']
+
+
+def test_page_cursor_belongs_to_its_user(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    for i in range(3):
+        _new_chat(client, alice, f'chat {i}')
+
+    cursor = client.get('/api/chats/paginated/', params={'limit': 1}, headers=alice).json()['next_cursor']
+    response = client.get('/api/chats/paginated/', params={'cursor': cursor}, headers=bob)
+    assert response.status_code == 400
@@ -0,0 +1,17 @@
+import os
+
+from app.core import credentials
+from app.core.credentials import LocalKeyProvider
+
+
+def test_local_key_is_created_once(tmp_path, monkeypatch):
+    path = str(tmp_path / 'secrets.key')
+    first = LocalKeyProvider(path)
+
+    # A worker that saw no file yet loses the race to create it
+    monkeypatch.setattr(credentials.os.path, 'exists', lambda p: False)
+    second = LocalKeyProvider(path)
+
+    assert second.key_id == first.key_id
+    assert os.listdir(tmp_path) == ['secrets.key']
+    assert second.unwrap(*first.wrap(b'k' * 32)) == b'k' * 32
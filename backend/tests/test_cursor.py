@@ -0,0 +1,79 @@
+import pytest
+
+from app.core.cursor import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    position = {'status': 'active', 'key': {'id': 'u1', 'created_at': '2024-01-01T00:00:00'}}
+    assert decode_cursor(encode_cursor(position)) == position
+
+
+@pytest.mark.parametrize('tamper', [
+    lambda cursor: cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'),
+    lambda cursor: 'e30' + cursor[cursor.index('.'):],  # {} under the original signature
+    lambda cursor: cursor.partition('.')[0],
+    lambda cursor: ''
+])
+def test_cursor_rejects_tampering(tamper):
+    with pytest.raises(ValueError):
+        decode_cursor(tamper(encode_cursor({'key': 'x'})))
+
+
+def _page(client, headers, **params):
+    response = client.get('/api/users/', params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_user_listing_pages_through_everyone(client, add_user):
+    admin = add_user('admin', role='admin')
+    for i in range(7):
+        add_user(f'user{i}')
+
+    seen, params = [], {'limit': 3, 'sort': 'name', 'order': 'asc'}
+    while True:
+        page = _page(client, admin, **params)
+        seen.extend(user['id'] for user in page['users'])
+        if not page['next_cursor']:
+            break
+        params['cursor'] = page['next_cursor']
+
+    assert len(seen) == len(set(seen)) == 8
+    assert seen == sorted(seen, key=str.title)
+
+
+@pytest.mark.parametrize('changed', [
+    {'sort': 'name'},
+    {'order': 'asc'},
+    {'role': 'admin'},
+    {'custom_role': 'support'}
+])
+def test_user_listing_cursor_is_bound_to_its_listing(client, add_user, changed):
+    admin = add_user('admin', role='admin')
+    for i in range(4):
+        add_user(f'user{i}')
+
+    cursor = _page(client, admin, limit=2)['next_cursor']
+    assert cursor
+
+    response = client.get('/api/users/', params={'limit': 2, 'cursor': cursor, **changed}, headers=admin)
+    assert response.status_code == 400
+    assert response.json()['detail'] == "Cursor does not match this listing"
+
+
+def test_user_listing_cursor_resumes_a_filtered_listing(client, add_user):
+    admin = add_user('admin', role='admin')
+    for i in range(5):
+        add_user(f'user{i}')
+
+    first = _page(client, admin, limit=2, role='user')
+    second = _page(client, admin, limit=2, role='user', cursor=first['next_cursor'])
+    ids = [user['id'] for user in first['users'] + second['users']]
+    assert len(set(ids)) == 4
+    assert 'admin' not in ids
+
+
+def test_user_listing_rejects_forged_cursor(client, add_user):
+    admin = add_user('admin', role='admin')
+    response = client.get('/api/users/', params={'cursor': 'not-a-cursor'}, headers=admin)
+    assert response.status_code == 400
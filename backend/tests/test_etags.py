@@ -0,0 +1,53 @@
+import botocore.client
+
+
+def _list(client, headers, encoding, **extra):
+    return client.get('/api/chats/', headers={**headers, 'Accept-Encoding': encoding, **extra})
+
+
+def test_compressed_responses_carry_weak_etags(client, add_user):
+    alice = add_user('alice')
+    for i in range(20):
+        client.post('/api/chats/', json={'title': f'A chat with a reasonably long title {i}'}, headers=alice)
+
+    compressed = _list(client, alice, 'gzip')
+    assert compressed.headers['content-encoding'] == 'gzip'
+    etag = compressed.headers['etag']
+    assert etag.startswith('W/"')
+
+    revalidated = _list(client, alice, 'gzip', **{'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['etag'] == etag
+
+    # The identity representation keeps the strong ETag; either form revalidates it
+    plain = _list(client, alice, 'identity')
+    assert 'content-encoding' not in plain.headers
+    assert plain.headers['etag'] == etag[2:]
+    assert _list(client, alice, 'identity', **{'If-None-Match': etag}).status_code == 304
+
+
+def test_roles_are_served_from_cache_until_a_role_changes(client, add_user, add_role, monkeypatch):
+    admin = add_user('admin', role='admin')
+    add_role('reader')
+    first = client.get('/api/roles/', headers=admin)
+    assert [role['id'] for role in first.json()] == ['reader']
+
+    scans = []
+    make_call = botocore.client.BaseClient._make_api_call
+
+    def counting(self, operation, params):
+        if operation == 'Scan':
+            scans.append(params.get('TableName'))
+        return make_call(self, operation, params)
+
+    monkeypatch.setattr(botocore.client.BaseClient, '_make_api_call', counting)
+    etag = first.headers['etag']
+    assert client.get('/api/roles/', headers={**admin, 'If-None-Match': etag}).status_code == 304
+    assert scans == []
+
+    response = client.put('/api/roles/reader/', json={'description': 'Reads'}, headers=admin)
+    assert response.status_code == 200, response.text
+    changed = client.get('/api/roles/', headers={**admin, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert changed.json()[0]['description'] == 'Reads'
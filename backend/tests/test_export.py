@@ -0,0 +1,33 @@
+import gzip
+import json
+
+
+def _exported(response):
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.content.splitlines()]
+
+
+def test_export_streams_own_chats_with_archived_on_request(client, add_user, add_role):
+    add_role('exporter', permissions={'features': {'export': True}})
+    alice = add_user('alice', custom_role='exporter')
+    bob = add_user('bob', custom_role='exporter')
+    kept, archived = [
+        client.post('/api/chats/', json={'title': title}, headers=alice).json()['id']
+        for title in ('Kept', 'Archived')
+    ]
+    client.post('/api/chats/', json={'title': 'Not yours'}, headers=bob)
+    response = client.post('/api/chats/bulk/', json={'action': 'archive', 'chat_ids': [archived]}, headers=alice)
+    assert response.json()['succeeded'] == 1
+
+    assert [chat['id'] for chat in _exported(client.get('/api/chats/export/', headers=alice))] == [kept]
+
+    chats = _exported(client.get('/api/chats/export/', params={'include_archived': 'true'}, headers=alice))
+    assert [chat['id'] for chat in chats] == [kept, archived]
+    assert 'archived_at' in chats[1]
+
+    response = client.get('/api/chats/export/', params={'compress': 'true', 'include_archived': 'true'}, headers=alice)
+    assert [json.loads(line)['id'] for line in gzip.decompress(response.content).splitlines()] == [kept, archived]
+
+
+def test_export_needs_the_feature(client, add_user):
+    assert client.get('/api/chats/export/', headers=add_user('alice')).status_code == 403
@@ -0,0 +1,49 @@
+def _new_chat(client, headers, **fields):
+    response = client.post('/api/chats/', json={'title': 'Chat', **fields}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _send(client, headers, chat_id, content):
+    return client.post(f'/api/chats/{chat_id}/messages/', json={'role': 'user', 'content': content}, headers=headers)
+
+
+def test_send_message_updates_history_and_summary(client, add_user):
+    alice = add_user('alice')
+    chat = _new_chat(client, alice)
+
+    assert _send(client, alice, chat['id'], 'first').status_code == 200
+    response = _send(client, alice, chat['id'], 'second   message')
+    assert response.status_code == 200
+    sent = response.json()
+    assert [m['content'] for m in sent['messages']] == ['first', 'second   message']
+    assert sent['messages'][-1]['sender_id'] == 'alice'
+    assert sent['message_count'] == 2
+    assert sent['last_message']['content'] == 'second message'
+
+    listed = client.get('/api/chats/', params={'include_messages': 'false'}, headers=alice).json()
+    assert listed[0]['message_count'] == 2
+    assert listed[0]['messages'] == []
+
+
+def test_send_message_with_custom_role_checks_context_length(client, add_user, add_role):
+    add_role('short', context_length=40)
+    bob = add_user('bob', custom_role='short')
+    chat = _new_chat(client, bob)
+
+    # The stored history is read back before the limit is checked
+    assert _send(client, bob, chat['id'], 'x' * 40).status_code == 200
+    assert _send(client, bob, chat['id'], 'y' * 20).status_code == 200
+
+    response = _send(client, bob, chat['id'], 'z' * 40)
+    assert response.status_code == 403
+    assert 'Context length limit exceeded' in response.json()['detail']
+
+
+def test_send_message_to_someone_elses_chat(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    chat = _new_chat(client, alice)
+
+    assert _send(client, bob, chat['id'], 'hi').status_code == 403
+    assert _send(client, bob, 'missing', 'hi').status_code == 404
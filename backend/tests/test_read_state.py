@@ -0,0 +1,69 @@
+import botocore.client
+
+from app.core.config import settings
+
+
+def _direct_chat(client, headers, participant_id):
+    response = client.post('/api/chats/direct/', params={'participant_id': participant_id}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _send(client, headers, chat_id, content):
+    response = client.post(f'/api/chats/{chat_id}/messages/', json={'role': 'user', 'content': content}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _listed(client, headers, chat_id):
+    chats = client.get('/api/chats/', params={'include_messages': 'false'}, headers=headers).json()
+    return next(chat for chat in chats if chat['id'] == chat_id)
+
+
+def test_messages_from_the_other_side_count_as_unread(client, add_user):
+    admin = add_user('admin', role='admin')
+    bob = add_user('bob')
+    admin_chat = _direct_chat(client, admin, 'bob')
+    bob_chat = next(chat for chat in client.get('/api/chats/', headers=bob).json() if chat['chat_type'] == 'direct')
+
+    _send(client, admin, admin_chat['id'], 'one')
+    _send(client, admin, admin_chat['id'], 'two')
+    assert _listed(client, bob, bob_chat['id'])['unread_count'] == 2
+    assert _listed(client, admin, admin_chat['id'])['unread_count'] == 0
+
+    response = client.post(f"/api/chats/{bob_chat['id']}/read/", headers=bob)
+    assert response.status_code == 200
+    assert response.json()['unread_count'] == 0
+    listed = _listed(client, bob, bob_chat['id'])
+    assert listed['unread_count'] == 0
+    assert listed['last_read_at'] == response.json()['last_read_at']
+
+    # Replying counts as reading
+    _send(client, admin, admin_chat['id'], 'three')
+    _send(client, bob, bob_chat['id'], 'reply')
+    assert _listed(client, bob, bob_chat['id'])['unread_count'] == 0
+    assert _listed(client, admin, admin_chat['id'])['unread_count'] == 1
+
+
+def test_mark_read_checks_ownership(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    chat_id = client.post('/api/chats/', json={'title': 'Mine'}, headers=alice).json()['id']
+
+    assert client.post(f'/api/chats/{chat_id}/read/', headers=bob).status_code == 403
+    assert client.post('/api/chats/missing/read/', headers=alice).status_code == 404
+
+
+def test_mark_read_on_chat_deleted_meanwhile(client, add_user, monkeypatch):
+    alice = add_user('alice')
+    make_call = botocore.client.BaseClient._make_api_call
+
+    def deleted_after_read(self, operation, params):
+        # The ownership read still finds the chat; the update then doesn't
+        if operation == 'GetItem' and params.get('TableName') == settings.CHATS_TABLE and params['Key']['id'] == {'S': 'gone'}:
+            return {'Item': {'user_id': {'S': 'alice'}}}
+        return make_call(self, operation, params)
+
+    monkeypatch.setattr(botocore.client.BaseClient, '_make_api_call', deleted_after_read)
+    response = client.post('/api/chats/gone/read/', headers=alice)
+    assert response.status_code == 404
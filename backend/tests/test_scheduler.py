@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.core import scheduler as scheduler_module
+from app.core.scheduler import UpstreamScheduler
+
+
+def test_slot_granted_as_the_caller_times_out_is_not_counted_completed(monkeypatch):
+    async def granted_too_late(future, timeout):
+        await future
+        raise asyncio.TimeoutError
+
+    async def run():
+        scheduler = UpstreamScheduler(max_concurrency=1)
+        holder = scheduler.slot('model')
+        await holder.__aenter__()
+
+        async def late_caller():
+            async with scheduler.slot('model'):
+                pass
+
+        monkeypatch.setattr(scheduler_module.asyncio, 'wait_for', granted_too_late)
+        waiter = asyncio.create_task(late_caller())
+        await asyncio.sleep(0)
+        await holder.__aexit__(None, None, None)
+        with pytest.raises(asyncio.TimeoutError):
+            await waiter
+        return scheduler.stats()['model']
+
+    stats = asyncio.run(run())
+    assert stats['active'] == 0
+    assert {name: stats['classes']['interactive'][name] for name in ('queued', 'active', 'completed', 'timeouts')} == {
+        'queued': 0, 'active': 0, 'completed': 1, 'timeouts': 1
+    }
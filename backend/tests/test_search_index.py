@@ -0,0 +1,34 @@
+from app.core.search import UserIndex, _message_entry
+
+
+def _index(*messages) -> UserIndex:
+    index = UserIndex()
+    index.apply({'c': 'chat', 'title': 'Notes'})
+    for position, content in enumerate(messages):
+        index.apply(_message_entry('chat', position, content))
+    return index
+
+
+def test_reindexed_message_drops_tokens_it_lost():
+    index = _index('alpha beta beta', 'beta')
+    assert index.lengths['chat'] == 4
+
+    index.apply(_message_entry('chat', 0, 'gamma'))
+    assert 'alpha' not in index.postings
+    assert index.postings['beta'] == {'chat': {1: 1}}
+    assert index.lengths['chat'] == index.total_length == 2
+    assert index.search('alpha', 5) == []
+    assert [hit['chat_id'] for hit in index.search('gamma', 5)] == ['chat']
+
+
+def test_reindexed_message_without_tokens_clears_it():
+    index = _index('streaming placeholder text')
+    index.apply(_message_entry('chat', 0, ''))
+    assert index.postings == {}
+    assert index.total_length == 0
+
+
+def test_removed_chat_leaves_nothing_behind():
+    index = _index('alpha beta', 'gamma')
+    index.apply({'c': 'chat', 'del': 1})
+    assert index.postings == {} and index.chat_tokens == {} and index.total_length == 0
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from app.core.semantic import SemanticIndex
+
+
+def _hits(index, user_id, query):
+    return {hit['chat_id']: hit['message_indexes'] for hit in index.search(user_id, query)}
+
+
+def test_reindexed_message_replaces_its_vector(tmp_path):
+    index = SemanticIndex(directory=str(tmp_path))
+    index.enqueue('alice', 'chat', 0, 'streaming placeholder')
+    index.enqueue('alice', 'chat', 1, 'a question about volcanoes')
+    asyncio.run(index.flush())
+    index.enqueue('alice', 'chat', 0, 'the finished answer about glaciers')
+    asyncio.run(index.flush())
+
+    assert sorted(_hits(index, 'alice', 'streaming placeholder')['chat']) == [0, 1]
+    assert _hits(index, 'alice', 'glaciers')['chat'][0] == 0
+    assert index._catch_up('alice').valid.sum() == 2
+
+
+def test_failed_flush_requeues_only_what_was_not_written(tmp_path, monkeypatch):
+    index = SemanticIndex(directory=str(tmp_path))
+    index.enqueue('alice', 'a', 0, 'alpine lakes')
+    index.enqueue('bob', 'b', 0, 'desert dunes')
+    write = index._write
+
+    def failing_for_bob(batch, written):
+        real_path = index.path
+        monkeypatch.setattr(index, 'path', lambda user_id: str(tmp_path) if user_id == 'bob' else real_path(user_id))
+        try:
+            write(batch, written)
+        finally:
+            monkeypatch.setattr(index, 'path', real_path)
+
+    monkeypatch.setattr(index, '_write', failing_for_bob)
+    with pytest.raises(IsADirectoryError):
+        asyncio.run(index.flush())
+    assert [entry[1] for entry in index._pending] == ['bob']
+
+    monkeypatch.setattr(index, '_write', write)
+    asyncio.run(index.flush())
+    assert index._catch_up('alice').size == 1
+    assert _hits(index, 'bob', 'dunes') == {'b': [0]}
@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+
+import botocore.client
+
+from app.core.config import settings
+from app.core.database import get_dynamodb
+from app.core.streaming import ReplyWriter
+
+
+def _table():
+    return get_dynamodb().get_table(settings.CHATS_TABLE)
+
+
+def _writer(chat_id) -> ReplyWriter:
+    return ReplyWriter(_table(), chat_id, {
+        'role': 'assistant',
+        'content': '',
+        'timestamp': '2024-01-01T00:00:00',
+        'status': 'streaming',
+        'stream_id': str(uuid.uuid4())
+    }, every_tokens=1)
+
+
+def _send(client, headers, chat_id, content):
+    response = client.post(f'/api/chats/{chat_id}/messages/', json={'role': 'user', 'content': content}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_message_sent_while_a_reply_streams_keeps_the_reply(client, add_user, monkeypatch):
+    alice = add_user('alice')
+    chat_id = client.post('/api/chats/', json={'title': 'Chat'}, headers=alice).json()['id']
+    _send(client, alice, chat_id, 'first question')
+    writer = _writer(chat_id)
+    make_call = botocore.client.BaseClient._make_api_call
+
+    def racing(self, operation, params):
+        # The reply starts after send_message read the chat, before it writes
+        if operation == 'UpdateItem' and writer.index is None and 'impatient' in str(params):
+            asyncio.run(writer.start(1))
+        return make_call(self, operation, params)
+
+    monkeypatch.setattr(botocore.client.BaseClient, '_make_api_call', racing)
+    chat = _send(client, alice, chat_id, 'impatient followup')
+    asyncio.run(writer.append('partial '))
+    assert [m['content'] for m in chat['messages']] == ['first question', '', 'impatient followup']
+    assert chat['message_count'] == 3
+
+    asyncio.run(writer.append('answer'))
+    asyncio.run(writer.finish())
+    messages = client.get(f'/api/chats/{chat_id}/', headers=alice).json()['messages']
+    assert [(m['content'], m['status']) for m in messages] == [
+        ('first question', None), ('partial answer', 'complete'), ('impatient followup', None)
+    ]
+    hits = client.get('/api/chats/search/', params={'q': 'impatient'}, headers=alice).json()
+    assert hits[0]['message_indexes'] == [2]
+
+
+def test_reply_follows_its_placeholder_when_it_moves(client, add_user):
+    alice = add_user('alice')
+    chat_id = client.post('/api/chats/', json={'title': 'Chat'}, headers=alice).json()['id']
+    writer = _writer(chat_id)
+    asyncio.run(writer.start(0))
+    _table().update_item(
+        Key={'id': chat_id},
+        UpdateExpression='SET messages = list_append(:first, messages)',
+        ExpressionAttributeValues={':first': [{'role': 'user', 'content': 'moved in', 'timestamp': '2024-01-01T00:00:00'}]}
+    )
+
+    asyncio.run(writer.finish(status='error', error='Upstream went away'))
+    assert writer.index == 1
+    reply = client.get(f'/api/chats/{chat_id}/', headers=alice).json()['messages'][1]
+    assert (reply['status'], reply['error'], reply['stream_id']) == ('error', 'Upstream went away', writer.message['stream_id'])
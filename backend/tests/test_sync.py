@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.cursor import encode_cursor
+from app.core.sync import record_reset
+
+
+@pytest.fixture(autouse=True)
+def no_overlap(monkeypatch):
+    # Without the overlap window a delta holds exactly what changed
+    monkeypatch.setattr(settings, 'SYNC_OVERLAP_SECONDS', 0)
+
+
+def _new_chat(client, headers, title):
+    response = client.post('/api/chats/', json={'title': title}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()['id']
+
+
+def _sync(client, headers, cursor=None, **params):
+    """Follow has_more to the end; returns (chat ids, deleted ids, reset, cursor for next time)"""
+    chats, deleted, reset = [], [], None
+    while True:
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/chats/sync/', params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        chats.extend(chat['id'] for chat in page['chats'])
+        deleted.extend(page['deleted'])
+        reset = page['reset'] if reset is None else reset
+        cursor = page['cursor']
+        if not page['has_more']:
+            return chats, deleted, reset, cursor
+
+
+def test_first_sync_is_a_full_listing_across_pages(client, add_user):
+    alice = add_user('alice')
+    created = [_new_chat(client, alice, f'Chat {i}') for i in range(5)]
+    _new_chat(client, add_user('bob'), 'Not yours')
+
+    chats, deleted, reset, _ = _sync(client, alice, limit=2)
+    assert reset is True
+    assert sorted(chats) == sorted(created)
+    assert deleted == []
+
+
+def test_delta_sync_returns_updates_and_deletions(client, add_user):
+    alice = add_user('alice')
+    kept, removed = _new_chat(client, alice, 'Kept'), _new_chat(client, alice, 'Removed')
+    untouched = _new_chat(client, alice, 'Untouched')
+    *_, cursor = _sync(client, alice)
+
+    client.post(f'/api/chats/{kept}/messages/', json={'role': 'user', 'content': 'hi'}, headers=alice)
+    added = _new_chat(client, alice, 'Added')
+    assert client.delete(f'/api/chats/{removed}/', headers=alice).status_code == 200
+
+    chats, deleted, reset, cursor = _sync(client, alice, cursor)
+    assert reset is False
+    assert sorted(chats) == sorted([kept, added])
+    assert untouched not in chats
+    assert deleted == [removed]
+
+    # Nothing changed since
+    assert _sync(client, alice, cursor)[:3] == ([], [], False)
+
+
+def test_recorded_reset_makes_the_next_sync_full(client, add_user):
+    alice = add_user('alice')
+    chat_id = _new_chat(client, alice, 'Chat')
+    *_, cursor = _sync(client, alice)
+
+    record_reset('alice')
+    chats, _, reset, _ = _sync(client, alice, cursor)
+    assert reset is True
+    assert chats == [chat_id]
+
+
+def test_expired_cursor_makes_the_next_sync_full(client, add_user):
+    alice = add_user('alice')
+    chat_id = _new_chat(client, alice, 'Chat')
+    since = datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS + 1)
+
+    chats, _, reset, _ = _sync(client, alice, encode_cursor({'user': 'alice', 'since': since.isoformat()}))
+    assert reset is True
+    assert chats == [chat_id]
+
+
+def test_sync_cursor_belongs_to_its_user(client, add_user):
+    alice = add_user('alice')
+    bob = add_user('bob')
+    *_, cursor = _sync(client, alice)
+
+    response = client.get('/api/chats/sync/', params={'cursor': cursor}, headers=bob)
+    assert response.status_code == 400
+    assert client.get('/api/chats/sync/', params={'cursor': 'forged'}, headers=alice).status_code == 400
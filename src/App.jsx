@@ -11,8 +11,18 @@ import { chatService } from './services/chat.service'
 import { modelService } from './services/model.service'
 import { userService } from './services/user.service'
 import { roleService } from './services/role.service'
+import { bootstrapService } from './services/bootstrap.service'
 import './App.css'
 
+// Sidebar order: pinned first, then most recently updated
+const byPinnedThenRecent = (a, b) => {
+  if (a.pinned && !b.pinned) return -1
+  if (!a.pinned && b.pinned) return 1
+  const aTime = new Date(a.updated_at || 0).getTime()
+  const bTime = new Date(b.updated_at || 0).getTime()
+  return bTime - aTime
+}
+
 function App() {
   const [user, setUser] = useState(null)
   const [showProfile, setShowProfile] = useState(false)
@@ -25,11 +35,14 @@ function App() {
   const [messagesLoading, setMessagesLoading] = useState(false)
   const [sending, setSending] = useState(false)
   const [permissions, setPermissions] = useState(null)
+  const [limits, setLimits] = useState(null)
   
   // Admin data
   const [models, setModels] = useState([])
   const [pendingUsers, setPendingUsers] = useState([])
+  const [pendingCursor, setPendingCursor] = useState(null)
   const [allUsers, setAllUsers] = useState([])
+  const [usersCursor, setUsersCursor] = useState(null)
   const [roles, setRoles] = useState([])
 
   useEffect(() => {
@@ -117,6 +130,12 @@ function App() {
         // Only reload messages for the active direct chat
         const chatData = await chatService.getChat(activeChat)
         
+        // The chat is open, so whatever arrived has been seen
+        if (chatData.unread_count > 0) {
+          markChatRead(activeChat)
+          chatData.unread_count = 0
+        }
+        
         setChats(prevChats => {
           const currentChat = prevChats.find(c => (c.id || c._id) === activeChat)
           
@@ -160,6 +179,17 @@ function App() {
     }
   }, [chats])
 
+  // Apply a delta sync to the cached chat list (or take it whole on reset)
+  const mergeChatSync = (cached, sync) => {
+    if (!cached || sync.reset) {
+      return sync.chats.sort(byPinnedThenRecent)
+    }
+    const changed = new Set(sync.chats.map(c => c.id))
+    const deleted = new Set(sync.deleted)
+    const kept = cached.filter(c => !changed.has(c.id) && !deleted.has(c.id))
+    return [...kept, ...sync.chats].sort(byPinnedThenRecent)
+  }
+
   const loadUserData = async (isBackgroundRefresh = false) => {
     if (!isBackgroundRefresh) {
       setChatsLoading(true)
@@ -169,12 +199,28 @@ function App() {
       console.log(isBackgroundRefresh ? 'Background refresh...' : 'Starting to load user data...')
       const startTime = Date.now()
       
-      // Load chats without messages for faster initial load
-      const [chatsData, modelsData, permissionsData] = await Promise.all([
-        chatService.getChats(false), // false = don't include messages
-        modelService.getModels(),
-        roleService.getCurrentUserPermissions()
-      ])
+      const cursor = sessionStorage.getItem('chatSyncCursor')
+      const cachedChats = sessionStorage.getItem('cachedChats')
+      const cached = cursor && cachedChats ? JSON.parse(cachedChats) : null
+      
+      // One round trip for the user, chats, models, limits and permissions.
+      // Chats come without messages; a refresh downloads only what changed
+      const data = await bootstrapService.load(cached ? cursor : null)
+      let sync = data.chats
+      if (sync.has_more) {
+        const rest = await chatService.syncChats(sync.cursor)
+        sync = {
+          ...rest,
+          chats: [...sync.chats, ...rest.chats],
+          deleted: [...sync.deleted, ...rest.deleted],
+          reset: sync.reset || rest.reset
+        }
+      }
+      sessionStorage.setItem('chatSyncCursor', sync.cursor)
+      
+      const chatsData = mergeChatSync(cached, sync)
+      const modelsData = data.models
+      const permissionsData = data.permissions
       
       const duration = Date.now() - startTime
       console.log(`Data loaded in ${duration}ms`)
@@ -191,9 +237,12 @@ function App() {
         console.error('Error caching data:', error)
       }
       
+      setUser(data.user)
+      localStorage.setItem('user', JSON.stringify(data.user))
       setChats(chatsData)
       setModels(modelsData)
       setPermissions(permissionsData)
+      setLimits(data.limits)
       
       if (!isBackgroundRefresh && chatsData.length > 0) {
         const firstChatId = chatsData[0].id || chatsData[0]._id
@@ -248,6 +297,18 @@ function App() {
     }
   }
 
+  // Clear a chat's unread badge, locally right away and then on the server
+  const markChatRead = async (chatId) => {
+    setChats(prev => prev.map(c =>
+      (c.id || c._id) === chatId ? { ...c, unread_count: 0 } : c
+    ))
+    try {
+      await chatService.markRead(chatId)
+    } catch (error) {
+      console.error('Error marking chat read:', error)
+    }
+  }
+
   const handleSelectChat = (chatId) => {
     setActiveChat(chatId)
     
@@ -256,17 +317,22 @@ function App() {
     if (chat && (!chat.messages || chat.messages.length === 0)) {
       loadChatMessages(chatId)
     }
+    if (chat?.unread_count > 0) {
+      markChatRead(chatId)
+    }
   }
 
   const loadAdminData = async () => {
     try {
-      const [usersData, pendingData, rolesData] = await Promise.all([
+      const [usersPage, pendingPage, rolesData] = await Promise.all([
         userService.getUsers(),
         userService.getPendingUsers(),
         roleService.getRoles()
       ])
-      setAllUsers(usersData)
-      setPendingUsers(pendingData)
+      setAllUsers(usersPage.users)
+      setUsersCursor(usersPage.next_cursor)
+      setPendingUsers(pendingPage.users)
+      setPendingCursor(pendingPage.next_cursor)
       setRoles(rolesData)
     } catch (error) {
       console.error('Error loading admin data:', error)
@@ -275,22 +341,44 @@ function App() {
 
   const refreshPendingUsers = async () => {
     try {
-      const pendingData = await userService.getPendingUsers()
-      setPendingUsers(pendingData)
+      const pendingPage = await userService.getPendingUsers()
+      setPendingUsers(pendingPage.users)
+      setPendingCursor(pendingPage.next_cursor)
     } catch (error) {
       console.error('Error refreshing pending users:', error)
     }
   }
 
+  const loadMorePendingUsers = async () => {
+    try {
+      const pendingPage = await userService.getPendingUsers(pendingCursor)
+      setPendingUsers(prev => [...prev, ...pendingPage.users])
+      setPendingCursor(pendingPage.next_cursor)
+    } catch (error) {
+      console.error('Error loading more pending users:', error)
+    }
+  }
+
   const refreshUsers = async () => {
     try {
-      const usersData = await userService.getUsers()
-      setAllUsers(usersData)
+      const usersPage = await userService.getUsers()
+      setAllUsers(usersPage.users)
+      setUsersCursor(usersPage.next_cursor)
     } catch (error) {
       console.error('Error refreshing users:', error)
     }
   }
 
+  const loadMoreUsers = async () => {
+    try {
+      const usersPage = await userService.getUsers(usersCursor)
+      setAllUsers(prev => [...prev, ...usersPage.users])
+      setUsersCursor(usersPage.next_cursor)
+    } catch (error) {
+      console.error('Error loading more users:', error)
+    }
+  }
+
   const refreshRoles = async () => {
     try {
       const rolesData = await roleService.getRoles()
@@ -316,6 +404,8 @@ function App() {
 
   const handleLogout = () => {
     authService.logout()
+    sessionStorage.removeItem('chatSyncCursor')
+    sessionStorage.removeItem('cachedChats')
     setUser(null)
     setChats([])
     setActiveChat(null)
@@ -503,10 +593,14 @@ function App() {
         onApproveUser={approveUser}
         onRejectUser={rejectUser}
         onRefreshPendingUsers={refreshPendingUsers}
+        hasMorePendingUsers={Boolean(pendingCursor)}
+        onLoadMorePendingUsers={loadMorePendingUsers}
         users={allUsers}
         onUpdateUserRole={updateUserRole}
         onDeleteUser={deleteUser}
         onRefreshUsers={refreshUsers}
+        hasMoreUsers={Boolean(usersCursor)}
+        onLoadMoreUsers={loadMoreUsers}
         roles={roles}
         onAddRole={addRole}
         onEditRole={editRole}
@@ -596,15 +690,7 @@ function App() {
       const updated = prev.map(c => 
         (c.id || c._id) === id ? { ...c, pinned: newPinnedStatus } : c
       )
-      // Sort: pinned first, then by updated_at descending
-      return updated.sort((a, b) => {
-        if (a.pinned && !b.pinned) return -1
-        if (!a.pinned && b.pinned) return 1
-        // Both pinned or both unpinned - sort by updated_at
-        const aTime = new Date(a.updated_at || 0).getTime()
-        const bTime = new Date(b.updated_at || 0).getTime()
-        return bTime - aTime
-      })
+      return updated.sort(byPinnedThenRecent)
     })
     
     // Update backend in background
@@ -661,8 +747,10 @@ function App() {
         return chat
       }))
       
-      // Send message to backend (async, don't wait)
-      chatService.sendMessage(chatId, { role: 'user', content }).catch(err => {
+      // Send message to backend (AI replies wait for it below: the server
+      // builds the model's context from the saved chat)
+      const sent = chatService.sendMessage(chatId, { role: 'user', content })
+      sent.catch(err => {
         console.error('Error sending message:', err)
       })
       
@@ -694,62 +782,36 @@ function App() {
             try {
               console.log('Calling AI model:', mentionedModel.name, 'with question:', question)
               
-              const endpoint = mentionedModel.endpoint || 'https://api.openai.com/v1/chat/completions'
-              const headers = {
-                'Content-Type': 'application/json',
-                ...(mentionedModel.api_key && { 'Authorization': `Bearer ${mentionedModel.api_key}` }),
-                ...(mentionedModel.headers && mentionedModel.headers.reduce((acc, h) => ({ ...acc, [h.key]: h.value }), {}))
-              }
-              
-              console.log('Endpoint:', endpoint)
-              console.log('Headers:', headers)
+              // The server calls the model; its credentials never reach the browser
+              const aiContent = await modelService.complete(
+                mentionedModel.id,
+                [{ role: 'user', content: question }]
+              ) || 'No response from model'
               
-              const aiResponse = await fetch(endpoint, {
-                method: 'POST',
-                headers: headers,
-                body: JSON.stringify({
-                  model: mentionedModel.name,
-                  messages: [{ role: 'user', content: question }],
-                  max_tokens: 1000
-                })
-              })
+              const aiMessage = { 
+                role: 'assistant', 
+                content: `🤖 ${mentionedModel.display_name || mentionedModel.name}: ${aiContent}`,
+                timestamp: new Date().toISOString(),
+                sender_id: 'ai-model'
+              }
               
-              console.log('AI Response status:', aiResponse.status)
+              console.log('Adding AI message to chat:', aiMessage)
               
-              if (aiResponse.ok) {
-                const data = await aiResponse.json()
-                console.log('AI Response data:', data)
-                
-                const aiContent = data.choices?.[0]?.message?.content || 'No response from model'
-                
-                const aiMessage = { 
-                  role: 'assistant', 
-                  content: `🤖 ${mentionedModel.display_name || mentionedModel.name}: ${aiContent}`,
-                  timestamp: new Date().toISOString(),
-                  sender_id: 'ai-model'
+              // Add AI response to chat
+              setChats(prev => prev.map(chat => {
+                if ((chat.id || chat._id) === chatId) {
+                  return { ...chat, messages: [...(chat.messages || []), aiMessage] }
                 }
-                
-                console.log('Adding AI message to chat:', aiMessage)
-                
-                // Add AI response to chat
-                setChats(prev => prev.map(chat => {
-                  if ((chat.id || chat._id) === chatId) {
-                    return { ...chat, messages: [...(chat.messages || []), aiMessage] }
-                  }
-                  return chat
-                }))
-                
-                // Send AI response to backend
-                chatService.sendMessage(chatId, { 
-                  role: 'assistant', 
-                  content: aiMessage.content 
-                }).catch(err => {
-                  console.error('Error sending AI response:', err)
-                })
-              } else {
-                const errorText = await aiResponse.text()
-                console.error('AI API error:', aiResponse.status, errorText)
-              }
+                return chat
+              }))
+              
+              // Send AI response to backend
+              chatService.sendMessage(chatId, { 
+                role: 'assistant', 
+                content: aiMessage.content 
+              }).catch(err => {
+                console.error('Error sending AI response:', err)
+              })
             } catch (error) {
               console.error('Error calling AI model:', error)
             }
@@ -770,42 +832,15 @@ function App() {
         throw new Error('Model not found')
       }
       
-      // Call the actual model endpoint
-      const endpoint = model.endpoint || 'https://api.openai.com/v1/chat/completions'
-      const headers = {
-        'Content-Type': 'application/json',
-        ...(model.api_key && { 'Authorization': `Bearer ${model.api_key}` }),
-        ...(model.headers && model.headers.reduce((acc, h) => ({ ...acc, [h.key]: h.value }), {}))
-      }
-      
-      // Get chat history for context
-      const chatForContext = chats.find(c => (c.id || c._id) === chatId)
-      const messages = chatForContext?.messages || []
-      
-      const response = await fetch(endpoint, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify({
-          model: model.name,
-          messages: [...messages, userMessage].map(m => ({ role: m.role, content: m.content })),
-          max_tokens: 1000
-        })
-      })
-      
-      if (!response.ok) {
-        throw new Error(`Model API error: ${response.status} ${response.statusText}`)
-      }
-      
-      const data = await response.json()
-      const aiContent = data.choices?.[0]?.message?.content || 'No response from model'
-      
-      const aiMessage = { 
-        role: 'assistant', 
-        content: aiContent,
-        timestamp: new Date().toISOString()
+      // The reply is generated and saved by the server, which holds the
+      // model's credentials; show it as it streams in
+      await sent
+      const aiMessage = {
+        role: 'assistant',
+        content: '',
+        timestamp: new Date().toISOString(),
+        status: 'streaming'
       }
-      
-      // Add AI response immediately
       setChats(prev => prev.map(chat => {
         if ((chat.id || chat._id) === chatId) {
           return { ...chat, messages: [...(chat.messages || []), aiMessage] }
@@ -813,17 +848,23 @@ function App() {
         return chat
       }))
       
-      // Send AI response to backend (async)
-      chatService.sendMessage(chatId, { 
-        role: 'assistant', 
-        content: aiMessage.content 
-      }).catch(err => {
-        console.error('Error sending AI response:', err)
+      const updateReply = (content, status) => {
+        setChats(prev => prev.map(chat => {
+          if ((chat.id || chat._id) !== chatId) return chat
+          const messages = [...(chat.messages || [])]
+          messages[messages.length - 1] = { ...aiMessage, content, status }
+          return { ...chat, messages }
+        }))
+      }
+      
+      const aiContent = await chatService.streamCompletion(chatId, model.id, (delta, soFar) => {
+        updateReply(soFar, 'streaming')
       })
+      updateReply(aiContent || 'No response from model', 'complete')
       
       // Generate title for new chats using LLM
       if (isNewChat) {
-        generateChatTitle(chatId, content, model, endpoint, headers).catch(err => {
+        generateChatTitle(chatId, content, model).catch(err => {
           console.error('Error generating title:', err)
         })
       }
@@ -851,42 +892,30 @@ function App() {
     setActiveChat(chat.id || chat._id)
   }
   
-  const generateChatTitle = async (chatId, firstMessage, model, endpoint, headers) => {
+  const generateChatTitle = async (chatId, firstMessage, model) => {
     try {
-      // Call LLM to generate a concise title
-      const response = await fetch(endpoint, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify({
-          model: model.name,
-          messages: [
-            { 
-              role: 'system', 
-              content: 'Generate a concise, descriptive title (max 6 words) for a chat that starts with this question. Only respond with the title, nothing else.' 
-            },
-            { role: 'user', content: firstMessage }
-          ],
-          max_tokens: 20
-        })
-      })
+      // Ask the model (through the server) for a concise title
+      const generated = await modelService.complete(model.id, [
+        { 
+          role: 'system', 
+          content: 'Generate a concise, descriptive title (max 6 words) for a chat that starts with this question. Only respond with the title, nothing else.' 
+        },
+        { role: 'user', content: firstMessage }
+      ], 20)
+      const title = generated?.trim() || firstMessage.slice(0, 30)
       
-      if (response.ok) {
-        const data = await response.json()
-        const title = data.choices?.[0]?.message?.content?.trim() || firstMessage.slice(0, 30)
-        
-        // Update chat title in UI
-        setChats(prev => prev.map(chat => {
-          if ((chat.id || chat._id) === chatId) {
-            return { ...chat, title }
-          }
-          return chat
-        }))
-        
-        // Update title in backend
-        chatService.updateChat(chatId, { title }).catch(err => {
-          console.error('Error updating chat title:', err)
-        })
-      }
+      // Update chat title in UI
+      setChats(prev => prev.map(chat => {
+        if ((chat.id || chat._id) === chatId) {
+          return { ...chat, title }
+        }
+        return chat
+      }))
+      
+      // Update title in backend
+      chatService.updateChat(chatId, { title }).catch(err => {
+        console.error('Error updating chat title:', err)
+      })
     } catch (error) {
       console.error('Error generating title:', error)
     }
@@ -911,6 +940,7 @@ function App() {
         onOpenUserSearch={() => setShowUserSearch(true)}
         loading={chatsLoading}
         permissions={permissions}
+        limits={limits}
       />
       <ChatWindow 
         chat={currentChat}
@@ -919,6 +949,7 @@ function App() {
         sending={sending}
         currentUser={user}
         messagesLoading={messagesLoading}
+        limits={limits}
       />
       {showProfile && (
         <Profile 
@@ -4,7 +4,7 @@ import RoleModal from './RoleModal'
 import { modelService } from '../services/model.service'
 import './AdminPanel.css'
 
-function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, onRefreshModels, pendingUsers, onApproveUser, onRejectUser, onRefreshPendingUsers, users, onUpdateUserRole, onDeleteUser, onRefreshUsers, roles, onAddRole, onEditRole, onDeleteRole, onRefreshRoles }) {
+function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, onRefreshModels, pendingUsers, onApproveUser, onRejectUser, onRefreshPendingUsers, hasMorePendingUsers, onLoadMorePendingUsers, users, onUpdateUserRole, onDeleteUser, onRefreshUsers, hasMoreUsers, onLoadMoreUsers, roles, onAddRole, onEditRole, onDeleteRole, onRefreshRoles }) {
   const [activeTab, setActiveTab] = useState('models')
   const [showAddModal, setShowAddModal] = useState(false)
   const [editingModel, setEditingModel] = useState(null)
@@ -18,6 +18,7 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
     users: false,
     roles: false
   })
+  const [loadingMore, setLoadingMore] = useState(null)
 
   const handleRefresh = async (section, refreshFn) => {
     setRefreshing({ ...refreshing, [section]: true })
@@ -25,6 +26,23 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
     setRefreshing({ ...refreshing, [section]: false })
   }
 
+  // Further pages are only fetched when asked for
+  const handleLoadMore = async (section, loadMoreFn) => {
+    setLoadingMore(section)
+    await loadMoreFn()
+    setLoadingMore(null)
+  }
+
+  const loadMoreButton = (section, loadMoreFn) => (
+    <button
+      className="load-more-btn"
+      onClick={() => handleLoadMore(section, loadMoreFn)}
+      disabled={loadingMore === section}
+    >
+      {loadingMore === section ? 'Loading...' : 'Load more'}
+    </button>
+  )
+
   const handleAddModel = (modelData) => {
     if (modelData.id) {
       onEditModel(modelData)
@@ -44,44 +62,18 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
     setTestingModelId(model.id)
     
     try {
-      // Test directly to the model endpoint
-      const endpoint = model.endpoint || 'https://api.openai.com/v1/chat/completions'
-      const headers = {
-        'Content-Type': 'application/json',
-        ...(model.api_key && { 'Authorization': `Bearer ${model.api_key}` }),
-        ...(model.headers && model.headers.reduce((acc, h) => ({ ...acc, [h.key]: h.value }), {}))
-      }
+      // Tested by the server, which holds the model's credentials
+      const result = await modelService.testModel(model.id)
       
-      const response = await fetch(endpoint, {
-        method: 'POST',
-        headers: headers,
-        body: JSON.stringify({
-          model: model.name,
-          messages: [{ role: 'user', content: 'test' }],
-          max_tokens: 5
-        })
+      setModelTestResults({
+        ...modelTestResults,
+        [model.id]: {
+          success: result.success,
+          message: result.success ? 'Connection successful!' : result.message,
+          timestamp: new Date().toLocaleTimeString()
+        }
       })
       
-      if (response.ok) {
-        setModelTestResults({
-          ...modelTestResults,
-          [model.id]: {
-            success: true,
-            message: 'Connection successful!',
-            timestamp: new Date().toLocaleTimeString()
-          }
-        })
-      } else {
-        setModelTestResults({
-          ...modelTestResults,
-          [model.id]: {
-            success: false,
-            message: `Connection failed: ${response.status} ${response.statusText}`,
-            timestamp: new Date().toLocaleTimeString()
-          }
-        })
-      }
-      
       // Clear result after 5 seconds
       setTimeout(() => {
         setModelTestResults(prev => {
@@ -134,7 +126,7 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
           onClick={() => setActiveTab('signups')}
         >
           Pending Signups
-          {pendingUsers.length > 0 && <span className="tab-badge">{pendingUsers.length}</span>}
+          {pendingUsers.length > 0 && <span className="tab-badge">{pendingUsers.length}{hasMorePendingUsers ? '+' : ''}</span>}
         </button>
         <button 
           className={`tab-btn ${activeTab === 'users' ? 'active' : ''}`}
@@ -262,6 +254,7 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
                   ))}
                 </div>
             )}
+            {hasMorePendingUsers && loadMoreButton('signups', onLoadMorePendingUsers)}
           </div>
         )}
 
@@ -312,6 +305,7 @@ function AdminPanel({ onClose, models, onAddModel, onDeleteModel, onEditModel, o
                 </div>
               ))}
             </div>
+            {hasMoreUsers && loadMoreButton('users', onLoadMoreUsers)}
           </div>
         )}
 
@@ -1,14 +1,12 @@
 import { useState, useRef, useEffect } from 'react'
 import './ChatWindow.css'
-import { roleService } from '../services/role.service'
 import { countChatTokens, formatTokenCount, calculatePercentage } from '../utils/tokenCounter'
 import EmojiPicker from './EmojiPicker'
 import ModelMention from './ModelMention'
 
-function ChatWindow({ chat, onSendMessage, models = [], sending, currentUser, messagesLoading }) {
+function ChatWindow({ chat, onSendMessage, models = [], sending, currentUser, messagesLoading, limits }) {
   const [input, setInput] = useState('')
   const [selectedModel, setSelectedModel] = useState('')
-  const [limits, setLimits] = useState(null)
   const [currentTokens, setCurrentTokens] = useState(0)
   const [showEmojiPicker, setShowEmojiPicker] = useState(false)
   const [showModelMention, setShowModelMention] = useState(false)
@@ -16,19 +14,6 @@ function ChatWindow({ chat, onSendMessage, models = [], sending, currentUser, me
   const messagesEndRef = useRef(null)
   const inputRef = useRef(null)
 
-  useEffect(() => {
-    const fetchLimits = async () => {
-      try {
-        const limitsData = await roleService.getCurrentUserLimits()
-        console.log('Fetched limits:', limitsData)
-        setLimits(limitsData)
-      } catch (error) {
-        console.error('Error fetching limits:', error)
-      }
-    }
-    fetchLimits()
-  }, [])
-
   useEffect(() => {
     if (chat?.messages) {
       const tokens = countChatTokens(chat.messages)
@@ -271,6 +256,9 @@ function ChatWindow({ chat, onSendMessage, models = [], sending, currentUser, me
                     className="message-content"
                     dangerouslySetInnerHTML={{ __html: formatMessage(msg.content) }}
                   />
+                  {msg.error && (
+                    <div className="message-error">⚠️ {msg.error}</div>
+                  )}
                 </div>
               )
             })}
@@ -1,32 +1,16 @@
 import { useState, useRef, useEffect } from 'react'
 import './Sidebar.css'
 import './LoadingSkeleton.css'
-import { roleService } from '../services/role.service'
 import { formatTokenCount, calculatePercentage } from '../utils/tokenCounter'
 
-function Sidebar({ chats, activeChat, onSelectChat, onNewChat, onDeleteChat, user, onLogout, onOpenProfile, onRenameChat, onPinChat, onOpenAdmin, onOpenUserSearch, loading, permissions }) {
+function Sidebar({ chats, activeChat, onSelectChat, onNewChat, onDeleteChat, user, onLogout, onOpenProfile, onRenameChat, onPinChat, onOpenAdmin, onOpenUserSearch, loading, permissions, limits }) {
   const [showMenu, setShowMenu] = useState(false)
   const [showChatMenu, setShowChatMenu] = useState(null)
   const [renameId, setRenameId] = useState(null)
   const [renameValue, setRenameValue] = useState('')
-  const [limits, setLimits] = useState(null)
   const menuRef = useRef(null)
   const chatMenuRef = useRef(null)
 
-  useEffect(() => {
-    const fetchLimits = async () => {
-      try {
-        const limitsData = await roleService.getCurrentUserLimits()
-        setLimits(limitsData)
-      } catch (error) {
-        console.error('Error fetching limits:', error)
-      }
-    }
-    if (user) {
-      fetchLimits()
-    }
-  }, [user])
-
   useEffect(() => {
     const handleClickOutside = (event) => {
       if (menuRef.current && !menuRef.current.contains(event.target)) {
@@ -147,9 +131,17 @@ function Sidebar({ chats, activeChat, onSelectChat, onNewChat, onDeleteChat, use
                     onClick={(e) => e.stopPropagation()}
                   />
                 ) : (
-                  <span className={`chat-title ${isDirectChat ? 'direct-chat-title' : ''}`}>
-                    {chat.title}
-                  </span>
+                  <div className="chat-text">
+                    <span className={`chat-title ${isDirectChat ? 'direct-chat-title' : ''}`}>
+                      {chat.title}
+                    </span>
+                    {chat.last_message?.content && (
+                      <span className="chat-preview">{chat.last_message.content}</span>
+                    )}
+                  </div>
+                )}
+                {chat.unread_count > 0 && activeChat !== chatId && (
+                  <span className="unread-badge">{chat.unread_count > 99 ? '99+' : chat.unread_count}</span>
                 )}
                 <div className="chat-actions">
                   <button 
@@ -0,0 +1,11 @@
+import api from './api'
+
+export const bootstrapService = {
+  // Everything the app needs on load: { user, chats (a sync page), models, limits, permissions }.
+  // Pass the chat sync cursor from the last load to get only chat changes
+  async load(chatCursor = null) {
+    const params = chatCursor ? { chat_cursor: chatCursor } : {}
+    const response = await api.get('/bootstrap/', { params })
+    return response.data
+  }
+}
@@ -1,4 +1,4 @@
-import api from './api'
+import api, { API_URL } from './api'
 
 export const chatService = {
   async getChats(includeMessages = true) {
@@ -10,6 +10,30 @@ export const chatService = {
     return response.data
   },
 
+  // Chats changed since the cursor of the last sync, following every page.
+  // With reset (no cursor, or one too old) `chats` is the whole list;
+  // otherwise merge `chats` by id and drop the `deleted` ids. Keep `cursor`.
+  async syncChats(cursor = null) {
+    const result = { chats: [], deleted: [], reset: false, cursor }
+    let hasMore = true
+    while (hasMore) {
+      const params = result.cursor ? { cursor: result.cursor } : {}
+      const { data } = await api.get('/chats/sync/', { params })
+      result.chats.push(...data.chats)
+      result.deleted.push(...data.deleted)
+      result.reset = result.reset || data.reset
+      result.cursor = data.cursor
+      hasMore = data.has_more
+    }
+    return result
+  },
+
+  // mode: 'keyword' (full-text) or 'semantic' (closest meaning)
+  async searchChats(query, { limit = 20, mode = 'keyword' } = {}) {
+    const response = await api.get('/chats/search/', { params: { q: query, limit, mode } })
+    return response.data
+  },
+
   async getChat(chatId) {
     const response = await api.get(`/chats/${chatId}/`)
     return response.data
@@ -25,11 +49,89 @@ export const chatService = {
     return response.data
   },
 
+  // Generates the AI reply on the server, which holds the model's credentials
+  // and saves the reply to the chat as it streams. onDelta gets each chunk of
+  // text; resolves with the full reply.
+  async streamCompletion(chatId, modelId, onDelta, { maxTokens = 1000 } = {}) {
+    const response = await fetch(`${API_URL}/chats/${chatId}/completions/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${localStorage.getItem('token')}`
+      },
+      body: JSON.stringify({ model_id: modelId, max_tokens: maxTokens })
+    })
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({}))
+      throw new Error(error.detail || `Completion failed: ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let content = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const events = buffer.split('\n\n')
+      buffer = events.pop()
+      for (const event of events) {
+        if (!event.startsWith('data: ')) continue
+        const data = JSON.parse(event.slice(6))
+        if (data.error) throw new Error(data.error)
+        if (data.delta) {
+          content += data.delta
+          onDelta?.(data.delta, content)
+        }
+      }
+    }
+    return content
+  },
+
+  // Clears the chat's unread count; returns { chat_id, unread_count, last_read_at }
+  async markRead(id) {
+    const response = await api.post(`/chats/${id}/read/`)
+    return response.data
+  },
+
   async deleteChat(id) {
     const response = await api.delete(`/chats/${id}/`)
     return response.data
   },
 
+  // action: 'delete' | 'archive'; pass chatIds, or filters { olderThan, unpinnedOnly }
+  async bulkChats({ action = 'delete', chatIds, olderThan, unpinnedOnly } = {}) {
+    const payload = { action }
+    if (chatIds) payload.chat_ids = chatIds
+    if (olderThan) payload.older_than = olderThan
+    if (unpinnedOnly) payload.unpinned_only = true
+    const response = await api.post('/chats/bulk/', payload)
+    return response.data
+  },
+
+  // Returns a Blob of NDJSON (gzipped when compress is true), one chat per line
+  async exportChats({ compress = false, includeArchived = false } = {}) {
+    const response = await api.get('/chats/export/', {
+      params: { compress, include_archived: includeArchived },
+      responseType: 'blob'
+    })
+    return response.data
+  },
+
+  // Starts a background import; poll getImportStatus(job.id) for progress
+  async importChats(file, resumeFrom = 1) {
+    const formData = new FormData()
+    formData.append('file', file)
+    const response = await api.post(`/chats/import/?resume_from=${resumeFrom}`, formData)
+    return response.data
+  },
+
+  async getImportStatus(jobId) {
+    const response = await api.get(`/chats/import/${jobId}/`)
+    return response.data
+  },
+
   async sendMessage(chatId, message) {
     const response = await api.post(`/chats/${chatId}/messages/`, message)
     return response.data
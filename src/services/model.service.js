@@ -21,6 +21,13 @@ export const modelService = {
     return response.data
   },
 
+  // One-off completion run by the server (not saved to a chat); messages are
+  // [{ role, content }]. Returns the reply text
+  async complete(id, messages, maxTokens = 1000) {
+    const response = await api.post(`/models/${id}/complete/`, { messages, max_tokens: maxTokens })
+    return response.data.content
+  },
+
   async testModel(id) {
     const response = await api.post(`/models/${id}/test/`)
     return response.data
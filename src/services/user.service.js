@@ -1,13 +1,21 @@
 import api from './api'
 
+const PAGE_SIZE = 50
+
 export const userService = {
-  async getUsers() {
-    const response = await api.get('/users/')
+  // Listings come one page at a time: { users, next_cursor }; pass next_cursor back for the next page
+  async getUsers(cursor = null) {
+    return this.getUsersPage({ limit: PAGE_SIZE, ...(cursor && { cursor }) })
+  },
+
+  async getPendingUsers(cursor = null) {
+    const response = await api.get('/users/pending/', { params: { limit: PAGE_SIZE, ...(cursor && { cursor }) } })
     return response.data
   },
 
-  async getPendingUsers() {
-    const response = await api.get('/users/pending/')
+  // params: limit, cursor, sort, order, role, custom_role
+  async getUsersPage(params = {}) {
+    const response = await api.get('/users/', { params })
     return response.data
   },
 
@@ -26,6 +34,22 @@ export const userService = {
     return response.data
   },
 
+  // Bulk actions return { succeeded, failed, results: [{ id, success, error }] }
+  async bulkApproveUsers(userIds) {
+    const response = await api.post('/users/bulk/approve/', { user_ids: userIds })
+    return response.data
+  },
+
+  async bulkUpdateUserRole(userIds, role, customRoleId) {
+    const response = await api.post('/users/bulk/role/', { user_ids: userIds, role, customRoleId })
+    return response.data
+  },
+
+  async bulkDeleteUsers(userIds) {
+    const response = await api.post('/users/bulk/delete/', { user_ids: userIds })
+    return response.data
+  },
+
   async searchUsers(query) {
     const response = await api.get(`/users/search/?query=${encodeURIComponent(query)}`)
     return response.data